@@ -1,12 +1,29 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
 import numpy as np
 import psycopg2
-from datetime import datetime
+import psycopg2.extensions
+import psycopg2.pool
+from psycopg2.extras import execute_values
+from psycopg2 import sql
+from collections import OrderedDict
+from contextlib import contextmanager
+import functools
+import hashlib
+import logging
+import logging.handlers
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
 import re
 import plotly.express as px
 import json
 import os
+import select
+import sys
+import sysconfig
+import threading
+import time
 
 # Import configuration
 try:
@@ -23,6 +40,43 @@ except ImportError:
     ADMIN_USERNAME = ""
     ADMIN_PASSWORD = ""
 
+# Optional tuning settings - older config.py files without them keep working
+try:
+    import config as app_config
+except ImportError:
+    app_config = None
+
+logger = logging.getLogger("analise_ministerios")
+
+def get_setting(name, default):
+    """Read an optional setting from config.py, falling back to the default."""
+    return getattr(app_config, name, default)
+
+# Relative paths in the settings point inside the app directory, whatever the working directory
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def get_path_setting(name, default):
+    """Read an optional file or directory setting, resolving relative paths against APP_DIR."""
+    path = get_setting(name, default)
+    return None if path is None else os.path.join(APP_DIR, path)
+
+DB_POOL_MIN_CONN = get_setting("DB_POOL_MIN_CONN", 1)
+DB_POOL_MAX_CONN = get_setting("DB_POOL_MAX_CONN", 10)
+DB_POOL_TIMEOUT = get_setting("DB_POOL_TIMEOUT", 10)
+DB_POOL_HEALTHCHECK_INTERVAL = get_setting("DB_POOL_HEALTHCHECK_INTERVAL", 60)
+DASHBOARD_CACHE_TTL = get_setting("DASHBOARD_CACHE_TTL", 300)
+AGGREGATION_MODE = get_setting("AGGREGATION_MODE", "sql")
+DASHBOARD_REFRESH_INTERVAL = get_setting("DASHBOARD_REFRESH_INTERVAL", 15)
+SNAPSHOT_CACHE_MAX_ENTRIES = get_setting("SNAPSHOT_CACHE_MAX_ENTRIES", 64)
+LIVE_UPDATES = get_setting("LIVE_UPDATES", True)
+SLOW_QUERY_THRESHOLD_MS = get_setting("SLOW_QUERY_THRESHOLD_MS", 200)
+SLOW_QUERY_LOG = get_path_setting("SLOW_QUERY_LOG", os.path.join("logs", "consultas_lentas.jsonl"))
+SLOW_QUERY_LOG_MAX_BYTES = get_setting("SLOW_QUERY_LOG_MAX_BYTES", 5_000_000)
+SLOW_QUERY_LOG_BACKUPS = get_setting("SLOW_QUERY_LOG_BACKUPS", 5)
+EXPORT_CACHE_DIR = get_path_setting("EXPORT_CACHE_DIR", os.path.join("cache", "exportacoes"))
+EXPORT_CACHE_MAX_FILES = get_setting("EXPORT_CACHE_MAX_FILES", 50)
+EXPORT_CHUNK_ROWS = get_setting("EXPORT_CHUNK_ROWS", 5000)
+
 # Set page configuration
 st.set_page_config(
     page_title="Premiação Anual dos Ministérios",
@@ -30,269 +84,1210 @@ st.set_page_config(
     layout="wide"
 )
 
-# Database connection function
-def connect_to_db():
-    """Connect to the PostgreSQL database."""
+# Month names stored in mes_referencia
+MESES = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", 
+         "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+
+# Requirement metrics (1-10) that make up the ranking
+SCORE_COLUMNS = ['pontualidade', 'assiduidade_celebracoes', 'assiduidade_reunioes', 'trabalho_equipe']
+
+# Performance instrumentation for the admin "Desempenho" panel. A collector is attached
+# to the current thread (the script run) only while the panel is enabled; otherwise the
+# timers and the cursor below return after a single attribute lookup.
+perf_state = threading.local()
+
+class PerfCollector:
+    """Timings, query counts and row counts gathered during one rerun."""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = []
+        self.queries = []
+    
+    def record(self, label, category, seconds):
+        self.timings.append((label, category, seconds))
+    
+    def record_query(self, statement, seconds, rows):
+        self.queries.append((statement, seconds, rows))
+    
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+def get_perf_collector():
+    """Return the collector of the current rerun, or None when instrumentation is off."""
+    return getattr(perf_state, "collector", None)
+
+def start_perf_collection():
+    perf_state.collector = PerfCollector()
+    return perf_state.collector
+
+def stop_perf_collection():
+    collector = get_perf_collector()
+    perf_state.collector = None
+    return collector
+
+@contextmanager
+def perf_timer(label, category="app"):
+    """Time the enclosed block into the current collector, if any."""
+    collector = get_perf_collector()
+    if collector is None:
+        yield
+        return
+    
+    start = time.perf_counter()
     try:
-        conn = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT,
-            client_encoding='UTF8'  # Força a codificação UTF-8
-        )
-        return conn
-    except Exception as e:
-        st.error(f"Erro ao conectar ao banco de dados: {str(e)}")
+        yield
+    finally:
+        collector.record(label, category, time.perf_counter() - start)
+
+def timed(label, category="app"):
+    """Decorator form of perf_timer."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if get_perf_collector() is None:
+                return func(*args, **kwargs)
+            with perf_timer(label, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Slow-query log: statements slower than SLOW_QUERY_THRESHOLD_MS are appended as JSON lines
+# to a rotating file, with a fingerprint that groups executions of the same statement.
+# Parameter values are never written, only their types.
+LITERAL_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%\(\w+\)s|%s"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\s+"), " "),
+    (re.compile(r"\(\?(?:, ?\?)*\)(?:, ?\(\?(?:, ?\?)*\))*"), "(...)"),
+]
+
+def normalize_statement(statement):
+    """Replace literals and placeholders with ? and collapse whitespace and VALUES lists."""
+    for pattern, replacement in LITERAL_PATTERNS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+def statement_fingerprint(normalized):
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+def describe_parameters(vars):
+    """The shape of the query parameters: their types, never their values."""
+    if vars is None:
         return None
+    if isinstance(vars, dict):
+        return {name: type(value).__name__ for name, value in vars.items()}
+    return [type(value).__name__ for value in vars]
 
-# Initialize the database and tables if they don't exist
-def initialize_database():
-    """Create the necessary tables if they don't exist."""
-    conn = connect_to_db()
-    if conn:
+LIBRARY_PATHS = tuple({sysconfig.get_paths()[name] for name in ("stdlib", "purelib", "platlib")})
+
+def find_call_site():
+    """Return 'file:line function' of the first caller outside this cursor and the libraries."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(LIBRARY_PATHS) and not isinstance(frame.f_locals.get("self"), InstrumentedCursor):
+            return f"{os.path.basename(filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+def get_slow_query_logger():
+    """Return the slow-query logger, attaching the rotating file handler on first use."""
+    logger = logging.getLogger("analise_ministerios.consultas_lentas")
+    if not logger.handlers:
+        directory = os.path.dirname(SLOW_QUERY_LOG)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            SLOW_QUERY_LOG, maxBytes=SLOW_QUERY_LOG_MAX_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+def slow_query_log_enabled():
+    """The slow-query log is off when either its threshold or its file is None."""
+    return SLOW_QUERY_THRESHOLD_MS is not None and SLOW_QUERY_LOG is not None
+
+def log_slow_query(statement, vars, seconds, rows, error=None):
+    if not slow_query_log_enabled():
+        return
+    normalized = normalize_statement(statement)
+    entry = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "fingerprint": statement_fingerprint(normalized),
+        "consulta": normalized,
+        "parametros": describe_parameters(vars),
+        "duracao_ms": round(seconds * 1000, 3),
+        "linhas": rows,
+        "origem": find_call_site()
+    }
+    if error is not None:
+        entry["erro"] = type(error).__name__
+    try:
+        get_slow_query_logger().info(json.dumps(entry, ensure_ascii=False))
+    except OSError:
+        pass
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """Cursor used by every connection: feeds the Desempenho panel and the slow-query log.
+
+    pd.read_sql_query and execute_values go through execute() as well, and COPY through
+    copy_expert(). A named (server-side) cursor only declares its query in execute() and
+    does the work when fetching, so its fetchmany()/fetchall() calls are timed too, under
+    the declared statement; iterating over it directly is not.
+    """
+    
+    _declared = None
+    
+    def _timed(self, query, vars, call, *args):
+        collector = get_perf_collector()
+        log_enabled = slow_query_log_enabled()
+        if collector is None and not log_enabled:
+            return call(*args)
+        
+        error = None
+        result = None
+        start = time.perf_counter()
+        try:
+            result = call(*args)
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            slow = log_enabled and seconds * 1000 >= SLOW_QUERY_THRESHOLD_MS
+            if collector is not None or slow:
+                statement = query.as_string(self) if isinstance(query, sql.Composable) else query
+                if isinstance(statement, bytes):
+                    statement = statement.decode("utf-8", "replace")
+                rows = len(result) if isinstance(result, list) else max(self.rowcount, 0)
+                if collector is not None:
+                    collector.record_query(statement, seconds, rows)
+                if slow:
+                    log_slow_query(statement, vars, seconds, rows, error)
+    
+    def execute(self, query, vars=None):
+        if self.name is not None:
+            self._declared = (query, vars)
+        return self._timed(query, vars, super().execute, query, vars)
+    
+    def copy_expert(self, sql, file, size=8192):
+        return self._timed(sql, None, super().copy_expert, sql, file, size)
+    
+    def fetchmany(self, size=None):
+        if self._declared is None:
+            return super().fetchmany() if size is None else super().fetchmany(size)
+        query, vars = self._declared
+        return self._timed(query, vars, super().fetchmany, self.arraysize if size is None else size)
+    
+    def fetchall(self):
+        if self._declared is None:
+            return super().fetchall()
+        query, vars = self._declared
+        return self._timed(query, vars, super().fetchall)
+
+class TimedConnection(psycopg2.extensions.connection):
+    """Connection class of the pool and the listener: opening one is shown in the Desempenho panel.
+
+    psycopg2's pool opens connections lazily, on a checkout that finds none idle, so
+    timing here catches every real connect rather than the checkouts.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        with perf_timer("Abertura de conexão", "db"):
+            super().__init__(*args, **kwargs)
+
+# Parameters shared by the pool and by dedicated connections
+def get_connection_params():
+    """Return the keyword arguments used to open a PostgreSQL connection."""
+    return {
+        "dbname": DB_NAME,
+        "user": DB_USER,
+        "password": DB_PASSWORD,
+        "host": DB_HOST,
+        "port": DB_PORT,
+        "client_encoding": "UTF8",  # Força a codificação UTF-8
+        "connection_factory": TimedConnection,
+        "cursor_factory": InstrumentedCursor
+    }
+
+class ConnectionPool:
+    """Blocking, health-checked wrapper around psycopg2's ThreadedConnectionPool.
+
+    psycopg2 raises PoolError as soon as every connection is in use; here callers
+    wait up to `timeout` seconds for a free slot instead, and the time spent
+    waiting is recorded so the admin area can show how saturated the pool is.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, healthcheck_interval):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self._pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, **get_connection_params())
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self._stats = {
+            "checkouts": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+            "timeouts": 0,
+            "discarded": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+            "last_wait": 0.0
+        }
+
+    def _is_healthy(self, conn):
+        """Discard closed/broken connections and ping the ones idle for too long."""
+        if conn.closed or conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        
+        with self._lock:
+            last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.healthcheck_interval:
+            return True
+        
         try:
             cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """Check out a healthy connection, waiting for a free slot if necessary."""
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise psycopg2.pool.PoolError(
+                f"Nenhuma conexão livre após {self.timeout} segundos ({self.maxconn} em uso)."
+            )
+        
+        try:
+            # One attempt per pooled connection plus a fresh one
+            for _ in range(self.maxconn + 1):
+                conn = self._pool.getconn()
+                if self._is_healthy(conn):
+                    break
+                with self._lock:
+                    self._last_used.pop(id(conn), None)
+                    self._stats["discarded"] += 1
+                self._pool.putconn(conn, close=True)
+            else:
+                raise psycopg2.OperationalError("Não foi possível obter uma conexão saudável.")
+        except Exception:
+            self._slots.release()
+            raise
+        
+        wait = time.monotonic() - start
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._stats["in_use"])
+            self._stats["total_wait"] += wait
+            self._stats["max_wait"] = max(self._stats["max_wait"], wait)
+            self._stats["last_wait"] = wait
+        return conn
+
+    def putconn(self, conn):
+        """Return a connection to the pool (psycopg2 rolls back unfinished transactions)."""
+        try:
+            if conn.closed:
+                with self._lock:
+                    self._last_used.pop(id(conn), None)
+                self._pool.putconn(conn, close=True)
+            else:
+                with self._lock:
+                    self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn)
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Snapshot of the pool metrics."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["max_size"] = self.maxconn
+        stats["avg_wait"] = stats["total_wait"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+def create_connection_pool():
+    """Create a connection pool from the configured settings."""
+    return ConnectionPool(DB_POOL_MIN_CONN, DB_POOL_MAX_CONN, DB_POOL_TIMEOUT, DB_POOL_HEALTHCHECK_INTERVAL)
+
+# Process-wide pool shared by every Streamlit session and rerun
+@st.cache_resource(show_spinner=False)
+def get_shared_connection_pool():
+    """Create the connection pool once per process."""
+    return create_connection_pool()
+
+# st.cache_resource does not store values outside a script run (CLI commands,
+# background threads), so those callers share this module-level pool instead
+standalone_pool = None
+standalone_pool_lock = threading.Lock()
+
+def get_connection_pool():
+    """Return the connection pool for the current context, creating it on first use."""
+    global standalone_pool
+    if get_script_run_ctx(suppress_warning=True) is not None:
+        return get_shared_connection_pool()
+    
+    with standalone_pool_lock:
+        if standalone_pool is None:
+            standalone_pool = create_connection_pool()
+        return standalone_pool
+
+@contextmanager
+def db_connection():
+    """Check out a pooled connection for the duration of a `with` block.
+
+    Yields None (after logging the error) when no connection can be obtained, so
+    callers keep the usual `if conn:` guard and report it in their own way: the
+    CLI, the listener thread and the benchmarks have no page to show it on.
+    """
+    pool = None
+    conn = None
+    try:
+        pool = get_connection_pool()
+        with perf_timer("Conexão do pool", "db"):
+            conn = pool.getconn()
+    except Exception:
+        logger.exception("Erro ao conectar ao banco de dados")
+    
+    if conn is None:
+        yield None
+        return
+    
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+@contextmanager
+def required_db_connection():
+    """Like db_connection, but raises OperationalError instead of yielding None.
+
+    Used by the cached loaders: an exception is not cached, so the next rerun retries.
+    """
+    with db_connection() as conn:
+        if not conn:
+            raise psycopg2.OperationalError("Não foi possível conectar ao banco de dados.")
+        yield conn
+
+def read_frame(query, params=None):
+    """Run a read-only query on a pooled connection and return the rows as a DataFrame."""
+    with required_db_connection() as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+# Schema migrations: ordered steps, each applied once and recorded in schema_version
+def migration_create_evaluations_table(cur):
+    """Create the table for ministry evaluations."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS avaliacoes_ministerios (
+            id SERIAL PRIMARY KEY,
+            ministerio VARCHAR(100) NOT NULL,
+            nome VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
             
-            # Check if table exists first
-            cur.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_name = 'avaliacoes_ministerios'
-                );
-            """)
+            pontualidade INTEGER CHECK (pontualidade BETWEEN 1 AND 10),
+            assiduidade_celebracoes INTEGER CHECK (assiduidade_celebracoes BETWEEN 1 AND 10),
+            assiduidade_reunioes INTEGER CHECK (assiduidade_reunioes BETWEEN 1 AND 10),
+            trabalho_equipe INTEGER CHECK (trabalho_equipe BETWEEN 1 AND 10),
             
-            table_exists = cur.fetchone()[0]
+            consagracao_semana1 TEXT,
+            consagracao_semana2 TEXT,
+            consagracao_semana3 TEXT,
+            consagracao_semana4 TEXT,
+            consagracao_semana5 TEXT,
             
-            # Only create table if it doesn't exist
-            if not table_exists:
-                # Create table for ministry evaluations
-                cur.execute("""
-                    CREATE TABLE avaliacoes_ministerios (
-                        id SERIAL PRIMARY KEY,
-                        ministerio VARCHAR(100) NOT NULL,
-                        nome VARCHAR(255) NOT NULL,
-                        email VARCHAR(255) NOT NULL,
-                        
-                        pontualidade INTEGER CHECK (pontualidade BETWEEN 1 AND 10),
-                        assiduidade_celebracoes INTEGER CHECK (assiduidade_celebracoes BETWEEN 1 AND 10),
-                        assiduidade_reunioes INTEGER CHECK (assiduidade_reunioes BETWEEN 1 AND 10),
-                        trabalho_equipe INTEGER CHECK (trabalho_equipe BETWEEN 1 AND 10),
-                        
-                        consagracao_semana1 TEXT,
-                        consagracao_semana2 TEXT,
-                        consagracao_semana3 TEXT,
-                        consagracao_semana4 TEXT,
-                        consagracao_semana5 TEXT,
-                        
-                        preparo_tecnico_semana1 TEXT,
-                        preparo_tecnico_semana2 TEXT,
-                        preparo_tecnico_semana3 TEXT,
-                        preparo_tecnico_semana4 TEXT,
-                        preparo_tecnico_semana5 TEXT,
-                        
-                        reunioes_semana1 TEXT,
-                        reunioes_semana2 TEXT,
-                        reunioes_semana3 TEXT,
-                        reunioes_semana4 TEXT,
-                        reunioes_semana5 TEXT,
-                        
-                        treinamentos JSONB,
-                        estrategias JSONB,
-                        
-                        novos_membros INTEGER,
-                        membros_qualificacao INTEGER,
-                        
-                        nomes_novos_membros TEXT,
-                        nomes_membros_qualificacao TEXT,
-                        
-                        comentarios TEXT,
-                        
-                        data_submissao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        mes_referencia VARCHAR(20),
-                        ano_referencia INTEGER,
-                        semana_referencia INTEGER
-                    )
-                """)
-                st.success("Banco de dados inicializado com sucesso!")
-            else:
-                # Verificar se a coluna semana_referencia existe
-                cur.execute("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.columns 
-                        WHERE table_name = 'avaliacoes_ministerios' AND column_name = 'semana_referencia'
-                    );
-                """)
-                semana_column_exists = cur.fetchone()[0]
-                
-                # Adicionar a coluna se não existir
-                if not semana_column_exists:
-                    cur.execute("""
-                        ALTER TABLE avaliacoes_ministerios 
-                        ADD COLUMN semana_referencia INTEGER;
-                    """)
-                
-                # Verificar se as colunas para nomes de membros existem
-                cur.execute("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.columns 
-                        WHERE table_name = 'avaliacoes_ministerios' AND column_name = 'nomes_novos_membros'
-                    );
-                """)
-                novos_membros_column_exists = cur.fetchone()[0]
-                
-                # Adicionar as colunas se não existirem
-                if not novos_membros_column_exists:
-                    cur.execute("""
-                        ALTER TABLE avaliacoes_ministerios 
-                        ADD COLUMN nomes_novos_membros TEXT,
-                        ADD COLUMN nomes_membros_qualificacao TEXT;
-                    """)
-                
-                # Verificar se precisa alterar a estrutura da tabela para usar JSONB
-                try:
-                    cur.execute("""
-                        ALTER TABLE avaliacoes_ministerios 
-                        ALTER COLUMN treinamentos TYPE JSONB USING treinamentos::JSONB,
-                        ALTER COLUMN estrategias TYPE JSONB USING estrategias::JSONB;
-                    """)
-                except Exception as e:
-                    # Se houver erro, é provável que a conversão já tenha sido feita
-                    pass
+            preparo_tecnico_semana1 TEXT,
+            preparo_tecnico_semana2 TEXT,
+            preparo_tecnico_semana3 TEXT,
+            preparo_tecnico_semana4 TEXT,
+            preparo_tecnico_semana5 TEXT,
             
-            conn.commit()
-            return True
-        except Exception as e:
-            st.error(f"Erro ao inicializar o banco de dados: {e}")
-            return False
-        finally:
-            cur.close()
-            conn.close()
-    return False
+            reunioes_semana1 TEXT,
+            reunioes_semana2 TEXT,
+            reunioes_semana3 TEXT,
+            reunioes_semana4 TEXT,
+            reunioes_semana5 TEXT,
+            
+            treinamentos JSONB,
+            estrategias JSONB,
+            
+            novos_membros INTEGER,
+            membros_qualificacao INTEGER,
+            
+            nomes_novos_membros TEXT,
+            nomes_membros_qualificacao TEXT,
+            
+            comentarios TEXT,
+            
+            data_submissao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            mes_referencia VARCHAR(20),
+            ano_referencia INTEGER,
+            semana_referencia INTEGER
+        )
+    """)
 
-# Save form data to database
-def save_evaluation(data):
-    """Save the evaluation data to the database."""
-    conn = connect_to_db()
-    if conn:
-        try:
-            cur = conn.cursor()
+def migration_add_week_column(cur):
+    """Add semana_referencia to tables created before weekly evaluations."""
+    cur.execute("""
+        ALTER TABLE avaliacoes_ministerios 
+        ADD COLUMN IF NOT EXISTS semana_referencia INTEGER;
+    """)
+
+def migration_add_member_name_columns(cur):
+    """Add the member name columns to tables created before they existed."""
+    cur.execute("""
+        ALTER TABLE avaliacoes_ministerios 
+        ADD COLUMN IF NOT EXISTS nomes_novos_membros TEXT,
+        ADD COLUMN IF NOT EXISTS nomes_membros_qualificacao TEXT;
+    """)
+
+def migration_convert_lists_to_jsonb(cur):
+    """Convert treinamentos/estrategias to JSONB where they are still stored as text."""
+    cur.execute("""
+        SELECT column_name 
+        FROM information_schema.columns 
+        WHERE table_name = 'avaliacoes_ministerios' 
+        AND column_name IN ('treinamentos', 'estrategias') 
+        AND data_type <> 'jsonb'
+    """)
+    for (column,) in cur.fetchall():
+        cur.execute(
+            sql.SQL("ALTER TABLE avaliacoes_ministerios ALTER COLUMN {0} TYPE JSONB USING {0}::JSONB").format(
+                sql.Identifier(column)
+            )
+        )
+
+def migration_remove_duplicate_evaluations(cur):
+    """Collapse duplicate ministry/week rows, keeping the most recent submission."""
+    cur.execute("""
+        DELETE FROM avaliacoes_ministerios a
+        USING (
+            SELECT 
+                id,
+                ROW_NUMBER() OVER (
+                    PARTITION BY ministerio, ano_referencia, mes_referencia, semana_referencia
+                    ORDER BY data_submissao DESC NULLS LAST, id DESC
+                ) AS posicao
+            FROM avaliacoes_ministerios
+            WHERE semana_referencia IS NOT NULL
+        ) d
+        WHERE a.id = d.id AND d.posicao > 1
+    """)
+
+def migration_add_evaluation_unique_key(cur):
+    """Enforce one row per ministry/week so save_evaluation can upsert atomically."""
+    cur.execute("""
+        ALTER TABLE avaliacoes_ministerios 
+        ADD CONSTRAINT avaliacoes_ministerios_chave_semana 
+        UNIQUE (ministerio, ano_referencia, mes_referencia, semana_referencia)
+    """)
+
+# Composite indexes backing the dashboard filters and the member lookup.
+# The period index also covers the ranking metrics and the year dropdown (index-only scans).
+DASHBOARD_INDEXES = [
+    ("idx_avaliacoes_periodo", """
+        avaliacoes_ministerios (ano_referencia, mes_referencia, semana_referencia)
+        INCLUDE (ministerio, pontualidade, assiduidade_celebracoes, assiduidade_reunioes, trabalho_equipe)
+    """),
+    ("idx_avaliacoes_mes_semana", "avaliacoes_ministerios (mes_referencia, semana_referencia)"),
+    ("idx_avaliacoes_membros_recentes", "avaliacoes_ministerios (ministerio, ano_referencia, mes_referencia, data_submissao DESC)"),
+]
+
+def migration_create_dashboard_indexes(cur):
+    """Create the managed set of dashboard indexes."""
+    for name, definition in DASHBOARD_INDEXES:
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+    cur.execute("ANALYZE avaliacoes_ministerios")
+
+def migration_create_submission_index(cur):
+    """Index data_submissao for the incremental refresh of the dashboard rows."""
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_avaliacoes_data_submissao ON avaliacoes_ministerios (data_submissao)")
+    cur.execute("ANALYZE avaliacoes_ministerios")
+
+def migration_create_summary_table(cur):
+    """Create the per-week summary table used by the ranking and fill it from the evaluations."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS resumo_ministerios (
+            ministerio VARCHAR(100) NOT NULL,
+            ano_referencia INTEGER NOT NULL,
+            mes_referencia VARCHAR(20) NOT NULL,
+            semana_referencia INTEGER NOT NULL,
             
-            # Primeiro, verifica se já existe uma entrada para este ministério, semana, mês e ano
-            cur.execute("""
-                SELECT id, nomes_novos_membros, nomes_membros_qualificacao 
-                FROM avaliacoes_ministerios 
-                WHERE ministerio = %s 
-                AND semana_referencia = %s 
-                AND mes_referencia = %s 
-                AND ano_referencia = %s
-            """, (data["ministerio"], data["semana_referencia"], data["mes_referencia"], data["ano_referencia"]))
+            avaliacoes INTEGER NOT NULL,
+            soma_pontualidade INTEGER,
+            contagem_pontualidade INTEGER NOT NULL,
+            soma_assiduidade_celebracoes INTEGER,
+            contagem_assiduidade_celebracoes INTEGER NOT NULL,
+            soma_assiduidade_reunioes INTEGER,
+            contagem_assiduidade_reunioes INTEGER NOT NULL,
+            soma_trabalho_equipe INTEGER,
+            contagem_trabalho_equipe INTEGER NOT NULL,
             
-            result = cur.fetchone()
+            novos_membros INTEGER,
+            membros_qualificacao INTEGER,
             
-            # Filtrar apenas os arrays não vazios
-            treinamentos_clean = [t for t in data["treinamentos"] if t and t.strip()]
-            estrategias_clean = [e for e in data["estrategias"] if e and e.strip()]
+            atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (ministerio, ano_referencia, mes_referencia, semana_referencia)
+        )
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_resumo_periodo 
+        ON resumo_ministerios (ano_referencia, mes_referencia, semana_referencia)
+    """)
+    rebuild_summary_table(cur)
+
+def migration_create_members_table(cur):
+    """Create membros_ministerios and fill it from the newline-joined name columns.
+
+    Each ministry/month takes the lists of its latest submission (what the form loads);
+    first_seen is the earliest submission that mentions the name.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS membros_ministerios (
+            id SERIAL PRIMARY KEY,
+            ministerio VARCHAR(100) NOT NULL,
+            ano_referencia INTEGER NOT NULL,
+            mes_referencia VARCHAR(20) NOT NULL,
+            nome VARCHAR(255) NOT NULL,
+            status VARCHAR(20) NOT NULL CHECK (status IN ('novo', 'qualificacao')),
+            primeiro_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            promovido_em TIMESTAMP,
+            UNIQUE (ministerio, ano_referencia, mes_referencia, nome)
+        )
+    """)
+    cur.execute("""
+        WITH avaliacoes AS (
+            SELECT 
+                id, ministerio, ano_referencia, mes_referencia, data_submissao,
+                nomes_novos_membros, nomes_membros_qualificacao,
+                ROW_NUMBER() OVER (
+                    PARTITION BY ministerio, ano_referencia, mes_referencia
+                    ORDER BY data_submissao DESC NULLS LAST, id DESC
+                ) = 1 AS ultima
+            FROM avaliacoes_ministerios
+            WHERE ano_referencia IS NOT NULL AND mes_referencia IS NOT NULL
+        ),
+        nomes AS (
+            SELECT 
+                a.ministerio, a.ano_referencia, a.mes_referencia, a.data_submissao, a.ultima,
+                btrim(n.nome) AS nome, n.status, n.posicao
+            FROM avaliacoes a
+            CROSS JOIN LATERAL (
+                SELECT nome, 'novo' AS status, posicao
+                FROM regexp_split_to_table(COALESCE(a.nomes_novos_membros, ''), E'\\n') WITH ORDINALITY AS t(nome, posicao)
+                UNION ALL
+                SELECT nome, 'qualificacao', 1000000 + posicao
+                FROM regexp_split_to_table(COALESCE(a.nomes_membros_qualificacao, ''), E'\\n') WITH ORDINALITY AS t(nome, posicao)
+            ) n
+            WHERE btrim(n.nome) <> ''
+        )
+        INSERT INTO membros_ministerios (ministerio, ano_referencia, mes_referencia, nome, status, primeiro_registro)
+        SELECT 
+            atual.ministerio, atual.ano_referencia, atual.mes_referencia, atual.nome,
+            CASE WHEN bool_or(atual.status = 'novo') THEN 'novo' ELSE 'qualificacao' END,
+            (
+                SELECT MIN(h.data_submissao) FROM nomes h
+                WHERE h.ministerio = atual.ministerio 
+                AND h.ano_referencia = atual.ano_referencia 
+                AND h.mes_referencia = atual.mes_referencia 
+                AND h.nome = atual.nome
+            )
+        FROM nomes atual
+        WHERE atual.ultima
+        GROUP BY atual.ministerio, atual.ano_referencia, atual.mes_referencia, atual.nome
+        ORDER BY atual.ministerio, atual.ano_referencia, atual.mes_referencia, MIN(atual.posicao)
+    """)
+
+# Weekly activities move from fifteen wide columns to one row per evaluation, category and week
+WIDE_ACTIVITY_COLUMNS = [
+    f"{categoria}_semana{semana}"
+    for categoria in ("consagracao", "preparo_tecnico", "reunioes")
+    for semana in range(1, 6)
+]
+
+def migration_create_weekly_activities_table(cur):
+    """Create atividades_semanais, copy the filled week columns into it and drop them."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS atividades_semanais (
+            avaliacao_id INTEGER NOT NULL REFERENCES avaliacoes_ministerios (id) ON DELETE CASCADE,
+            categoria VARCHAR(30) NOT NULL,
+            semana SMALLINT NOT NULL CHECK (semana BETWEEN 1 AND 5),
+            texto TEXT NOT NULL,
+            PRIMARY KEY (avaliacao_id, categoria, semana)
+        )
+    """)
+    
+    cur.execute("""
+        SELECT column_name FROM information_schema.columns 
+        WHERE table_name = 'avaliacoes_ministerios' AND column_name = ANY(%s)
+    """, (WIDE_ACTIVITY_COLUMNS,))
+    existing = {row[0] for row in cur.fetchall()}
+    columns = [column for column in WIDE_ACTIVITY_COLUMNS if column in existing]
+    if not columns:
+        return
+    
+    values = sql.SQL(", ").join(
+        sql.SQL("({}, {}, a.{})").format(
+            sql.Literal(column.rsplit("_semana", 1)[0]),
+            sql.Literal(int(column[-1])),
+            sql.Identifier(column)
+        )
+        for column in columns
+    )
+    cur.execute(sql.SQL("""
+        INSERT INTO atividades_semanais (avaliacao_id, categoria, semana, texto)
+        SELECT a.id, w.categoria, w.semana, btrim(w.texto)
+        FROM avaliacoes_ministerios a
+        CROSS JOIN LATERAL (VALUES {}) AS w(categoria, semana, texto)
+        WHERE btrim(w.texto) <> ''
+        ON CONFLICT DO NOTHING
+    """).format(values))
+    
+    cur.execute(sql.SQL("ALTER TABLE avaliacoes_ministerios {}").format(
+        sql.SQL(", ").join(
+            sql.SQL("DROP COLUMN {}").format(sql.Identifier(column)) for column in columns
+        )
+    ))
+
+def migration_create_rankings_table(cur):
+    """Create the precomputed monthly and cumulative placings and fill them from the summary."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS classificacoes_ministerios (
+            ano_referencia INTEGER NOT NULL,
+            tipo VARCHAR(20) NOT NULL CHECK (tipo IN ('mensal', 'acumulado')),
+            mes_referencia VARCHAR(20) NOT NULL,
+            mes_numero SMALLINT NOT NULL,
+            ministerio VARCHAR(100) NOT NULL,
             
-            # Converter arrays para formato JSON
-            treinamentos_json = json.dumps(treinamentos_clean)
-            estrategias_json = json.dumps(estrategias_clean)
+            avaliacoes INTEGER NOT NULL,
+            pontualidade DOUBLE PRECISION,
+            assiduidade_celebracoes DOUBLE PRECISION,
+            assiduidade_reunioes DOUBLE PRECISION,
+            trabalho_equipe DOUBLE PRECISION,
+            pontuacao_total DOUBLE PRECISION NOT NULL,
+            colocacao INTEGER NOT NULL,
             
-            if result:
-                # Se já existe, atualiza a entrada
-                entry_id = result[0]
+            atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (ano_referencia, tipo, mes_numero, ministerio)
+        )
+    """)
+    rebuild_rankings_table(cur)
+
+# Numeric period key (year * 100 + month, e.g. 202503 for Março de 2025), derived from
+# the stored month name so chronological filters and ordering can use an index
+PERIOD_KEY_SQL = sql.SQL("ano_referencia * 100 + CASE mes_referencia {} END").format(
+    sql.SQL(" ").join(
+        sql.SQL("WHEN {} THEN {}").format(sql.Literal(mes), sql.Literal(numero))
+        for numero, mes in enumerate(MESES, start=1)
+    )
+)
+
+PERIOD_KEY_INDEXES = [
+    ("idx_avaliacoes_chave_periodo", "avaliacoes_ministerios (periodo, semana_referencia)"),
+    ("idx_resumo_chave_periodo", "resumo_ministerios (periodo, semana_referencia)"),
+    ("idx_membros_chave_periodo", "membros_ministerios (ministerio, periodo)"),
+]
+
+def migration_add_period_key(cur):
+    """Add the generated periodo column (filled for existing rows) and its indexes."""
+    for table in ("avaliacoes_ministerios", "resumo_ministerios", "membros_ministerios"):
+        cur.execute(sql.SQL(
+            "ALTER TABLE {} ADD COLUMN IF NOT EXISTS periodo INTEGER GENERATED ALWAYS AS ({}) STORED"
+        ).format(sql.Identifier(table), PERIOD_KEY_SQL))
+    for name, definition in PERIOD_KEY_INDEXES:
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+    for table in ("avaliacoes_ministerios", "resumo_ministerios", "membros_ministerios"):
+        cur.execute(f"ANALYZE {table}")
+
+# Month names typed by hand that only differ from MESES in case, spaces or the "ç"
+MONTH_MATCH_SQL = "lower(translate(btrim({column}), 'çÇ', 'cc')) = lower(translate(m.mes, 'çÇ', 'cc'))"
+
+def migration_normalize_month_names(cur):
+    """Fix month names outside MESES where possible, report the rest and reject new ones.
+
+    Those rows have no periodo, so the year filters leave them out. A fix that would
+    duplicate an existing row is skipped; skipped and unknown names are logged and kept,
+    and the CHECK constraint is only validated once none is left.
+    """
+    corrections = [
+        ("avaliacoes_ministerios", "ministerio, ano_referencia, semana_referencia",
+         "o.semana_referencia IS NOT DISTINCT FROM t.semana_referencia", "data_submissao DESC NULLS LAST, id DESC"),
+        ("membros_ministerios", "ministerio, ano_referencia, nome", "o.nome = t.nome", "id"),
+    ]
+    fixed = 0
+    for table, key, same_key, preference in corrections:
+        cur.execute(f"""
+            WITH correcoes AS (
+                SELECT DISTINCT ON ({key}, m.mes) t.id, m.mes
+                FROM {table} t
+                JOIN unnest(%(meses)s::text[]) AS m(mes) ON {MONTH_MATCH_SQL.format(column="t.mes_referencia")}
+                WHERE t.mes_referencia <> ALL(%(meses)s)
+                AND NOT EXISTS (
+                    SELECT 1 FROM {table} o
+                    WHERE o.ministerio = t.ministerio AND o.ano_referencia = t.ano_referencia
+                    AND o.mes_referencia = m.mes AND {same_key}
+                )
+                ORDER BY {key}, m.mes, {preference}
+            )
+            UPDATE {table} t SET mes_referencia = c.mes
+            FROM correcoes c
+            WHERE t.id = c.id
+        """, {"meses": MESES})
+        fixed += cur.rowcount
+    
+    if fixed:
+        rebuild_summary_table(cur)
+        rebuild_rankings_table(cur)
+    
+    cur.execute("""
+        SELECT mes_referencia, COUNT(*) FROM avaliacoes_ministerios
+        WHERE mes_referencia <> ALL(%s)
+        GROUP BY mes_referencia
+        ORDER BY mes_referencia
+    """, (MESES,))
+    remaining = cur.fetchall()
+    
+    cur.execute(sql.SQL(
+        "ALTER TABLE avaliacoes_ministerios ADD CONSTRAINT avaliacoes_ministerios_mes_valido "
+        "CHECK (mes_referencia IN ({})) NOT VALID"
+    ).format(sql.SQL(", ").join(sql.Literal(mes) for mes in MESES)))
+    if remaining:
+        logger.warning(
+            "%s avaliações com mês fora da lista ficam fora dos filtros por ano; corrija-as e valide "
+            "avaliacoes_ministerios_mes_valido: %s",
+            sum(count for _, count in remaining),
+            ", ".join(f"{mes!r} ({count})" for mes, count in remaining)
+        )
+    else:
+        cur.execute("ALTER TABLE avaliacoes_ministerios VALIDATE CONSTRAINT avaliacoes_ministerios_mes_valido")
+
+def migration_add_change_timestamp(cur):
+    """Add atualizado_em to the evaluations, stamped by a trigger on every INSERT and UPDATE.
+
+    Promotions and imports rewrite rows without touching data_submissao; this column
+    is the change cursor of the dashboard snapshots instead.
+    """
+    # Existing rows start at their submission time (capped at now), not all at the migration
+    # time, which would keep every row inside the delta's overlap window until the next change
+    cur.execute("ALTER TABLE avaliacoes_ministerios ADD COLUMN IF NOT EXISTS atualizado_em TIMESTAMP")
+    cur.execute("""
+        UPDATE avaliacoes_ministerios 
+        SET atualizado_em = LEAST(COALESCE(data_submissao, TIMESTAMP 'epoch'), LOCALTIMESTAMP)
+        WHERE atualizado_em IS NULL
+    """)
+    cur.execute("""
+        ALTER TABLE avaliacoes_ministerios 
+        ALTER COLUMN atualizado_em SET DEFAULT CURRENT_TIMESTAMP,
+        ALTER COLUMN atualizado_em SET NOT NULL
+    """)
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION marcar_atualizacao_avaliacao() RETURNS trigger AS $$
+        BEGIN
+            NEW.atualizado_em := CURRENT_TIMESTAMP;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    cur.execute("DROP TRIGGER IF EXISTS avaliacoes_marcar_atualizacao ON avaliacoes_ministerios")
+    cur.execute("""
+        CREATE TRIGGER avaliacoes_marcar_atualizacao
+        BEFORE INSERT OR UPDATE ON avaliacoes_ministerios
+        FOR EACH ROW EXECUTE FUNCTION marcar_atualizacao_avaliacao()
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_avaliacoes_atualizado_em ON avaliacoes_ministerios (atualizado_em)")
+    cur.execute("ANALYZE avaliacoes_ministerios")
+
+def migration_rebuild_rankings(cur):
+    """Recompute the stored placings after RANKING_TIE_BREAK_SQL started ordering names by code point."""
+    rebuild_rankings_table(cur)
+
+MIGRATIONS = [
+    (1, "Cria a tabela avaliacoes_ministerios", migration_create_evaluations_table),
+    (2, "Adiciona a coluna semana_referencia", migration_add_week_column),
+    (3, "Adiciona as colunas de nomes de membros", migration_add_member_name_columns),
+    (4, "Converte treinamentos e estratégias para JSONB", migration_convert_lists_to_jsonb),
+    (5, "Remove avaliações duplicadas da mesma semana", migration_remove_duplicate_evaluations),
+    (6, "Adiciona a chave única por ministério e semana", migration_add_evaluation_unique_key),
+    (7, "Cria os índices do painel da gestora", migration_create_dashboard_indexes),
+    (8, "Cria a tabela de resumo por ministério e semana", migration_create_summary_table),
+    (9, "Cria a tabela membros_ministerios a partir das listas de nomes", migration_create_members_table),
+    (10, "Move as atividades semanais para a tabela atividades_semanais", migration_create_weekly_activities_table),
+    (11, "Cria o índice de data_submissao usado na atualização incremental do painel", migration_create_submission_index),
+    (12, "Cria a tabela classificacoes_ministerios da premiação anual", migration_create_rankings_table),
+    (13, "Adiciona a chave numérica de período (ano * 100 + mês)", migration_add_period_key),
+    (14, "Adiciona a coluna atualizado_em, marcada por gatilho a cada alteração", migration_add_change_timestamp),
+    (15, "Corrige os nomes de mês fora do padrão e passa a rejeitá-los", migration_normalize_month_names),
+    (16, "Recalcula as classificações com o mesmo desempate do painel", migration_rebuild_rankings),
+]
+
+# Arbitrary key for the advisory lock that serializes concurrent bootstraps
+SCHEMA_LOCK_ID = 20250301
+
+def apply_migrations(conn):
+    """Apply pending migrations in order, one transaction per step.
+
+    Returns the schema version after the run.
+    """
+    cur = conn.cursor()
+    try:
+        # Several app processes may start at once; only one migrates at a time
+        cur.execute("SELECT pg_advisory_lock(%s)", (SCHEMA_LOCK_ID,))
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                versao INTEGER PRIMARY KEY,
+                descricao TEXT NOT NULL,
+                aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cur.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version")
+        current_version = cur.fetchone()[0]
+        conn.commit()
+        
+        for version, description, step in MIGRATIONS:
+            if version <= current_version:
+                continue
+            step(cur)
+            cur.execute(
+                "INSERT INTO schema_version (versao, descricao) VALUES (%s, %s)",
+                (version, description)
+            )
+            conn.commit()
+            current_version = version
+        
+        return current_version
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.execute("SELECT pg_advisory_unlock(%s)", (SCHEMA_LOCK_ID,))
+        conn.commit()
+        cur.close()
+
+# Memoized per process: steady-state reruns issue no DDL or catalog queries
+@st.cache_resource(show_spinner=False)
+def bootstrap_schema():
+    """Bring the schema up to date once; failures are not cached and retried on the next rerun."""
+    with required_db_connection() as conn:
+        return apply_migrations(conn)
+
+# Initialize the database and tables if they don't exist
+def initialize_database():
+    """Make sure the schema is up to date (a no-op after the first successful run)."""
+    try:
+        bootstrap_schema()
+        return True
+    except Exception as e:
+        st.error(f"Erro ao inicializar o banco de dados: {e}")
+        return False
+
+# Save form data to database
+def save_evaluation(data):
+    """Insert or update the evaluation for the ministry/week in a single statement.
+
+    Returns the id of the saved row, or False if the evaluation could not be saved.
+    """
+    with db_connection() as conn:
+        if conn:
+            try:
+                cur = conn.cursor()
                 
-                # Atualiza o registro existente
-                cur.execute("""
-                    UPDATE avaliacoes_ministerios SET
-                        nome = %s,
-                        email = %s,
-                        pontualidade = %s,
-                        assiduidade_celebracoes = %s,
-                        assiduidade_reunioes = %s,
-                        trabalho_equipe = %s,
-                        consagracao_semana1 = %s,
-                        consagracao_semana2 = %s,
-                        consagracao_semana3 = %s,
-                        consagracao_semana4 = %s,
-                        consagracao_semana5 = %s,
-                        preparo_tecnico_semana1 = %s,
-                        preparo_tecnico_semana2 = %s,
-                        preparo_tecnico_semana3 = %s,
-                        preparo_tecnico_semana4 = %s,
-                        preparo_tecnico_semana5 = %s,
-                        reunioes_semana1 = %s,
-                        reunioes_semana2 = %s,
-                        reunioes_semana3 = %s,
-                        reunioes_semana4 = %s,
-                        reunioes_semana5 = %s,
-                        treinamentos = %s,
-                        estrategias = %s,
-                        novos_membros = %s,
-                        membros_qualificacao = %s,
-                        nomes_novos_membros = %s,
-                        nomes_membros_qualificacao = %s,
-                        comentarios = %s,
-                        data_submissao = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                """, (
-                    data["nome"], data["email"],
-                    data["pontualidade"], data["assiduidade_celebracoes"], data["assiduidade_reunioes"], data["trabalho_equipe"],
-                    data["consagracao_semana1"], data["consagracao_semana2"], data["consagracao_semana3"], data["consagracao_semana4"], data["consagracao_semana5"],
-                    data["preparo_tecnico_semana1"], data["preparo_tecnico_semana2"], data["preparo_tecnico_semana3"], data["preparo_tecnico_semana4"], data["preparo_tecnico_semana5"],
-                    data["reunioes_semana1"], data["reunioes_semana2"], data["reunioes_semana3"], data["reunioes_semana4"], data["reunioes_semana5"],
-                    treinamentos_json, estrategias_json,
-                    data["novos_membros"], data["membros_qualificacao"],
-                    data["nomes_novos_membros"], data["nomes_membros_qualificacao"],
-                    data["comentarios"], entry_id
-                ))
-            else:
-                # Se não existe, insere uma nova entrada
+                # Filtrar apenas os arrays não vazios
+                treinamentos_clean = [t for t in data["treinamentos"] if t and t.strip()]
+                estrategias_clean = [e for e in data["estrategias"] if e and e.strip()]
+                
+                # Converter arrays para formato JSON
+                treinamentos_json = json.dumps(treinamentos_clean)
+                estrategias_json = json.dumps(estrategias_clean)
+                
+                # Insere a entrada ou, se já existir uma para este ministério, semana, mês e ano, atualiza-a
                 cur.execute("""
                     INSERT INTO avaliacoes_ministerios (
                         ministerio, nome, email,
                         pontualidade, assiduidade_celebracoes, assiduidade_reunioes, trabalho_equipe,
-                        consagracao_semana1, consagracao_semana2, consagracao_semana3, consagracao_semana4, consagracao_semana5,
-                        preparo_tecnico_semana1, preparo_tecnico_semana2, preparo_tecnico_semana3, preparo_tecnico_semana4, preparo_tecnico_semana5,
-                        reunioes_semana1, reunioes_semana2, reunioes_semana3, reunioes_semana4, reunioes_semana5,
                         treinamentos, estrategias,
                         novos_membros, membros_qualificacao,
                         nomes_novos_membros, nomes_membros_qualificacao,
                         comentarios, mes_referencia, ano_referencia, semana_referencia
                     )
                     VALUES (
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                        %s, %s, %s, %s, %s, %s, %s,
                         %s, %s,
                         %s, %s, %s, %s, %s, %s, %s, %s
                     )
+                    ON CONFLICT (ministerio, ano_referencia, mes_referencia, semana_referencia) DO UPDATE SET
+                        nome = EXCLUDED.nome,
+                        email = EXCLUDED.email,
+                        pontualidade = EXCLUDED.pontualidade,
+                        assiduidade_celebracoes = EXCLUDED.assiduidade_celebracoes,
+                        assiduidade_reunioes = EXCLUDED.assiduidade_reunioes,
+                        trabalho_equipe = EXCLUDED.trabalho_equipe,
+                        treinamentos = EXCLUDED.treinamentos,
+                        estrategias = EXCLUDED.estrategias,
+                        novos_membros = EXCLUDED.novos_membros,
+                        membros_qualificacao = EXCLUDED.membros_qualificacao,
+                        nomes_novos_membros = EXCLUDED.nomes_novos_membros,
+                        nomes_membros_qualificacao = EXCLUDED.nomes_membros_qualificacao,
+                        comentarios = EXCLUDED.comentarios,
+                        data_submissao = CURRENT_TIMESTAMP
+                    RETURNING id
                 """, (
                     data["ministerio"], data["nome"], data["email"],
                     data["pontualidade"], data["assiduidade_celebracoes"], data["assiduidade_reunioes"], data["trabalho_equipe"],
-                    data["consagracao_semana1"], data["consagracao_semana2"], data["consagracao_semana3"], data["consagracao_semana4"], data["consagracao_semana5"],
-                    data["preparo_tecnico_semana1"], data["preparo_tecnico_semana2"], data["preparo_tecnico_semana3"], data["preparo_tecnico_semana4"], data["preparo_tecnico_semana5"],
-                    data["reunioes_semana1"], data["reunioes_semana2"], data["reunioes_semana3"], data["reunioes_semana4"], data["reunioes_semana5"],
                     treinamentos_json, estrategias_json,
                     data["novos_membros"], data["membros_qualificacao"],
                     data["nomes_novos_membros"], data["nomes_membros_qualificacao"],
                     data["comentarios"], data["mes_referencia"], data["ano_referencia"], data["semana_referencia"]
                 ))
-            
-            conn.commit()
-            return True
-        except Exception as e:
-            st.error(f"Erro ao salvar a avaliação: {e}")
-            return False
-        finally:
-            cur.close()
-            conn.close()
+                
+                entry_id = cur.fetchone()[0]
+                save_weekly_activities(cur, entry_id, data)
+                sync_ministry_members(
+                    cur, data["ministerio"], data["mes_referencia"], data["ano_referencia"],
+                    extract_member_names(data["nomes_novos_membros"]),
+                    extract_member_names(data["nomes_membros_qualificacao"])
+                )
+                refresh_ministry_summary(cur, data["ministerio"], data["mes_referencia"], data["ano_referencia"])
+                refresh_ministry_rankings(cur, data["ano_referencia"])
+                notify_change(cur, "avaliacao", data["ministerio"], data["mes_referencia"], data["ano_referencia"])
+                conn.commit()
+                invalidate_dashboard_cache()
+                return entry_id
+            except Exception as e:
+                st.error(f"Erro ao salvar a avaliação: {e}")
+                return False
+            finally:
+                cur.close()
+    st.error("Não foi possível conectar ao banco de dados.")
     return False
 
+# Categories of the weekly team preparation activities (Seção 2 of the form)
+ACTIVITY_CATEGORIES = {
+    "consagracao": "Consagração (Jejum e Oração)",
+    "preparo_tecnico": "Preparo Técnico (Ensaio, preparo técnico e equipamentos)",
+    "reunioes": "Reuniões"
+}
+
+# Store the weekly activity descriptions of an evaluation, one row per filled category/week
+def save_weekly_activities(cur, entry_id, data):
+    """Replace the activity rows of an evaluation, inside the caller's transaction."""
+    rows = [
+        (entry_id, categoria, semana, data[f"{categoria}_semana{semana}"].strip())
+        for categoria in ACTIVITY_CATEGORIES
+        for semana in range(1, 6)
+        if data.get(f"{categoria}_semana{semana}") and data[f"{categoria}_semana{semana}"].strip()
+    ]
+    
+    cur.execute("DELETE FROM atividades_semanais WHERE avaliacao_id = %s", (entry_id,))
+    if rows:
+        execute_values(cur, """
+            INSERT INTO atividades_semanais (avaliacao_id, categoria, semana, texto) VALUES %s
+        """, rows)
+
+# Per-week summary maintained alongside the evaluations. Legacy rows without a week
+# are summarized under week 0 so every key column can be part of the primary key.
+def build_summary_select(where=""):
+    """Return the SELECT that aggregates evaluations into summary rows."""
+    metric_aggregates = ",\n            ".join(
+        f"SUM({column}) AS soma_{column}, COUNT({column}) AS contagem_{column}"
+        for column in SCORE_COLUMNS
+    )
+    return f"""
+        SELECT 
+            ministerio,
+            COALESCE(ano_referencia, 0),
+            COALESCE(mes_referencia, ''),
+            COALESCE(semana_referencia, 0),
+            COUNT(*),
+            {metric_aggregates},
+            SUM(novos_membros),
+            SUM(membros_qualificacao),
+            CURRENT_TIMESTAMP
+        FROM avaliacoes_ministerios
+        {where}
+        GROUP BY 1, 2, 3, 4
+    """
+
+SUMMARY_KEY_COLUMNS = ["ministerio", "ano_referencia", "mes_referencia", "semana_referencia"]
+SUMMARY_VALUE_COLUMNS = (
+    ["avaliacoes"]
+    + [f"{prefix}_{column}" for column in SCORE_COLUMNS for prefix in ("soma", "contagem")]
+    + ["novos_membros", "membros_qualificacao", "atualizado_em"]
+)
+
+def refresh_ministry_summary(cur, ministerio, mes, ano):
+    """Recompute one ministry/month of the summary inside the caller's transaction."""
+    cur.execute(f"""
+        INSERT INTO resumo_ministerios ({", ".join(SUMMARY_KEY_COLUMNS + SUMMARY_VALUE_COLUMNS)})
+        {build_summary_select("WHERE ministerio = %s AND mes_referencia = %s AND ano_referencia = %s")}
+        ON CONFLICT ({", ".join(SUMMARY_KEY_COLUMNS)}) DO UPDATE SET
+            {", ".join(f"{column} = EXCLUDED.{column}" for column in SUMMARY_VALUE_COLUMNS)}
+    """, (ministerio, mes, ano))
+
+def rebuild_summary_table(cur):
+    """Recompute the whole summary from the evaluations inside the caller's transaction.
+
+    Returns the number of summary rows written.
+    """
+    cur.execute("DELETE FROM resumo_ministerios")
+    cur.execute(f"""
+        INSERT INTO resumo_ministerios ({", ".join(SUMMARY_KEY_COLUMNS + SUMMARY_VALUE_COLUMNS)})
+        {build_summary_select()}
+    """)
+    return cur.rowcount
+
+# Placings of the annual award, computed from the summary table. For every month with
+# evaluations there is a 'mensal' placing (that month's weeks only) and an 'acumulado'
+# one (all weeks of the year up to that month); the final placing of a year is the
+# cumulative one of its last month. Ties on the total score, as displayed (two
+# decimals), go to the ministry with more evaluations, then to alphabetical order
+# (by code point, as in Python). rank_ministry_scores and the ranking export use the
+# same rule, so the general table and the podium agree.
+RANKING_TIE_BREAK_SQL = 'ROUND(pontuacao_total::NUMERIC, 2) DESC, avaliacoes DESC, ministerio COLLATE "C"'
+
+def build_rankings_select(where=""):
+    """Return the SELECT that computes the placings of the years matched by `where`."""
+    sums = ", ".join(
+        f"SUM(soma_{column}) AS soma_{column}, SUM(contagem_{column}) AS contagem_{column}"
+        for column in SCORE_COLUMNS
+    )
+    averages = ", ".join(
+        f"soma_{column}::FLOAT / NULLIF(contagem_{column}, 0) AS {column}"
+        for column in SCORE_COLUMNS
+    )
+    total = " + ".join(f"COALESCE({column}, 0)" for column in SCORE_COLUMNS)
+    return f"""
+        WITH mensal AS (
+            SELECT 
+                ano_referencia, mes_referencia,
+                array_position(%(meses)s::TEXT[], mes_referencia::TEXT) AS mes_numero,
+                ministerio, SUM(avaliacoes) AS avaliacoes, {sums}
+            FROM resumo_ministerios
+            WHERE mes_referencia = ANY(%(meses)s) {where}
+            GROUP BY ano_referencia, mes_referencia, ministerio
+        ),
+        meses AS (
+            SELECT DISTINCT ano_referencia, mes_referencia, mes_numero FROM mensal
+        ),
+        acumulado AS (
+            SELECT 
+                p.ano_referencia, p.mes_referencia, p.mes_numero,
+                m.ministerio, SUM(avaliacoes) AS avaliacoes, {sums}
+            FROM meses p
+            JOIN mensal m ON m.ano_referencia = p.ano_referencia AND m.mes_numero <= p.mes_numero
+            GROUP BY p.ano_referencia, p.mes_referencia, p.mes_numero, m.ministerio
+        ),
+        medias AS (
+            SELECT ano_referencia, 'mensal' AS tipo, mes_referencia, mes_numero, ministerio, avaliacoes, {averages}
+            FROM mensal
+            UNION ALL
+            SELECT ano_referencia, 'acumulado', mes_referencia, mes_numero, ministerio, avaliacoes, {averages}
+            FROM acumulado
+        ),
+        pontuacoes AS (
+            SELECT *, {total} AS pontuacao_total FROM medias
+        )
+        SELECT 
+            ano_referencia, tipo, mes_referencia, mes_numero, ministerio, avaliacoes,
+            {", ".join(SCORE_COLUMNS)}, pontuacao_total,
+            ROW_NUMBER() OVER (
+                PARTITION BY ano_referencia, tipo, mes_numero 
+                ORDER BY {RANKING_TIE_BREAK_SQL}
+            ),
+            CURRENT_TIMESTAMP
+        FROM pontuacoes
+    """
+
+RANKINGS_COLUMNS = (
+    ["ano_referencia", "tipo", "mes_referencia", "mes_numero", "ministerio", "avaliacoes"]
+    + SCORE_COLUMNS
+    + ["pontuacao_total", "colocacao", "atualizado_em"]
+)
+
+def refresh_ministry_rankings(cur, ano):
+    """Recompute the placings of one year inside the caller's transaction.
+
+    A new week can move every ministry in its month and in the cumulative standings
+    of the following months, so the whole year (at most 24 placings per ministry)
+    is recomputed from its summary rows.
+    """
+    cur.execute("DELETE FROM classificacoes_ministerios WHERE ano_referencia = %(ano)s", {"ano": ano})
+    cur.execute(f"""
+        INSERT INTO classificacoes_ministerios ({", ".join(RANKINGS_COLUMNS)})
+        {build_rankings_select("AND ano_referencia = %(ano)s")}
+    """, {"meses": MESES, "ano": ano})
+
+def rebuild_rankings_table(cur):
+    """Recompute the placings of every year inside the caller's transaction.
+
+    Returns the number of placings written.
+    """
+    cur.execute("DELETE FROM classificacoes_ministerios")
+    cur.execute(f"""
+        INSERT INTO classificacoes_ministerios ({", ".join(RANKINGS_COLUMNS)})
+        {build_rankings_select()}
+    """, {"meses": MESES})
+    return cur.rowcount
+
+# Keep membros_ministerios in step with the lists submitted for a ministry/month
+def sync_ministry_members(cur, ministerio, mes, ano, novos_membros, membros_qualificacao):
+    """Make the month's roster match the submitted lists, inside the caller's transaction."""
+    membros_qualificacao = [nome for nome in membros_qualificacao if nome not in novos_membros]
+    nomes = novos_membros + membros_qualificacao
+    
+    cur.execute("""
+        DELETE FROM membros_ministerios 
+        WHERE ministerio = %s AND mes_referencia = %s AND ano_referencia = %s
+        AND NOT (nome = ANY(%s))
+    """, (ministerio, mes, ano, nomes))
+    
+    if nomes:
+        execute_values(cur, """
+            INSERT INTO membros_ministerios (ministerio, ano_referencia, mes_referencia, nome, status)
+            VALUES %s
+            ON CONFLICT (ministerio, ano_referencia, mes_referencia, nome) DO UPDATE SET
+                status = EXCLUDED.status,
+                promovido_em = CASE 
+                    WHEN membros_ministerios.status = 'qualificacao' AND EXCLUDED.status = 'novo' 
+                    THEN CURRENT_TIMESTAMP 
+                    ELSE membros_ministerios.promovido_em 
+                END
+        """, [(ministerio, ano, mes, nome, "novo") for nome in novos_membros]
+           + [(ministerio, ano, mes, nome, "qualificacao") for nome in membros_qualificacao])
+
+# Channel announcing new submissions and promotions to the admin dashboards
+NOTIFY_CHANNEL = "avaliacoes_ministerios"
+
+def notify_change(cur, evento, ministerio, mes, ano):
+    """Queue a pg_notify in the caller's transaction; PostgreSQL delivers it on commit."""
+    cur.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, json.dumps({
+        "evento": evento,
+        "ministerio": ministerio,
+        "mes": mes,
+        "ano": ano
+    })))
+
 # Validate email format
+EMAIL_PATTERN = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
+
 def is_valid_email(email):
     """Check if the email has a valid format."""
-    pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-    return re.match(pattern, email) is not None
+    return re.match(EMAIL_PATTERN, email) is not None
 
 # Main app navigation
 def main():
@@ -310,6 +1305,9 @@ def main():
     page = st.sidebar.radio("Ir para:", ["Formulário de Avaliação", "Área da Gestora"])
     
     if page == "Formulário de Avaliação":
+        # Live updates are only for the admin dashboard
+        unsubscribe_from_submissions()
+        
         # Check if leader is authenticated
         if st.session_state.leader_authenticated:
             show_evaluation_form()
@@ -675,13 +1673,18 @@ def show_evaluation_form():
         # Log the current ministry for debugging
         st.write(f"Carregando membros para: {st.session_state.current_ministry}")
         
-        # Fetch existing members from database for the current ministry/month/year
-        existing_novos_membros, existing_membros_qualificacao = get_existing_members(
+        # Fetch existing members for the current ministry/month/year (memoized per session)
+        membros = load_existing_members(
             st.session_state.current_ministry, 
             mes_referencia, 
             ano_referencia
         )
         
+        # A failed lookup is retried on the next rerun; until it succeeds the form is not
+        # sent, since empty lists would replace the month's roster
+        st.session_state.membros_carregados = membros is not None
+        existing_novos_membros, existing_membros_qualificacao = membros or ([], [])
+        
         # Only populate the lists if we got results AND the current ministry matches
         if existing_novos_membros:
             st.session_state.novos_membros_lista = existing_novos_membros.copy()
@@ -770,6 +1773,25 @@ def show_evaluation_form():
                     st.session_state.membros_qualificacao_lista.pop(i)
                     st.rerun()
         
+        # Promote the whole class of trainees at once
+        if len(st.session_state.membros_qualificacao_lista) > 1 and st.button("Promover Todos", key="promote_all"):
+            membros = list(st.session_state.membros_qualificacao_lista)
+            for membro in membros:
+                if membro not in st.session_state.novos_membros_lista:
+                    st.session_state.novos_membros_lista.append(membro)
+            st.session_state.membros_qualificacao_lista = []
+            
+            # Update the database to reflect this change for all entries of the month
+            promote_members_in_database(
+                st.session_state.current_ministry, 
+                mes_referencia, 
+                ano_referencia, 
+                membros
+            )
+            
+            st.success(f"{len(membros)} membros promovidos com sucesso!")
+            st.rerun()
+        
         st.metric("Total de membros em qualificação", len(st.session_state.membros_qualificacao_lista))
     
     # SECTION: Final form with comments and submit button
@@ -790,6 +1812,8 @@ def show_evaluation_form():
                 st.error("Por favor, preencha todos os campos obrigatórios marcados com *.")
             elif not is_valid_email(email):
                 st.error("Por favor, insira um email válido.")
+            elif not st.session_state.get("membros_carregados", True):
+                st.error("Não foi possível carregar os membros já cadastrados neste mês. Recarregue a página e tente novamente.")
             else:
                 # Prepare data - use current_ministry from session state
                 data = {
@@ -863,8 +1887,927 @@ def show_admin_area():
                 else:
                     st.error("Usuário ou senha incorretos.")
     else:
-        # Admin content
-        show_admin_dashboard()
+        # Admin content, measured for the "Desempenho" panel when it is enabled
+        collector = start_perf_collection() if st.session_state.get("medir_desempenho") else None
+        try:
+            show_admin_dashboard()
+        finally:
+            stop_perf_collection()
+        show_performance_panel(collector)
+
+# Years offered in the dashboard filter
+AVAILABLE_YEARS_QUERY = """
+    SELECT DISTINCT ano_referencia 
+    FROM avaliacoes_ministerios 
+    ORDER BY ano_referencia
+"""
+
+# Lightweight columns for the ranking, charts and submission history
+DASHBOARD_COLUMNS = [
+    "id", "ministerio", "nome",
+    "pontualidade", "assiduidade_celebracoes", "assiduidade_reunioes", "trabalho_equipe",
+    "novos_membros", "membros_qualificacao",
+    "data_submissao", "mes_referencia", "ano_referencia", "semana_referencia"
+]
+
+# Columns for the selected ministry's submission history
+HISTORY_COLUMNS = [
+    "id", "nome", "novos_membros", "membros_qualificacao",
+    "data_submissao", "mes_referencia", "ano_referencia", "semana_referencia"
+]
+
+# Free-text and JSONB columns, only loaded for the ministry being inspected
+DETAIL_COLUMNS = [
+    "id", "semana_referencia", "data_submissao",
+    "treinamentos", "estrategias",
+    "comentarios"
+]
+
+# Month range (first, last) of each option of the dashboard month filter
+PERIOD_FILTERS = {
+    **{mes: (numero, numero) for numero, mes in enumerate(MESES, start=1)},
+    "1º Trimestre": (1, 3),
+    "2º Trimestre": (4, 6),
+    "3º Trimestre": (7, 9),
+    "4º Trimestre": (10, 12)
+}
+
+# Build the WHERE clause for the dashboard filters
+def build_dashboard_filters(mes_filtro, ano_filtro, semana_filtro, ministerio=None):
+    """Return the WHERE clause (possibly empty) and its parameters for the dashboard filters.
+
+    semana_filtro is "Todas" in monthly analysis, so only weekly analysis filters by week.
+    """
+    params = []
+    
+    conditions = []
+    if ministerio is not None:
+        conditions.append("ministerio = %s")
+        params.append(ministerio)
+    
+    # With a year, months are matched as one range of the numeric period key;
+    # without one, by their names (idx_avaliacoes_mes_semana)
+    primeiro, ultimo = PERIOD_FILTERS.get(mes_filtro, (1, 12))
+    if ano_filtro != "Todos":
+        conditions.append("periodo BETWEEN %s AND %s")
+        params.extend([int(ano_filtro) * 100 + primeiro, int(ano_filtro) * 100 + ultimo])
+    elif mes_filtro != "Todos":
+        conditions.append("mes_referencia = ANY(%s)")
+        params.append(MESES[primeiro - 1:ultimo])
+    
+    if semana_filtro != "Todas":
+        conditions.append("semana_referencia = %s")
+        params.append(int(semana_filtro))
+    
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return where, params
+
+# Build the dashboard query for the selected filters
+def build_dashboard_query(mes_filtro, ano_filtro, semana_filtro, columns=DASHBOARD_COLUMNS, ministerio=None):
+    """Return the evaluations query and its parameters for the dashboard filters."""
+    where, params = build_dashboard_filters(mes_filtro, ano_filtro, semana_filtro, ministerio)
+    return f"SELECT {', '.join(columns)} FROM avaliacoes_ministerios{where}", params
+
+# Ranking helpers shared by the pandas and SQL aggregation modes
+def round_total(value):
+    """Round a total score to two decimals like PostgreSQL's ROUND(value::NUMERIC, 2).
+
+    PostgreSQL converts a double to NUMERIC with 15 significant digits and rounds
+    halves away from zero.
+    """
+    return Decimal(f"{value:.15g}").quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+@timed("Ordenação do ranking", "pandas")
+def rank_ministry_scores(scores):
+    """Add the total score (sum of the metric averages) and sort by RANKING_TIE_BREAK_SQL."""
+    scores['pontuacao_total'] = scores[SCORE_COLUMNS].sum(axis=1)
+    order = sorted(
+        scores.index,
+        key=lambda ministerio: (
+            -round_total(scores.at[ministerio, 'pontuacao_total']),
+            -scores.at[ministerio, 'avaliacoes'],
+            ministerio
+        )
+    )
+    return scores.loc[order]
+
+@timed("Ranking (groupby)", "pandas")
+def compute_ministry_scores(df):
+    """Average the metrics per ministry from raw evaluation rows."""
+    scores = df.groupby('ministerio')[SCORE_COLUMNS].mean()
+    scores['avaliacoes'] = df.groupby('ministerio').size()
+    return rank_ministry_scores(scores)
+
+@timed("Médias semanais (groupby)", "pandas")
+def compute_weekly_scores(df):
+    """Average the metrics per week from one ministry's evaluation rows."""
+    return df.groupby('semana_referencia')[SCORE_COLUMNS].mean().reset_index()
+
+# Metrics of the trend analysis, with their labels
+TREND_METRICS = {
+    'pontuacao_total': 'Pontuação Total',
+    'pontualidade': 'Pontualidade',
+    'assiduidade_celebracoes': 'Assiduidade nas Celebrações',
+    'assiduidade_reunioes': 'Assiduidade nas Reuniões',
+    'trabalho_equipe': 'Trabalho em Equipe'
+}
+
+# Average length of a month in days, to express the trend slopes per month
+DAYS_PER_MONTH = 365.25 / 12
+
+@timed("Tendências (médias móveis e inclinações)", "pandas")
+def compute_trend_analytics(weekly, janela):
+    """Compute rolling averages and per-ministry deltas and slopes from week-level rows.
+
+    `weekly` has one row per ministry and week (ministerio, periodo, semana_referencia
+    and the metric averages), sorted by ministry and week. Returns (series, summary):
+    series adds the week's date, the total score and a `<metric>_movel` rolling average
+    over `janela` weeks; summary has one row per ministry and (statistic, metric) columns:
+    'media' over the range, 'variacao' between the last and the first `janela` weeks,
+    and 'inclinacao', the least-squares slope in points per month.
+    """
+    metrics = list(TREND_METRICS)
+    series = weekly.copy()
+    series['pontuacao_total'] = series[SCORE_COLUMNS].sum(axis=1)
+    
+    # Week n of a month starts (n - 1) weeks after the 1st
+    series['data'] = pd.to_datetime(pd.DataFrame({
+        'year': series['periodo'] // 100, 'month': series['periodo'] % 100, 'day': 1
+    })) + pd.to_timedelta((series['semana_referencia'] - 1) * 7, unit='D')
+    
+    grouped = series.groupby('ministerio', sort=False)
+    rolling = grouped[metrics].rolling(janela, min_periods=1).mean().reset_index(level=0, drop=True)
+    series[[f"{metric}_movel" for metric in metrics]] = rolling[metrics].to_numpy()
+    
+    first = series.loc[grouped.head(janela).index].groupby('ministerio')[metrics].mean()
+    last = series.loc[grouped.tail(janela).index].groupby('ministerio')[metrics].mean()
+    
+    # Slope of y over x (months since the first week) from per-ministry sums:
+    # (n·Σxy − Σx·Σy) / (n·Σx² − (Σx)²), ignoring weeks where the metric is missing
+    x = (series['data'] - series['data'].min()).dt.days / DAYS_PER_MONTH
+    values = series[metrics]
+    valid = values.notna()
+    xs = valid.mul(x, axis=0).where(valid)
+    sums = pd.concat({
+        'n': valid.astype(int), 'x': xs, 'y': values, 'xy': xs * values, 'xx': xs ** 2
+    }, axis=1).groupby(series['ministerio']).sum()
+    denominator = sums['n'] * sums['xx'] - sums['x'] ** 2
+    slopes = (sums['n'] * sums['xy'] - sums['x'] * sums['y']) / denominator.where(denominator > 1e-9)
+    
+    summary = pd.concat({
+        'media': grouped[metrics].mean(),
+        'variacao': last - first,
+        'inclinacao': slopes
+    }, axis=1)
+    return series, summary
+
+# Aggregates read from the summary table, returning one row per ministry (or week)
+SCORE_AVERAGES_SQL = ", ".join(
+    f"SUM(soma_{column})::FLOAT / NULLIF(SUM(contagem_{column}), 0) AS {column}"
+    for column in SCORE_COLUMNS
+)
+
+def build_ranking_query(mes_filtro, ano_filtro, semana_filtro):
+    """Return the per-ministry aggregation query for the dashboard filters."""
+    where, params = build_dashboard_filters(mes_filtro, ano_filtro, semana_filtro)
+    query = f"""
+        SELECT ministerio, {SCORE_AVERAGES_SQL}, SUM(avaliacoes) AS avaliacoes
+        FROM resumo_ministerios{where}
+        GROUP BY ministerio
+        ORDER BY ministerio
+    """
+    return query, params
+
+def build_weekly_scores_query(ministerio, mes_filtro, ano_filtro, semana_filtro):
+    """Return the per-week aggregation query for one ministry."""
+    where, params = build_dashboard_filters(mes_filtro, ano_filtro, semana_filtro, ministerio)
+    query = f"""
+        SELECT semana_referencia, {SCORE_AVERAGES_SQL}
+        FROM resumo_ministerios{where}
+        GROUP BY semana_referencia
+        ORDER BY semana_referencia
+    """
+    return query, params
+
+# Cached readers for the dashboard. Widget changes that keep the same filters are served
+# from memory; save_evaluation and promote_members_in_database clear them after committing.
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_available_years():
+    """Return the reference years that have evaluations, as strings."""
+    with required_db_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(AVAILABLE_YEARS_QUERY)
+            return [str(row[0]) for row in cur.fetchall()]
+        finally:
+            cur.close()
+
+# Evaluation rows kept in memory per filter combination and refreshed incrementally:
+# only rows changed after the newest atualizado_em seen are fetched and merged by id.
+# A trigger stamps atualizado_em on every INSERT and UPDATE (submissions, promotions,
+# imports) with CURRENT_TIMESTAMP, the start of the writing transaction, so each delta
+# re-reads a short overlap window.
+SNAPSHOT_OVERLAP = timedelta(seconds=60)
+CHANGE_CURSOR_COLUMN = "atualizado_em"
+
+class DashboardSnapshot:
+    """Rows of one filter combination plus the change cursor used to refresh them."""
+    
+    def __init__(self):
+        self.frame = None
+        self.cursor = None
+        self.checked_at = None
+        self.lock = threading.Lock()
+    
+    def is_fresh(self):
+        """True when the snapshot was checked against the database within the refresh interval."""
+        return (
+            self.frame is not None and self.checked_at is not None and
+            time.monotonic() - self.checked_at < DASHBOARD_REFRESH_INTERVAL
+        )
+    
+    def refresh(self, conn, query, where, params):
+        """Fetch the rows changed since the cursor (or everything on first use) and merge them."""
+        if self.frame is None or self.cursor is None:
+            frame = pd.read_sql_query(query, conn, params=params)
+        else:
+            delta_query = query + (" AND " if where else " WHERE ") + f"{CHANGE_CURSOR_COLUMN} >= %s"
+            delta = pd.read_sql_query(delta_query, conn, params=params + [self.cursor - SNAPSHOT_OVERLAP])
+            frame = self.frame
+            if not delta.empty:
+                frame = pd.concat([frame[~frame['id'].isin(delta['id'])], delta], ignore_index=True)
+            
+            # Deleted rows never show up in a delta: fall back to a full reload when the count differs
+            cur = conn.cursor()
+            try:
+                cur.execute(f"SELECT COUNT(*) FROM avaliacoes_ministerios{where}", params)
+                total = cur.fetchone()[0]
+            finally:
+                cur.close()
+            if total != len(frame):
+                frame = pd.read_sql_query(query, conn, params=params)
+        
+        self.frame = frame.sort_values('id', ignore_index=True)
+        latest = self.frame[CHANGE_CURSOR_COLUMN].max()
+        self.cursor = None if pd.isna(latest) else latest
+        self.checked_at = time.monotonic()
+        self.frame.attrs['atualizado_em'] = datetime.now()
+        if 'data_submissao' in self.frame:
+            latest_submission = self.frame['data_submissao'].max()
+            self.frame.attrs['ultima_submissao'] = None if pd.isna(latest_submission) else latest_submission
+    
+    def load(self, query, where, params):
+        """Return a copy of the rows, refreshing them first when they may be outdated."""
+        with self.lock:
+            if not self.is_fresh():
+                with required_db_connection() as conn:
+                    self.refresh(conn, query, where, params)
+            return self.frame.drop(columns=CHANGE_CURSOR_COLUMN)
+
+class SnapshotStore:
+    """Process-wide snapshots keyed by query and filters, least recently used evicted first.
+
+    `generation` counts invalidations, so per-session caches can tell when data changed.
+    """
+    
+    def __init__(self, max_entries=SNAPSHOT_CACHE_MAX_ENTRIES):
+        self.snapshots = OrderedDict()
+        self.max_entries = max_entries
+        self.generation = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            snapshot = self.snapshots.pop(key, None) or DashboardSnapshot()
+            self.snapshots[key] = snapshot
+            while len(self.snapshots) > self.max_entries:
+                self.snapshots.popitem(last=False)
+            return snapshot
+    
+    def clear(self):
+        """Drop every snapshot, so the next reads load their rows in full."""
+        with self.lock:
+            self.generation += 1
+            self.snapshots.clear()
+    
+    def mark_stale(self):
+        """Flag every snapshot for a delta check and start a new generation of cached data."""
+        with self.lock:
+            self.generation += 1
+            for snapshot in self.snapshots.values():
+                snapshot.checked_at = None
+
+@st.cache_resource(show_spinner=False)
+def get_shared_snapshot_store():
+    """Create the snapshot store once per process."""
+    return SnapshotStore()
+
+# Same fallback as the connection pool for callers outside a script run
+standalone_snapshot_store = SnapshotStore()
+
+def get_snapshot_store():
+    """Return the snapshot store for the current context."""
+    if get_script_run_ctx(suppress_warning=True) is not None:
+        return get_shared_snapshot_store()
+    return standalone_snapshot_store
+
+def load_incremental(columns, mes_filtro, ano_filtro, semana_filtro, ministerio=None):
+    """Return the evaluation rows for the filters from the incrementally refreshed snapshot."""
+    where, params = build_dashboard_filters(mes_filtro, ano_filtro, semana_filtro, ministerio)
+    query = f"SELECT {', '.join([*columns, CHANGE_CURSOR_COLUMN])} FROM avaliacoes_ministerios{where}"
+    snapshot = get_snapshot_store().get((tuple(columns), mes_filtro, ano_filtro, semana_filtro, ministerio))
+    return snapshot.load(query, where, params)
+
+def load_dashboard_data(mes_filtro, ano_filtro, semana_filtro):
+    """Return the evaluations matching the dashboard filters."""
+    return load_incremental(DASHBOARD_COLUMNS, mes_filtro, ano_filtro, semana_filtro)
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_ministry_details(ministerio, mes_filtro, ano_filtro, semana_filtro):
+    """Return the text columns of one ministry's evaluations for the dashboard filters."""
+    query, params = build_dashboard_query(
+        mes_filtro, ano_filtro, semana_filtro, columns=DETAIL_COLUMNS, ministerio=ministerio
+    )
+    return read_frame(query, params)
+
+# JSONB list columns shown in the Treinamentos and Estratégias tabs
+LIST_COLUMNS = ("treinamentos", "estrategias")
+
+def build_list_items_query(column, mes_filtro, ano_filtro, semana_filtro, ministerio):
+    """Return the query listing the distinct items of a JSONB list column, in first-seen order."""
+    if column not in LIST_COLUMNS:
+        raise ValueError(f"Coluna de lista desconhecida: {column}")
+    
+    where, params = build_dashboard_filters(mes_filtro, ano_filtro, semana_filtro, ministerio)
+    query = f"""
+        SELECT item FROM (
+            SELECT DISTINCT ON (e.item) e.item, a.id, e.posicao
+            FROM avaliacoes_ministerios a
+            CROSS JOIN LATERAL jsonb_array_elements_text(
+                CASE WHEN jsonb_typeof(a.{column}) = 'array' THEN a.{column} ELSE '[]'::jsonb END
+            ) WITH ORDINALITY AS e(item, posicao){where}
+            ORDER BY e.item, a.id, e.posicao
+        ) primeiros
+        WHERE item <> ''
+        ORDER BY id, posicao
+    """
+    return query, params
+
+# Pure-Python fallback used when AGGREGATION_MODE is "pandas"
+def collect_list_items(values):
+    """Deduplicate the items of JSONB list values (lists or JSON strings), keeping first-seen order."""
+    items = {}
+    for value in values:
+        # Try to interpret as JSON if it's a string
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                continue
+        
+        if isinstance(value, list):
+            items.update(dict.fromkeys(item for item in value if item))
+    return list(items)
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_list_items(column, ministerio, mes_filtro, ano_filtro, semana_filtro):
+    """Return the distinct trainings or strategies of one ministry for the dashboard filters."""
+    if AGGREGATION_MODE == "pandas":
+        details = load_ministry_details(ministerio, mes_filtro, ano_filtro, semana_filtro)
+        return collect_list_items(details.sort_values('id')[column])
+    
+    query, params = build_list_items_query(column, mes_filtro, ano_filtro, semana_filtro, ministerio)
+    with required_db_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params)
+            return [row[0] for row in cur.fetchall()]
+        finally:
+            cur.close()
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_weekly_activities(ministerio, mes_filtro, ano_filtro, semana_filtro):
+    """Return one ministry's activity descriptions for the filters, one row per category and week.
+
+    Each evaluation contributes the activities of its own week, ordered by month and week.
+    """
+    where, params = build_dashboard_filters(mes_filtro, ano_filtro, semana_filtro, ministerio)
+    query = f"""
+        SELECT w.categoria, w.semana, w.texto
+        FROM atividades_semanais w
+        JOIN avaliacoes_ministerios a ON a.id = w.avaliacao_id AND w.semana = a.semana_referencia{where}
+        ORDER BY a.periodo, w.semana
+    """
+    return read_frame(query, params)
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_ministry_scores(mes_filtro, ano_filtro, semana_filtro):
+    """Return the ranking: metric averages, evaluation count and total score per ministry."""
+    if AGGREGATION_MODE == "pandas":
+        return compute_ministry_scores(load_dashboard_data(mes_filtro, ano_filtro, semana_filtro))
+    
+    query, params = build_ranking_query(mes_filtro, ano_filtro, semana_filtro)
+    scores = read_frame(query, params)
+    # A metric with no score in the filter comes back as None; pandas mode has NaN there
+    scores = scores.astype({column: float for column in SCORE_COLUMNS})
+    return rank_ministry_scores(scores.set_index('ministerio'))
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_weekly_scores(ministerio, mes_filtro, ano_filtro, semana_filtro):
+    """Return one ministry's metric averages per week, sorted by week."""
+    if AGGREGATION_MODE == "pandas":
+        df = load_dashboard_data(mes_filtro, ano_filtro, semana_filtro)
+        return compute_weekly_scores(df[df['ministerio'] == ministerio])
+    
+    query, params = build_weekly_scores_query(ministerio, mes_filtro, ano_filtro, semana_filtro)
+    return read_frame(query, params)
+
+def load_submission_history(ministerio, mes_filtro, ano_filtro, semana_filtro):
+    """Return one ministry's submissions for the dashboard filters."""
+    return load_incremental(HISTORY_COLUMNS, mes_filtro, ano_filtro, semana_filtro, ministerio)
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_ministry_members(ministerio, mes_filtro, ano_filtro):
+    """Return one ministry's members for the filters, one row per name.
+
+    A name counts as new member ('novo' = True) if it was promoted in any month of the period.
+    """
+    where, params = build_dashboard_filters(mes_filtro, ano_filtro, "Todas", ministerio)
+    query = f"""
+        SELECT nome, bool_or(status = 'novo') AS novo
+        FROM membros_ministerios{where}
+        GROUP BY nome
+        ORDER BY MIN(id)
+    """
+    return read_frame(query, params)
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_member_counts(ministerio, mes_filtro, ano_filtro):
+    """Return (new members, members in qualification) counted on membros_ministerios.
+
+    Same rule as load_ministry_members: a name promoted in any month of the period is new.
+    """
+    where, params = build_dashboard_filters(mes_filtro, ano_filtro, "Todas", ministerio)
+    query = f"""
+        SELECT COUNT(*) FILTER (WHERE novo), COUNT(*) FILTER (WHERE NOT novo)
+        FROM (
+            SELECT bool_or(status = 'novo') AS novo
+            FROM membros_ministerios{where}
+            GROUP BY nome
+        ) m
+    """
+    with required_db_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params)
+            return cur.fetchone()
+        finally:
+            cur.close()
+
+# Final placings of every year: the cumulative standings of the year's last month
+ANNUAL_RANKINGS_QUERY = """
+    SELECT ano_referencia, mes_referencia, ministerio, colocacao, pontuacao_total, avaliacoes
+    FROM classificacoes_ministerios c
+    WHERE tipo = 'acumulado'
+    AND mes_numero = (
+        SELECT MAX(mes_numero) FROM classificacoes_ministerios
+        WHERE tipo = 'acumulado' AND ano_referencia = c.ano_referencia
+    )
+    ORDER BY ano_referencia, colocacao
+"""
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_annual_rankings():
+    """Return the final placing of every ministry in every year, read from classificacoes_ministerios."""
+    return read_frame(ANNUAL_RANKINGS_QUERY)
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_ranking_race(ano):
+    """Return the monthly and cumulative placings of one year, in month order."""
+    query = """
+        SELECT tipo, mes_referencia, mes_numero, ministerio, colocacao, pontuacao_total
+        FROM classificacoes_ministerios
+        WHERE ano_referencia = %s
+        ORDER BY tipo, mes_numero, colocacao
+    """
+    return read_frame(query, (ano,))
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_available_periods():
+    """Return the period keys (ano * 100 + mês) that have evaluations, in order."""
+    with required_db_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                SELECT DISTINCT periodo FROM resumo_ministerios 
+                WHERE periodo IS NOT NULL 
+                ORDER BY periodo
+            """)
+            return [row[0] for row in cur.fetchall()]
+        finally:
+            cur.close()
+
+# Week-level metric averages per ministry, straight from the summary table
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_weekly_series(inicio, fim):
+    """Return one row per ministry and week between two period keys, sorted by ministry and week."""
+    averages = ", ".join(
+        f"soma_{column}::FLOAT / NULLIF(contagem_{column}, 0) AS {column}"
+        for column in SCORE_COLUMNS
+    )
+    query = f"""
+        SELECT ministerio, periodo, semana_referencia, {averages}
+        FROM resumo_ministerios
+        WHERE periodo BETWEEN %s AND %s AND semana_referencia > 0
+        ORDER BY ministerio, periodo, semana_referencia
+    """
+    return read_frame(query, (inicio, fim))
+
+def invalidate_dashboard_cache(snapshot_store=None):
+    """Drop cached dashboard data so the next render reads the committed changes.
+
+    Background threads pass the snapshot store they were created with, since
+    outside a script run get_snapshot_store() returns the standalone one.
+    """
+    load_available_years.clear()
+    load_ministry_details.clear()
+    load_ministry_scores.clear()
+    load_weekly_scores.clear()
+    load_ministry_members.clear()
+    load_member_counts.clear()
+    load_weekly_activities.clear()
+    load_list_items.clear()
+    load_annual_rankings.clear()
+    load_ranking_race.clear()
+    load_available_periods.clear()
+    load_weekly_series.clear()
+    build_trend_chart.clear()
+    build_ranking_chart.clear()
+    build_weekly_chart.clear()
+    build_radar_chart.clear()
+    
+    # Snapshots only need to look for new rows on the next read
+    (snapshot_store or get_snapshot_store()).mark_stale()
+
+# Exports: the rows are read through a server-side cursor and written chunk by chunk, so
+# memory stays flat however long the history is. Files are cached under a hash of the query
+# and of the exported rows, so repeating an export of unchanged data reuses the file.
+EXPORT_DATASETS = {
+    "ranking": "Classificação",
+    "resumo": "Resumo semanal",
+    "avaliacoes": "Avaliações"
+}
+
+EXPORT_FORMATS = {
+    "csv": ("CSV", "text/csv"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+}
+
+# Lists are exported as "item; item" so they read well in a spreadsheet
+EXPORT_EVALUATION_COLUMNS = ", ".join([
+    "id", "ministerio", "nome", "email", "mes_referencia", "ano_referencia", "semana_referencia",
+    *SCORE_COLUMNS,
+    *(
+        f"array_to_string(ARRAY(SELECT jsonb_array_elements_text({column})), '; ') AS {column}"
+        for column in ("treinamentos", "estrategias")
+    ),
+    "novos_membros", "membros_qualificacao", "nomes_novos_membros", "nomes_membros_qualificacao",
+    *WIDE_ACTIVITY_COLUMNS,
+    "comentarios", "data_submissao"
+])
+
+# The weekly activities go back into their per-week columns, the layout manage.py import
+# reads, so an exported file keeps the whole evaluation and can be imported again
+EXPORT_ACTIVITY_COLUMNS = ", ".join(
+    f"MAX(texto) FILTER (WHERE categoria = '{column.rsplit('_semana', 1)[0]}' AND semana = {column[-1]}) AS {column}"
+    for column in WIDE_ACTIVITY_COLUMNS
+)
+
+EXPORT_SUMMARY_COLUMNS = ", ".join([
+    "ministerio", "ano_referencia", "mes_referencia", "semana_referencia", "avaliacoes",
+    *(
+        f"soma_{column}::FLOAT / NULLIF(contagem_{column}, 0) AS {column}"
+        for column in SCORE_COLUMNS
+    ),
+    "novos_membros", "membros_qualificacao"
+])
+
+# pandas dtypes per PostgreSQL type OID, so every chunk (and the Parquet schema) keeps the
+# same types even when a chunk has only NULLs in a column; anything else is text
+EXPORT_DTYPES = {
+    16: "boolean",
+    20: "Int64", 21: "Int64", 23: "Int64",
+    700: "float64", 701: "float64", 1700: "float64",
+    1114: "datetime64[ns]"
+}
+
+XLSX_MAX_ROWS = 1_048_576
+
+def build_export_query(dataset, mes_filtro, ano_filtro, semana_filtro):
+    """Return the query of one export dataset for the dashboard filters, in a stable row order."""
+    where, params = build_dashboard_filters(mes_filtro, ano_filtro, semana_filtro)
+    if dataset == "avaliacoes":
+        query = f"""
+            SELECT {EXPORT_EVALUATION_COLUMNS}
+            FROM avaliacoes_ministerios a
+            LEFT JOIN LATERAL (
+                SELECT {EXPORT_ACTIVITY_COLUMNS} FROM atividades_semanais WHERE avaliacao_id = a.id
+            ) w ON TRUE{where}
+            ORDER BY periodo, semana_referencia, ministerio, id
+        """
+    elif dataset == "resumo":
+        query = f"""
+            SELECT {EXPORT_SUMMARY_COLUMNS}
+            FROM resumo_ministerios{where}
+            ORDER BY periodo, semana_referencia, ministerio
+        """
+    else:
+        # Same order as rank_ministry_scores and the annual placings
+        ranking_query, params = build_ranking_query(mes_filtro, ano_filtro, semana_filtro)
+        total = " + ".join(f"COALESCE({column}, 0)" for column in SCORE_COLUMNS)
+        query = f"""
+            SELECT ROW_NUMBER() OVER (ORDER BY {RANKING_TIE_BREAK_SQL}) AS colocacao, *
+            FROM (SELECT r.*, {total} AS pontuacao_total FROM ({ranking_query}) r) t
+            ORDER BY colocacao
+        """
+    return query, params
+
+def iter_export_chunks(conn, query, params):
+    """Yield the rows of `query` as DataFrames of up to EXPORT_CHUNK_ROWS rows.
+
+    A named (server-side) cursor keeps the result in PostgreSQL until each chunk is
+    fetched. The first chunk is always yielded, empty if needed, so writers get the columns.
+    """
+    with conn.cursor(name="exportacao") as cur:
+        cur.itersize = EXPORT_CHUNK_ROWS
+        cur.execute(query, params)
+        first = True
+        while True:
+            rows = cur.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows and not first:
+                return
+            chunk = pd.DataFrame(rows, columns=[column.name for column in cur.description], dtype=object)
+            yield chunk.astype({
+                column.name: EXPORT_DTYPES.get(column.type_code, "string") for column in cur.description
+            })
+            first = False
+
+def write_csv_export(chunks, path):
+    """Append each chunk to a UTF-8 CSV (with BOM, so Excel shows the accents)."""
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        for number, chunk in enumerate(chunks):
+            chunk.to_csv(f, header=number == 0, index=False)
+
+def write_parquet_export(chunks, path):
+    """Write each chunk as a row group of one Parquet file."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def write_xlsx_export(chunks, path):
+    """Stream the rows into a write-only workbook, starting a new sheet at Excel's row limit."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheet_rows = 0
+    for chunk in chunks:
+        header = list(chunk.columns)
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            if sheet is None or sheet_rows == XLSX_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Dados {len(workbook.worksheets) + 1}")
+                sheet.append(header)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+    if sheet is None:
+        workbook.create_sheet("Dados 1").append(header)
+    workbook.save(path)
+
+EXPORT_WRITERS = {
+    "csv": write_csv_export,
+    "parquet": write_parquet_export,
+    "xlsx": write_xlsx_export
+}
+
+def prune_export_cache():
+    """Delete the least recently used exports beyond EXPORT_CACHE_MAX_FILES."""
+    # Another session may delete or replace files meanwhile
+    files = []
+    for entry in os.scandir(EXPORT_CACHE_DIR):
+        if not entry.name.endswith(".tmp"):
+            try:
+                files.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                pass
+    files.sort(reverse=True)
+    for _, path in files[EXPORT_CACHE_MAX_FILES:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def export_dataset(dataset, formato, mes_filtro, ano_filtro, semana_filtro):
+    """Write one dataset for the dashboard filters and return (path, rows, reused).
+
+    The cache key hashes the query and its parameters together with the row count and a
+    checksum of the rows, computed in PostgreSQL in the same snapshot the file is written
+    from, so any new, changed or deleted row produces a new file.
+    """
+    query, params = build_export_query(dataset, mes_filtro, ano_filtro, semana_filtro)
+    with required_db_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            cur.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(hashtextextended(e::TEXT, 0)), 0) FROM ({query}) e",
+                params
+            )
+            rows, checksum = cur.fetchone()
+        finally:
+            cur.close()
+
+        key = hashlib.sha256(json.dumps([query, params, formato, rows, str(checksum)]).encode("utf-8")).hexdigest()
+        path = os.path.join(EXPORT_CACHE_DIR, f"{key}.{formato}")
+        if os.path.exists(path):
+            os.utime(path)
+            return path, rows, True
+
+        # Written under a temporary name so a concurrent export never serves a partial file
+        os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with perf_timer(f"Exportação ({dataset}, {formato})", "db"):
+                EXPORT_WRITERS[formato](iter_export_chunks(conn, query, params), partial)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    prune_export_cache()
+    return path, rows, False
+
+def export_file_name(dataset, formato, mes_filtro, ano_filtro, semana_filtro):
+    """Download name describing the filters, e.g. avaliacoes_Março_2025.csv."""
+    parts = [dataset]
+    if mes_filtro != "Todos":
+        parts.append(mes_filtro)
+    if ano_filtro != "Todos":
+        parts.append(str(ano_filtro))
+    if semana_filtro != "Todas":
+        parts.append(f"semana{semana_filtro}")
+    return re.sub(r"\W+", "_", "_".join(parts)) + f".{formato}"
+
+# Live updates: a background thread LISTENs on NOTIFY_CHANNEL and, when a leader submits
+# or promotes, clears the dashboard caches and reruns the subscribed admin sessions.
+# It blocks in select() on its own connection, so nothing queries the database while idle.
+class SubmissionListener:
+    """Background LISTEN loop that refreshes the subscribed admin sessions."""
+    
+    def __init__(self, snapshot_store, on_events=None, wakeup_interval=5, reconnect_delay=5):
+        self.snapshot_store = snapshot_store
+        self.on_events = on_events
+        self.wakeup_interval = wakeup_interval
+        self.reconnect_delay = reconnect_delay
+        self.sessions = set()
+        self.connected = False
+        self.last_event = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Run the listen loop in a daemon thread."""
+        self._thread = threading.Thread(target=self.run, name="submission-listener", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+    
+    def subscribe(self, session_id):
+        with self._lock:
+            self.sessions.add(session_id)
+    
+    def unsubscribe(self, session_id):
+        with self._lock:
+            self.sessions.discard(session_id)
+    
+    def run(self):
+        """Listen until stopped, reconnecting after connection failures."""
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**get_connection_params())
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cur = conn.cursor()
+                cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                cur.close()
+                self.connected = True
+                self.last_error = None
+                self._listen(conn)
+            except Exception as e:
+                self.last_error = str(e)
+            finally:
+                self.connected = False
+                if conn is not None:
+                    conn.close()
+            self._stop.wait(self.reconnect_delay)
+    
+    def _listen(self, conn):
+        while not self._stop.is_set():
+            # The timeout only lets the loop notice stop(); it does not touch the database
+            if not select.select([conn], [], [], self.wakeup_interval)[0]:
+                continue
+            conn.poll()
+            events = []
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    events.append(json.loads(notify.payload))
+                except json.JSONDecodeError:
+                    events.append({"evento": notify.payload})
+            if events:
+                self._handle(events)
+    
+    def _handle(self, events):
+        """Clear the caches once per batch of notifications and push a rerun."""
+        invalidate_dashboard_cache(self.snapshot_store)
+        self.last_event = dict(events[-1], recebido_em=datetime.now())
+        if self.on_events:
+            self.on_events(events)
+        self._rerun_sessions()
+    
+    def _rerun_sessions(self):
+        # Streamlit has no public API to rerun another session from a thread; the private
+        # attribute is pinned with streamlit in requirements.txt and covered by the tests
+        from streamlit import runtime
+        if not runtime.exists():
+            return
+        try:
+            session_mgr = runtime.get_instance()._session_mgr
+        except AttributeError:
+            logger.warning("Streamlit sem Runtime._session_mgr: o painel não será atualizado automaticamente.")
+            return
+        
+        with self._lock:
+            sessions = list(self.sessions)
+        for session_id in sessions:
+            info = session_mgr.get_active_session_info(session_id)
+            if info is None:
+                self.unsubscribe(session_id)
+            else:
+                info.session.request_rerun(None)
+
+@st.cache_resource(show_spinner=False)
+def get_submission_listener():
+    """Start the listener once per process."""
+    return SubmissionListener(get_snapshot_store()).start()
+
+def subscribe_to_submissions():
+    """Rerun the current session whenever a new submission arrives."""
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if not LIVE_UPDATES or ctx is None:
+        return None
+    listener = get_submission_listener()
+    listener.subscribe(ctx.session_id)
+    st.session_state.inscrito_atualizacoes = True
+    return listener
+
+def unsubscribe_from_submissions():
+    """Stop pushing reruns to the current session."""
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is not None and st.session_state.get("inscrito_atualizacoes"):
+        get_submission_listener().unsubscribe(ctx.session_id)
+        st.session_state.inscrito_atualizacoes = False
+
+# Compare the SQL ranking with the pandas computation over the raw rows
+def check_ranking_parity(mes_filtro, ano_filtro, semana_filtro):
+    """Return (matches, details) comparing both aggregation modes for the given filters."""
+    df = load_dashboard_data(mes_filtro, ano_filtro, semana_filtro)
+    expected = compute_ministry_scores(df)
+    
+    query, params = build_ranking_query(mes_filtro, ano_filtro, semana_filtro)
+    actual = rank_ministry_scores(read_frame(query, params).set_index('ministerio'))
+    
+    try:
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_names=False)
+        return True, f"{len(actual)} ministérios com resultados idênticos."
+    except AssertionError as e:
+        return False, str(e)
 
 # Admin dashboard with analytics
 def show_admin_dashboard():
@@ -873,44 +2816,48 @@ def show_admin_dashboard():
     # Add logout button in the sidebar
     if st.sidebar.button("Sair"):
         st.session_state.admin_authenticated = False
+        unsubscribe_from_submissions()
         st.rerun()
     
-    # Date filters
+    # Refresh this page as soon as a leader submits an evaluation
+    listener = subscribe_to_submissions()
+    if listener is not None:
+        if listener.connected:
+            status = "Atualização automática ativa"
+            if listener.last_event:
+                status += f" · última atualização recebida às {listener.last_event['recebido_em']:%H:%M:%S}"
+                # Imports notify without a ministry
+                if listener.last_event.get('ministerio'):
+                    status += f" ({listener.last_event['ministerio']})"
+            st.caption(status)
+        elif listener.last_error:
+            st.caption(f"Atualização automática indisponível: {listener.last_error}")
+    
+    # Date filters (the trend analysis picks its own range of months)
     col1, col2, col3 = st.columns(3)
+    tendencia = st.session_state.get("periodicidade") == "Tendência"
     
     with col1:
-        meses = ["Todos", "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", 
-                 "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
-        mes_filtro = st.selectbox("Filtrar por Mês", meses)
+        meses = ["Todos"] + list(PERIOD_FILTERS)
+        mes_filtro = st.selectbox("Filtrar por Mês", meses, disabled=tendencia)
     
     with col2:
         anos = ["Todos"]
         # Get list of years from database
-        conn = connect_to_db()
-        if conn:
-            try:
-                cur = conn.cursor()
-                cur.execute("""
-                    SELECT DISTINCT ano_referencia 
-                    FROM avaliacoes_ministerios 
-                    ORDER BY ano_referencia
-                """)
-                anos_db = [str(row[0]) for row in cur.fetchall()]
-                anos.extend(anos_db)
-            except Exception as e:
-                st.error(f"Erro ao buscar anos: {e}")
-            finally:
-                cur.close()
-                conn.close()
+        try:
+            anos.extend(load_available_years())
+        except Exception as e:
+            st.error(f"Erro ao buscar anos: {e}")
                 
-        ano_filtro = st.selectbox("Filtrar por Ano", anos)
+        ano_filtro = st.selectbox("Filtrar por Ano", anos, disabled=tendencia)
 
     with col3:
-        # Add option to analyze by week or month
+        # Add option to analyze by week or month, or the trends over several months
         periodicidade = st.selectbox(
             "Periodicidade da Análise",
-            ["Mensal", "Semanal"],
-            help="Escolha se deseja ver análises por mês ou por semana."
+            ["Mensal", "Semanal", "Tendência"],
+            key="periodicidade",
+            help="Escolha se deseja ver análises por mês, por semana ou a tendência ao longo de vários meses."
         )
         
         if periodicidade == "Semanal":
@@ -922,568 +2869,882 @@ def show_admin_dashboard():
         else:
             semana_filtro = "Todas"  # Default value for monthly analysis
     
-    # Get data from the database
-    conn = connect_to_db()
-    if conn:
+    # Look for new submissions right away instead of waiting for the cache to expire
+    if st.button("Atualizar dados", help="Busca as avaliações enviadas desde a última atualização."):
+        invalidate_dashboard_cache()
+    
+    # Rolling averages, deltas and slopes over a range of months replace the period views
+    if periodicidade == "Tendência":
+        with perf_timer("Tendências", "render"):
+            try:
+                show_trend_analysis()
+            except Exception as e:
+                st.error(f"Erro ao carregar as tendências: {e}")
+        show_pool_metrics()
+        show_index_check()
+        return
+    
+    # Podium and month-by-month race of the annual award, from the precomputed placings
+    with perf_timer("Premiação anual", "render"):
         try:
-            # Build query with filters
-            query = "SELECT * FROM avaliacoes_ministerios"
-            params = []
+            show_annual_award(ano_filtro)
+        except Exception as e:
+            st.error(f"Erro ao carregar a premiação anual: {e}")
+    
+    # Get data from the database (cached per filter combination)
+    try:
+        ministry_scores = load_ministry_scores(mes_filtro, ano_filtro, semana_filtro)
+        
+        if ministry_scores.empty:
+            st.warning("Não há dados disponíveis para o período selecionado.")
+        else:
+            # Add context about the analysis period
+            if periodicidade == "Semanal":
+                period_text = f"Semana {semana_filtro}" if semana_filtro != "Todas" else "Todas as Semanas"
+                if mes_filtro != "Todos":
+                    period_text += f" de {mes_filtro}"
+                if ano_filtro != "Todos":
+                    period_text += f" de {ano_filtro}"
+            else:
+                period_text = f"{mes_filtro}" if mes_filtro != "Todos" else "Todos os Meses"
+                if ano_filtro != "Todos":
+                    period_text += f" de {ano_filtro}"
             
-            conditions = []
-            if mes_filtro != "Todos":
-                conditions.append("mes_referencia = %s")
-                params.append(mes_filtro)
-                
-            if ano_filtro != "Todos":
-                conditions.append("ano_referencia = %s")
-                params.append(int(ano_filtro))
+            st.subheader(f"Análise {periodicidade}: {period_text}")
+            
+            # Display ranking
+            st.subheader("Classificação Geral dos Ministérios")
+            
+            # Creating a better visualization for the ranking
+            ranking_df = pd.DataFrame({
+                'Colocação': range(1, len(ministry_scores) + 1),
+                'Ministério': ministry_scores.index,
+                'Pontuação Total': ministry_scores['pontuacao_total'].round(2)
+            })
             
-            # Add filter for week if weekly analysis is selected
-            if periodicidade == "Semanal" and semana_filtro != "Todas":
-                conditions.append("semana_referencia = %s")
-                params.append(int(semana_filtro))
+            # Highlight top 3
+            def highlight_top_3(row):
+                if row['Colocação'] == 1:
+                    return ['background-color: gold'] * len(row)
+                elif row['Colocação'] == 2:
+                    return ['background-color: silver'] * len(row)
+                elif row['Colocação'] == 3:
+                    return ['background-color: #cd7f32'] * len(row)  # bronze
+                return [''] * len(row)
             
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
+            st.dataframe(ranking_df.style.apply(highlight_top_3, axis=1), width=600)
+            show_export_panel(mes_filtro, ano_filtro, semana_filtro)
             
-            df = pd.read_sql_query(query, conn, params=params)
+            # Visualizations
+            st.subheader("Gráficos Gerais")
             
-            if df.empty:
-                st.warning("Não há dados disponíveis para o período selecionado.")
+            # Overall comparison chart (memoized per filters)
+            with perf_timer("Gráfico: pontuação total", "plotly"):
+                st.plotly_chart(build_ranking_chart(mes_filtro, ano_filtro, semana_filtro))
+            
+            # Detailed view for selected ministry
+            st.subheader("Análise Detalhada por Ministério")
+            selected_ministry = st.selectbox(
+                "Selecione um Ministério para Análise Detalhada",
+                ministry_scores.index.tolist()
+            )
+            
+            # Only the section being viewed is loaded and drawn, so a rerun that changes
+            # the filters redoes the ranking plus, at most, that one section
+            secao = st.radio(
+                "Seção",
+                DETAIL_SECTIONS,
+                index=None,
+                horizontal=True,
+                key="secao_detalhada",
+                help="Cada seção é carregada apenas quando selecionada."
+            )
+            
+            if secao is None:
+                st.caption("Selecione uma seção para ver os detalhes do ministério.")
             else:
-                # Add context about the analysis period
-                if periodicidade == "Semanal":
-                    period_text = f"Semana {semana_filtro}" if semana_filtro != "Todas" else "Todas as Semanas"
-                    if mes_filtro != "Todos":
-                        period_text += f" de {mes_filtro}"
-                    if ano_filtro != "Todos":
-                        period_text += f" de {ano_filtro}"
-                else:
-                    period_text = f"{mes_filtro}" if mes_filtro != "Todos" else "Todos os Meses"
-                    if ano_filtro != "Todos":
-                        period_text += f" de {ano_filtro}"
-                
-                st.subheader(f"Análise {periodicidade}: {period_text}")
-                
-                # Calculate average scores for each ministry
-                ministry_scores = df.groupby('ministerio')[
-                    ['pontualidade', 'assiduidade_celebracoes', 'assiduidade_reunioes', 'trabalho_equipe']
-                ].mean()
+                st.subheader(f"{secao}: {selected_ministry}")
+                filtros = (selected_ministry, mes_filtro, ano_filtro, semana_filtro)
                 
-                # Calculate total score
-                ministry_scores['pontuacao_total'] = ministry_scores.sum(axis=1)
-                
-                # Sort by total score
-                ministry_scores = ministry_scores.sort_values('pontuacao_total', ascending=False)
-                
-                # Display ranking
-                st.subheader("Classificação Geral dos Ministérios")
-                
-                # Creating a better visualization for the ranking
-                ranking_df = pd.DataFrame({
-                    'Colocação': range(1, len(ministry_scores) + 1),
-                    'Ministério': ministry_scores.index,
-                    'Pontuação Total': ministry_scores['pontuacao_total'].round(2)
-                })
-                
-                # Highlight top 3
-                def highlight_top_3(row):
-                    if row['Colocação'] == 1:
-                        return ['background-color: gold'] * len(row)
-                    elif row['Colocação'] == 2:
-                        return ['background-color: silver'] * len(row)
-                    elif row['Colocação'] == 3:
-                        return ['background-color: #cd7f32'] * len(row)  # bronze
-                    return [''] * len(row)
-                
-                st.dataframe(ranking_df.style.apply(highlight_top_3, axis=1), width=600)
-                
-                # Visualizations
-                st.subheader("Gráficos Gerais")
+                with perf_timer(f"Seção: {secao}", "render"):
+                    if secao == "Desempenho":
+                        show_ministry_performance(ministry_scores.loc[selected_ministry], *filtros, periodicidade)
+                    elif secao == "Membros":
+                        show_ministry_members(*filtros, periodicidade)
+                    elif secao == "Preparo da Equipe":
+                        show_team_preparation(*filtros)
+                    elif secao == "Treinamentos":
+                        show_list_section("treinamentos", *filtros)
+                    elif secao == "Estratégias":
+                        show_list_section("estrategias", *filtros)
+                    elif secao == "Comentários":
+                        show_ministry_comments(*filtros)
+                    else:
+                        show_submission_history(*filtros)
+    except Exception as e:
+        st.error(f"Erro ao carregar dados: {e}")
+    
+    show_pool_metrics()
+    show_index_check()
+    show_ranking_parity_check(mes_filtro, ano_filtro, semana_filtro)
+
+# Annual award: podium of the selected year (or every year's podium) and its race chart
+def show_annual_award(ano_filtro):
+    st.subheader("Premiação Anual")
+    annual = load_annual_rankings()
+    
+    if annual.empty:
+        st.info("Ainda não há classificações para a premiação anual.")
+        return
+    
+    if ano_filtro == "Todos":
+        # One row per year with its top three
+        podiums = annual[annual['colocacao'] <= 3].pivot(
+            index='ano_referencia', columns='colocacao', values='ministerio'
+        )
+        podiums.columns = [f"{colocacao}º Lugar" for colocacao in podiums.columns]
+        podiums.index.name = 'Ano'
+        st.dataframe(podiums, width=600)
+        return
+    
+    ano = int(ano_filtro)
+    year = annual[annual['ano_referencia'] == ano]
+    if year.empty:
+        st.info(f"Não há classificações para {ano}.")
+        return
+    
+    ultimo_mes = year['mes_referencia'].iloc[0]
+    if ultimo_mes == MESES[-1]:
+        st.caption(f"Classificação final de {ano}.")
+    else:
+        st.caption(f"Classificação parcial de {ano}, acumulada até {ultimo_mes}.")
+    
+    # Podium, with the change in placing since the previous year
+    previous = annual[annual['ano_referencia'] == ano - 1].set_index('ministerio')['colocacao']
+    for col, row in zip(st.columns(3), year.head(3).itertuples()):
+        anterior = previous.get(row.ministerio)
+        if anterior is None or anterior == row.colocacao:
+            delta = None if anterior is None else f"mesma colocação de {ano - 1}"
+            col.metric(f"{row.colocacao}º Lugar", row.ministerio, delta, delta_color="off")
+        else:
+            col.metric(
+                f"{row.colocacao}º Lugar",
+                row.ministerio,
+                f"{anterior - row.colocacao:+d} posições em relação a {ano - 1}"
+            )
+    
+    race = load_ranking_race(ano)
+    cumulative = race[race['tipo'] == 'acumulado']
+    
+    # Cumulative placing after each month; 1st place on top
+    with perf_timer("Gráfico: corrida da premiação", "plotly"):
+        fig = px.line(
+            cumulative,
+            x='mes_referencia',
+            y='colocacao',
+            color='ministerio',
+            markers=True,
+            hover_data=['pontuacao_total'],
+            category_orders={'mes_referencia': cumulative['mes_referencia'].unique().tolist()},
+            title=f"Classificação Acumulada Mês a Mês - {ano}",
+            labels={
+                'mes_referencia': 'Mês',
+                'colocacao': 'Colocação',
+                'ministerio': 'Ministério',
+                'pontuacao_total': 'Pontuação Total'
+            }
+        )
+        fig.update_yaxes(autorange="reversed", dtick=1)
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # Placing within each month, ministries in final order
+    monthly = race[race['tipo'] == 'mensal'].pivot(
+        index='ministerio', columns='mes_numero', values='colocacao'
+    ).reindex(year['ministerio']).astype('Int64')
+    monthly.columns = [MESES[numero - 1] for numero in monthly.columns]
+    monthly.index.name = 'Ministério'
+    st.markdown("**Colocação em cada mês**")
+    st.dataframe(monthly)
+    st.caption(
+        "Empates na pontuação total (com duas casas decimais) ficam com o ministério "
+        "que enviou mais avaliações; persistindo o empate, vale a ordem alfabética."
+    )
+
+# Label of a period key, e.g. 202503 -> "Março de 2025"
+def format_period(periodo):
+    return f"{MESES[periodo % 100 - 1]} de {periodo // 100}"
+
+# Trend analysis: rolling averages, deltas and slopes over a range of months
+def show_trend_analysis():
+    st.subheader("Tendências ao Longo do Tempo")
+    periodos = load_available_periods()
+    
+    if not periodos:
+        st.warning("Não há dados disponíveis para a análise de tendências.")
+        return
+    
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        # The last two years by default
+        inicio, fim = st.select_slider(
+            "Intervalo",
+            options=periodos,
+            value=(periodos[max(0, len(periodos) - 24)], periodos[-1]),
+            format_func=format_period,
+            key="tendencia_intervalo"
+        ) if len(periodos) > 1 else (periodos[0], periodos[0])
+    with col2:
+        janela = st.slider(
+            "Média móvel (semanas)", 1, 12, 4,
+            key="tendencia_janela",
+            help="Número de semanas em cada média móvel e nas comparações de início e fim do intervalo."
+        )
+    with col3:
+        metrica = st.selectbox(
+            "Métrica",
+            list(TREND_METRICS),
+            format_func=TREND_METRICS.get,
+            key="tendencia_metrica"
+        )
+    
+    series, summary = compute_trend_analytics(load_weekly_series(inicio, fim), janela)
+    if series.empty:
+        st.warning("Não há dados disponíveis para o intervalo selecionado.")
+        return
+    
+    with perf_timer("Gráfico: médias móveis", "plotly"):
+        st.plotly_chart(build_trend_chart(inicio, fim, janela, metrica), use_container_width=True)
+    
+    # Per-ministry summary of the selected metric, steepest improvement first
+    resumo = summary.xs(metrica, axis=1, level=1).sort_values('inclinacao', ascending=False)
+    st.markdown(f"**{TREND_METRICS[metrica]}: {format_period(inicio)} a {format_period(fim)}**")
+    st.dataframe(
+        resumo.rename(columns={
+            'media': 'Média no Intervalo',
+            'variacao': f'Variação (últimas {janela} vs. primeiras {janela} semanas)',
+            'inclinacao': 'Tendência (pontos por mês)'
+        }).rename_axis('Ministério').style.format("{:+.2f}", na_rep="-", subset=[
+            f'Variação (últimas {janela} vs. primeiras {janela} semanas)', 'Tendência (pontos por mês)'
+        ]).format("{:.2f}", na_rep="-", subset=['Média no Intervalo']),
+        width=800
+    )
+    
+    # Change of every requirement, per ministry
+    st.markdown("**Variação por requisito**")
+    variacao = summary['variacao'][SCORE_COLUMNS].rename(columns=TREND_METRICS).rename_axis('Ministério')
+    st.dataframe(variacao.style.format("{:+.2f}", na_rep="-"), width=800)
+
+# Sections of the detailed analysis, each rendered only while selected
+DETAIL_SECTIONS = [
+    "Desempenho", "Membros", "Preparo da Equipe", "Treinamentos",
+    "Estratégias", "Comentários", "Histórico"
+]
+
+# Definir os rótulos das semanas
+SEMANA_LABELS = {
+    1: "Primeira Semana",
+    2: "Segunda Semana",
+    3: "Terceira Semana",
+    4: "Quarta Semana",
+    5: "Quinta Semana"
+}
+
+# Chart builders, memoized per filters (and ministry) like the data they plot
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def build_ranking_chart(mes_filtro, ano_filtro, semana_filtro):
+    """Bar chart of the total score per ministry."""
+    ministry_scores = load_ministry_scores(mes_filtro, ano_filtro, semana_filtro)
+    return px.bar(
+        ministry_scores.reset_index(), 
+        x='ministerio', 
+        y='pontuacao_total',
+        title="Pontuação Total por Ministério",
+        labels={'ministerio': 'Ministério', 'pontuacao_total': 'Pontuação Total'},
+        color='pontuacao_total',
+        color_continuous_scale='viridis'
+    )
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def build_weekly_chart(ministerio, mes_filtro, ano_filtro, semana_filtro):
+    """Line chart of one ministry's metrics per week."""
+    weekly_data = load_weekly_scores(ministerio, mes_filtro, ano_filtro, semana_filtro)
+    return px.line(
+        weekly_data,
+        x='semana_referencia',
+        y=SCORE_COLUMNS,
+        title=f"Progresso Semanal - {ministerio}",
+        labels={
+            'semana_referencia': 'Semana', 
+            'value': 'Pontuação', 
+            'variable': 'Métrica'
+        },
+        markers=True
+    )
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def build_radar_chart(ministerio, mes_filtro, ano_filtro, semana_filtro):
+    """Radar chart of one ministry's metric averages."""
+    selected_scores = load_ministry_scores(mes_filtro, ano_filtro, semana_filtro).loc[ministerio]
+    categories = ['Pontualidade', 'Assiduidade Celebrações', 
+                 'Assiduidade Reuniões', 'Trabalho em Equipe']
+    return px.line_polar(
+        r=[selected_scores[column] for column in SCORE_COLUMNS],
+        theta=categories,
+        line_close=True,
+        range_r=[0, 10],
+        title=f"Perfil de Requisitos: {ministerio}"
+    )
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def build_trend_chart(inicio, fim, janela, metrica):
+    """Line chart of one metric's rolling average per ministry and week."""
+    series, _ = compute_trend_analytics(load_weekly_series(inicio, fim), janela)
+    return px.line(
+        series,
+        x='data',
+        y=f"{metrica}_movel",
+        color='ministerio',
+        title=f"{TREND_METRICS[metrica]} - média móvel de {janela} semana(s)",
+        labels={
+            'data': 'Semana',
+            f"{metrica}_movel": TREND_METRICS[metrica],
+            'ministerio': 'Ministério'
+        }
+    )
+
+# Metrics, weekly trends and requirement profile of the selected ministry
+def show_ministry_performance(selected_scores, ministerio, mes_filtro, ano_filtro, semana_filtro, periodicidade):
+    # Metrics overview
+    col1, col2, col3, col4 = st.columns(4)
+    
+    col1.metric(
+        "Pontualidade", 
+        f"{selected_scores['pontualidade']:.2f}/10"
+    )
+    
+    col2.metric(
+        "Assiduidade nas Celebrações", 
+        f"{selected_scores['assiduidade_celebracoes']:.2f}/10"
+    )
+    
+    col3.metric(
+        "Assiduidade nas Reuniões", 
+        f"{selected_scores['assiduidade_reunioes']:.2f}/10"
+    )
+    
+    col4.metric(
+        "Trabalho em Equipe", 
+        f"{selected_scores['trabalho_equipe']:.2f}/10"
+    )
+    
+    # If weekly analysis is selected, show weekly trends
+    if periodicidade == "Semanal" and mes_filtro in MESES and ano_filtro != "Todos":
+        st.subheader(f"Tendências Semanais - {mes_filtro} de {ano_filtro}")
+        
+        # Create a time series for each metric
+        with perf_timer("Gráfico: progresso semanal", "plotly"):
+            st.plotly_chart(build_weekly_chart(ministerio, mes_filtro, ano_filtro, semana_filtro))
+        
+        # Calculate week-to-week changes
+        weekly_data = load_weekly_scores(ministerio, mes_filtro, ano_filtro, semana_filtro)
+        if len(weekly_data) >= 2:
+            st.subheader("Evolução Semanal")
+            
+            for metric in SCORE_COLUMNS:
+                # Get first and last week values
+                first_value = weekly_data[metric].iloc[0]
+                last_value = weekly_data[metric].iloc[-1]
+                change = last_value - first_value
                 
-                # Overall comparison chart
-                fig = px.bar(
-                    ministry_scores.reset_index(), 
-                    x='ministerio', 
-                    y='pontuacao_total',
-                    title="Pontuação Total por Ministério",
-                    labels={'ministerio': 'Ministério', 'pontuacao_total': 'Pontuação Total'},
-                    color='pontuacao_total',
-                    color_continuous_scale='viridis'
+                # Display change with color
+                col1, col2 = st.columns([1, 3])
+                col1.metric(
+                    metric.replace('_', ' ').title(), 
+                    f"{last_value:.1f}",
+                    f"{change:+.1f}",
+                    delta_color="normal" if change >= 0 else "inverse"
                 )
-                st.plotly_chart(fig)
-                
-                # Detailed view for selected ministry
-                st.subheader("Análise Detalhada por Ministério")
-                selected_ministry = st.selectbox(
-                    "Selecione um Ministério para Análise Detalhada",
-                    ministry_scores.index.tolist()
+    
+    # Radar chart for requirements
+    with perf_timer("Gráfico: perfil de requisitos", "plotly"):
+        st.plotly_chart(build_radar_chart(ministerio, mes_filtro, ano_filtro, semana_filtro), use_container_width=True)
+
+# New members and members in qualification of the selected ministry
+def show_ministry_members(ministerio, mes_filtro, ano_filtro, semana_filtro, periodicidade):
+    st.subheader("Métricas de Crescimento")
+    
+    # Roster for the selected period (the roster is kept per month), counted in the database
+    total_novos, total_qualificacao = load_member_counts(ministerio, mes_filtro, ano_filtro)
+    members = load_ministry_members(ministerio, mes_filtro, ano_filtro)
+    novos_membros_unique = members.loc[members['novo'], 'nome'].tolist()
+    
+    # Members in qualification that were not promoted yet
+    membros_qualificacao_unique = members.loc[~members['novo'], 'nome'].tolist()
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.metric(
+            f"Total de Novos Membros ({periodicidade.lower().rstrip('l')})", 
+            total_novos
+        )
+        
+        if novos_membros_unique:
+            st.markdown("**Nomes dos Novos Membros:**")
+            for nome in novos_membros_unique:
+                st.markdown(f"- {nome}")
+    
+    with col2:
+        st.metric(
+            f"Total de Membros em Qualificação ({periodicidade.lower().rstrip('l')})", 
+            total_qualificacao
+        )
+        
+        if membros_qualificacao_unique:
+            st.markdown("**Nomes dos Membros em Qualificação:**")
+            for nome in membros_qualificacao_unique:
+                st.markdown(f"- {nome}")
+
+# Seção 2: Preparo da Equipe para a Celebração
+def show_team_preparation(ministerio, mes_filtro, ano_filtro, semana_filtro):
+    st.markdown("#### Seção 2 - Preparo da Equipe para a Celebração")
+    
+    # Only the category/week slices of the selected period are fetched
+    activities = load_weekly_activities(ministerio, mes_filtro, ano_filtro, semana_filtro)
+    
+    for categoria, titulo in ACTIVITY_CATEGORIES.items():
+        st.markdown(f"### {titulo}")
+        
+        for row in activities[activities['categoria'] == categoria].itertuples():
+            st.markdown(f"**{SEMANA_LABELS[row.semana]}:**")
+            st.write(row.texto)
+
+# Seção 3 (Treinamento e Capacitação) and Seção 4 (Estratégias para Crescimento)
+def show_list_section(column, ministerio, mes_filtro, ano_filtro, semana_filtro):
+    titulo, vazio = {
+        "treinamentos": ("Seção 3 - Treinamento e Capacitação", "Nenhum treinamento registrado para este período."),
+        "estrategias": ("Seção 4 - Estratégias para Crescimento", "Nenhuma estratégia registrada para este período.")
+    }[column]
+    st.markdown(f"#### {titulo}")
+    
+    # Distinct items of the selected period, in the order they were first registered
+    items = load_list_items(column, ministerio, mes_filtro, ano_filtro, semana_filtro)
+    
+    if items:
+        for i, item in enumerate(items):
+            st.markdown(f"**{i+1}.** {item}")
+    else:
+        st.info(vazio)
+
+# Seção 6: Comentários
+def show_ministry_comments(ministerio, mes_filtro, ano_filtro, semana_filtro):
+    st.markdown("#### Seção 6 - Comentários e Sugestões")
+    
+    ministry_details = load_ministry_details(ministerio, mes_filtro, ano_filtro, semana_filtro)
+    
+    # Display comments from all entries in the period
+    for _, row in ministry_details.iterrows():
+        if pd.notna(row['comentarios']) and row['comentarios'].strip():
+            semana = row['semana_referencia']
+            st.markdown(f"**Comentários da {SEMANA_LABELS[semana]}:**")
+            st.write(row['comentarios'])
+
+# Submissions of the selected ministry
+def show_submission_history(ministerio, mes_filtro, ano_filtro, semana_filtro):
+    ministry_data = load_submission_history(ministerio, mes_filtro, ano_filtro, semana_filtro)
+    
+    # When the rows were last checked for new submissions
+    atualizacao = f"Dados atualizados às {ministry_data.attrs['atualizado_em']:%H:%M:%S}"
+    if ministry_data.attrs.get('ultima_submissao') is not None:
+        atualizacao += f" · última submissão em {ministry_data.attrs['ultima_submissao']:%d/%m/%Y %H:%M}"
+    st.caption(atualizacao)
+    
+    submissions_df = ministry_data[['data_submissao', 'nome', 'mes_referencia', 'ano_referencia']].copy()
+    submissions_df['data_formatada'] = submissions_df['data_submissao'].dt.strftime('%d/%m/%Y %H:%M')
+    submissions_df = submissions_df.sort_values('data_submissao', ascending=False)
+    
+    st.dataframe(
+        submissions_df[['data_formatada', 'nome', 'mes_referencia', 'ano_referencia']].rename(
+            columns={
+                'data_formatada': 'Data de Submissão',
+                'nome': 'Nome',
+                'mes_referencia': 'Mês',
+                'ano_referencia': 'Ano'
+            }
+        ),
+        width=800
+    )
+
+# Download of the ranking, the weekly summary or the evaluations for the current filters
+def show_export_panel(mes_filtro, ano_filtro, semana_filtro):
+    """Generate the chosen export on request and offer it for download."""
+    with st.expander("Exportar dados"):
+        col1, col2 = st.columns(2)
+        with col1:
+            dataset = st.selectbox("Dados", list(EXPORT_DATASETS), format_func=EXPORT_DATASETS.get, key="exportar_dados")
+        with col2:
+            formato = st.selectbox(
+                "Formato", list(EXPORT_FORMATS), format_func=lambda formato: EXPORT_FORMATS[formato][0], key="exportar_formato"
+            )
+        
+        pedido = (dataset, formato, mes_filtro, ano_filtro, semana_filtro)
+        if st.button("Gerar arquivo", help="Arquivos já gerados para os mesmos dados são reaproveitados."):
+            with st.spinner("Gerando arquivo..."):
+                try:
+                    st.session_state.exportacao = (pedido, export_dataset(*pedido))
+                except Exception as e:
+                    st.error(f"Erro ao exportar os dados: {e}")
+        
+        # The file stays offered until the choices or filters change
+        exportacao = st.session_state.get("exportacao")
+        if exportacao and exportacao[0] == pedido and os.path.exists(exportacao[1][0]):
+            path, rows, reused = exportacao[1]
+            with open(path, "rb") as f:
+                st.download_button(
+                    "Baixar arquivo",
+                    f,
+                    file_name=export_file_name(*pedido),
+                    mime=EXPORT_FORMATS[formato][1]
                 )
-                
-                # Filter data for selected ministry
-                ministry_data = df[df['ministerio'] == selected_ministry]
-                
-                if not ministry_data.empty:
-                    st.subheader(f"Análise Detalhada: {selected_ministry}")
-                    
-                    # Metrics overview
-                    col1, col2, col3, col4 = st.columns(4)
-                    
-                    col1.metric(
-                        "Pontualidade", 
-                        f"{ministry_data['pontualidade'].mean():.2f}/10"
-                    )
-                    
-                    col2.metric(
-                        "Assiduidade nas Celebrações", 
-                        f"{ministry_data['assiduidade_celebracoes'].mean():.2f}/10"
-                    )
-                    
-                    col3.metric(
-                        "Assiduidade nas Reuniões", 
-                        f"{ministry_data['assiduidade_reunioes'].mean():.2f}/10"
-                    )
-                    
-                    col4.metric(
-                        "Trabalho em Equipe", 
-                        f"{ministry_data['trabalho_equipe'].mean():.2f}/10"
-                    )
-                    
-                    # If weekly analysis is selected, show weekly trends
-                    if periodicidade == "Semanal" and mes_filtro != "Todos" and ano_filtro != "Todos":
-                        st.subheader(f"Tendências Semanais - {mes_filtro} de {ano_filtro}")
-                        
-                        # Sort by week
-                        weekly_data = ministry_data.sort_values('semana_referencia')
-                        
-                        # Create a time series for each metric
-                        fig = px.line(
-                            weekly_data,
-                            x='semana_referencia',
-                            y=['pontualidade', 'assiduidade_celebracoes', 'assiduidade_reunioes', 'trabalho_equipe'],
-                            title=f"Progresso Semanal - {selected_ministry}",
-                            labels={
-                                'semana_referencia': 'Semana', 
-                                'value': 'Pontuação', 
-                                'variable': 'Métrica'
-                            },
-                            markers=True
-                        )
-                        st.plotly_chart(fig)
-                        
-                        # Calculate week-to-week changes
-                        if len(weekly_data) >= 2:
-                            st.subheader("Evolução Semanal")
-                            metrics = ['pontualidade', 'assiduidade_celebracoes', 'assiduidade_reunioes', 'trabalho_equipe']
-                            
-                            for metric in metrics:
-                                # Get first and last week values
-                                first_value = weekly_data[metric].iloc[0]
-                                last_value = weekly_data[metric].iloc[-1]
-                                change = last_value - first_value
-                                
-                                # Display change with color
-                                col1, col2 = st.columns([1, 3])
-                                col1.metric(
-                                    metric.replace('_', ' ').title(), 
-                                    f"{last_value:.1f}",
-                                    f"{change:+.1f}",
-                                    delta_color="normal" if change >= 0 else "inverse"
-                                )
-                    
-                    # Radar chart for requirements
-                    categories = ['Pontualidade', 'Assiduidade Celebrações', 
-                                 'Assiduidade Reuniões', 'Trabalho em Equipe']
-                    
-                    values = [
-                        ministry_data['pontualidade'].mean(),
-                        ministry_data['assiduidade_celebracoes'].mean(),
-                        ministry_data['assiduidade_reunioes'].mean(),
-                        ministry_data['trabalho_equipe'].mean()
-                    ]
-                    
-                    fig_radar = px.line_polar(
-                        r=values,
-                        theta=categories,
-                        line_close=True,
-                        range_r=[0, 10],
-                        title=f"Perfil de Requisitos: {selected_ministry}"
-                    )
-                    st.plotly_chart(fig_radar, use_container_width=True)
-                    
-                    # Display metrics for members
-                    st.subheader("Métricas de Crescimento")
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        # Get the total new members from the latest entries
-                        total_new_members = ministry_data['novos_membros'].sum()
-                        
-                        # Get unique new member names
-                        novos_membros_unique = []
-                        
-                        # To avoid duplicates, we'll use the latest entries first
-                        for _, row in ministry_data.sort_values('data_submissao', ascending=False).iterrows():
-                            if pd.notna(row['nomes_novos_membros']) and row['nomes_novos_membros']:
-                                current_members = [nome.strip() for nome in row['nomes_novos_membros'].split('\n') if nome.strip()]
-                                for membro in current_members:
-                                    if membro not in novos_membros_unique:
-                                        novos_membros_unique.append(membro)
-                        
-                        st.metric(
-                            f"Total de Novos Membros ({periodicidade.lower().rstrip('l')})", 
-                            len(novos_membros_unique)
-                        )
-                        
-                        if novos_membros_unique:
-                            st.markdown("**Nomes dos Novos Membros:**")
-                            for nome in novos_membros_unique:
-                                st.markdown(f"- {nome}")
-                    
-                    with col2:
-                        # Get the total members in qualification from the latest entries
-                        total_qualifying_members = ministry_data['membros_qualificacao'].sum()
-                        
-                        # Get unique members in qualification
-                        membros_qualificacao_unique = []
-                        
-                        # To avoid duplicates, we'll use the latest entries first
-                        for _, row in ministry_data.sort_values('data_submissao', ascending=False).iterrows():
-                            if pd.notna(row['nomes_membros_qualificacao']) and row['nomes_membros_qualificacao']:
-                                current_members = [nome.strip() for nome in row['nomes_membros_qualificacao'].split('\n') if nome.strip()]
-                                for membro in current_members:
-                                    if membro not in membros_qualificacao_unique and membro not in novos_membros_unique:
-                                        membros_qualificacao_unique.append(membro)
-                        
-                        st.metric(
-                            f"Total de Membros em Qualificação ({periodicidade.lower().rstrip('l')})", 
-                            len(membros_qualificacao_unique)
-                        )
-                        
-                        if membros_qualificacao_unique:
-                            st.markdown("**Nomes dos Membros em Qualificação:**")
-                            for nome in membros_qualificacao_unique:
-                                st.markdown(f"- {nome}")
-                    
-                    # Exibir detalhes da Seção 2, 3 e 4 para o ministério selecionado
-                    st.subheader("Informações Detalhadas")
-                    
-                    # Definir os rótulos das semanas
-                    semana_label = {
-                        1: "Primeira Semana",
-                        2: "Segunda Semana",
-                        3: "Terceira Semana",
-                        4: "Quarta Semana",
-                        5: "Quinta Semana"
-                    }
-                    
-                    # Criar abas para cada seção
-                    tabs = st.tabs(["Preparo da Equipe", "Treinamentos", "Estratégias", "Comentários"])
-                    
-                    # Seção 2: Preparo da Equipe para a Celebração
-                    with tabs[0]:
-                        st.subheader("Seção 2 - Preparo da Equipe para a Celebração")
-                        
-                        # Consagração (Jejum e Oração)
-                        st.markdown("### Consagração (Jejum e Oração)")
-                        
-                        # Se estiver no modo semanal e uma semana específica estiver selecionada, mostrar apenas os dados dessa semana
-                        if periodicidade == "Semanal" and semana_filtro != "Todas":
-                            semana_num = int(semana_filtro)
-                            semana_campos = {
-                                1: 'consagracao_semana1',
-                                2: 'consagracao_semana2',
-                                3: 'consagracao_semana3',
-                                4: 'consagracao_semana4',
-                                5: 'consagracao_semana5'
-                            }
-                            
-                            campo = semana_campos[semana_num]
-                            if pd.notna(ministry_data[campo].iloc[0]) and ministry_data[campo].iloc[0]:
-                                st.markdown(f"**{semana_label[semana_num]}:**")
-                                st.write(ministry_data[campo].iloc[0])
-                            
-                            # Preparo Técnico (somente da semana selecionada)
-                            st.markdown("### Preparo Técnico (Ensaio, preparo técnico e equipamentos)")
-                            
-                            campo = f'preparo_tecnico_semana{semana_num}'
-                            if pd.notna(ministry_data[campo].iloc[0]) and ministry_data[campo].iloc[0]:
-                                st.markdown(f"**{semana_label[semana_num]}:**")
-                                st.write(ministry_data[campo].iloc[0])
-                            
-                            # Reuniões (somente da semana selecionada)
-                            st.markdown("### Reuniões")
-                            
-                            campo = f'reunioes_semana{semana_num}'
-                            if pd.notna(ministry_data[campo].iloc[0]) and ministry_data[campo].iloc[0]:
-                                st.markdown(f"**{semana_label[semana_num]}:**")
-                                st.write(ministry_data[campo].iloc[0])
-                        else:
-                            # Mostrar TODAS as semanas em modo mensal ou quando "Todas" as semanas estiverem selecionadas
-                            # Agrupar entradas por semana para obter dados de todas as semanas do mês
-                            semanas_data = {}
-                            
-                            # Processar todas as entradas do ministério no período selecionado
-                            for _, row in ministry_data.iterrows():
-                                semana = row['semana_referencia']
-                                if semana not in semanas_data:
-                                    semanas_data[semana] = row
-                            
-                            # Ordenar semanas
-                            semanas_ordenadas = sorted(semanas_data.keys())
-                            
-                            # Mostrar dados de cada semana
-                            for semana in semanas_ordenadas:
-                                entry = semanas_data[semana]
-                                
-                                # Consagração
-                                campo_consagracao = f'consagracao_semana{semana}'
-                                if pd.notna(entry[campo_consagracao]) and entry[campo_consagracao]:
-                                    st.markdown(f"**{semana_label[semana]}:**")
-                                    st.write(entry[campo_consagracao])
-                            
-                            # Preparo Técnico para todas as semanas
-                            st.markdown("### Preparo Técnico (Ensaio, preparo técnico e equipamentos)")
-                            
-                            for semana in semanas_ordenadas:
-                                entry = semanas_data[semana]
-                                campo_preparo = f'preparo_tecnico_semana{semana}'
-                                if pd.notna(entry[campo_preparo]) and entry[campo_preparo]:
-                                    st.markdown(f"**{semana_label[semana]}:**")
-                                    st.write(entry[campo_preparo])
-                            
-                            # Reuniões para todas as semanas
-                            st.markdown("### Reuniões")
-                            
-                            for semana in semanas_ordenadas:
-                                entry = semanas_data[semana]
-                                campo_reunioes = f'reunioes_semana{semana}'
-                                if pd.notna(entry[campo_reunioes]) and entry[campo_reunioes]:
-                                    st.markdown(f"**{semana_label[semana]}:**")
-                                    st.write(entry[campo_reunioes])
-                    
-                    # Seção 3: Treinamento e Capacitação
-                    with tabs[1]:
-                        st.subheader("Seção 3 - Treinamento e Capacitação")
-                        
-                        # Aggregating all training data from the selected period
-                        all_treinamentos = []
-                        
-                        # Process each entry
-                        for _, row in ministry_data.iterrows():
-                            treinamentos_data = row['treinamentos']
-                            
-                            # Try to interpret as JSON if it's a string
-                            if isinstance(treinamentos_data, str):
-                                try:
-                                    treinamentos_data = json.loads(treinamentos_data)
-                                except json.JSONDecodeError:
-                                    treinamentos_data = []
-                            
-                            # Ensure we have an iterable
-                            if isinstance(treinamentos_data, list):
-                                for item in treinamentos_data:
-                                    if item and item not in all_treinamentos:  # Avoid duplicates
-                                        all_treinamentos.append(item)
-                        
-                        # Display all trainings
-                        if all_treinamentos:
-                            for i, treinamento in enumerate(all_treinamentos):
-                                st.markdown(f"**{i+1}.** {treinamento}")
-                        else:
-                            st.info("Nenhum treinamento registrado para este período.")
-                    
-                    # Seção 4: Estratégias para Crescimento
-                    with tabs[2]:
-                        st.subheader("Seção 4 - Estratégias para Crescimento")
-                        
-                        # Aggregating all strategies data from the selected period
-                        all_estrategias = []
-                        
-                        # Process each entry
-                        for _, row in ministry_data.iterrows():
-                            estrategias_data = row['estrategias']
-                            
-                            # Try to interpret as JSON if it's a string
-                            if isinstance(estrategias_data, str):
-                                try:
-                                    estrategias_data = json.loads(estrategias_data)
-                                except json.JSONDecodeError:
-                                    estrategias_data = []
-                            
-                            # Ensure we have an iterable
-                            if isinstance(estrategias_data, list):
-                                for item in estrategias_data:
-                                    if item and item not in all_estrategias:  # Avoid duplicates
-                                        all_estrategias.append(item)
-                        
-                        # Display all strategies
-                        if all_estrategias:
-                            for i, estrategia in enumerate(all_estrategias):
-                                st.markdown(f"**{i+1}.** {estrategia}")
-                        else:
-                            st.info("Nenhuma estratégia registrada para este período.")
-                    
-                    # Seção 6: Comentários
-                    with tabs[3]:
-                        st.subheader("Seção 6 - Comentários e Sugestões")
-                        
-                        # Display comments from all entries in the period
-                        if not ministry_data.empty:
-                            for i, row in ministry_data.iterrows():
-                                if pd.notna(row['comentarios']) and row['comentarios'].strip():
-                                    semana = row['semana_referencia']
-                                    st.markdown(f"**Comentários da {semana_label[semana]}:**")
-                                    st.write(row['comentarios'])
-                    
-                    # Adicionar seletor de submissões anteriores
-                    if len(ministry_data) > 1:
-                        st.subheader("Histórico de Submissões")
-                        
-                        submissions_df = ministry_data[['data_submissao', 'nome', 'mes_referencia', 'ano_referencia']]
-                        submissions_df['data_formatada'] = submissions_df['data_submissao'].dt.strftime('%d/%m/%Y %H:%M')
-                        submissions_df = submissions_df.sort_values('data_submissao', ascending=False)
-                        
-                        st.dataframe(
-                            submissions_df[['data_formatada', 'nome', 'mes_referencia', 'ano_referencia']].rename(
-                                columns={
-                                    'data_formatada': 'Data de Submissão',
-                                    'nome': 'Nome',
-                                    'mes_referencia': 'Mês',
-                                    'ano_referencia': 'Ano'
-                                }
-                            ),
-                            width=800
-                        )
+            st.caption(f"{rows} linhas" + (" · arquivo reaproveitado do cache" if reused else ""))
+
+# Connection pool metrics for the admin area
+def show_pool_metrics():
+    """Display connection pool usage and checkout wait times."""
+    with st.expander("Conexões com o Banco de Dados"):
+        try:
+            stats = get_connection_pool().stats()
         except Exception as e:
-            st.error(f"Erro ao carregar dados: {e}")
-        finally:
-            conn.close()
-    else:
-        st.error("Não foi possível conectar ao banco de dados.")
+            st.error(f"Erro ao obter métricas do pool de conexões: {e}")
+            return
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Conexões em Uso", f"{stats['in_use']}/{stats['max_size']}")
+        col2.metric("Pico de Uso", stats["peak_in_use"])
+        col3.metric("Espera Média", f"{stats['avg_wait'] * 1000:.1f} ms")
+        col4.metric("Espera Máxima", f"{stats['max_wait'] * 1000:.1f} ms")
+        
+        st.caption(
+            f"Requisições atendidas: {stats['checkouts']} · "
+            f"Conexões descartadas: {stats['discarded']} · "
+            f"Tempos esgotados: {stats['timeouts']}"
+        )
+
+# Per-rerun timings for the admin area
+def show_performance_panel(collector):
+    """Display where the last rerun spent its time: database, pandas, charts and tabs."""
+    with st.expander("Desempenho"):
+        st.toggle(
+            "Medir o desempenho do painel",
+            key="medir_desempenho",
+            help="Registra, a cada atualização da página, o tempo das consultas, do pandas e dos gráficos."
+        )
+        if collector is None:
+            st.caption("A medição está desativada e não acrescenta custo às atualizações.")
+            return
+        
+        timings = pd.DataFrame(collector.timings, columns=["Etapa", "Categoria", "Tempo"])
+        queries = pd.DataFrame(collector.queries, columns=["Consulta", "Tempo", "Linhas"])
+        by_category = timings.groupby("Categoria")["Tempo"].sum()
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Tempo Total", f"{collector.elapsed() * 1000:.0f} ms")
+        col2.metric("Consultas SQL", len(queries), f"{queries['Tempo'].sum() * 1000:.0f} ms", delta_color="off")
+        col3.metric("Linhas Lidas", int(queries["Linhas"].sum()))
+        col4.metric(
+            "pandas / Gráficos",
+            f"{by_category.get('pandas', 0) * 1000:.0f} / {by_category.get('plotly', 0) * 1000:.0f} ms"
+        )
+        
+        if not timings.empty:
+            steps = timings.groupby(["Etapa", "Categoria"])["Tempo"].agg(["count", "sum"]).reset_index()
+            steps.columns = ["Etapa", "Categoria", "Chamadas", "Tempo (ms)"]
+            steps["Tempo (ms)"] = (steps["Tempo (ms)"] * 1000).round(1)
+            st.dataframe(steps.sort_values("Tempo (ms)", ascending=False), hide_index=True, use_container_width=True)
+        
+        if not queries.empty:
+            queries["Consulta"] = queries["Consulta"].str.split().str.join(" ").str.slice(0, 160)
+            queries["Tempo (ms)"] = (queries.pop("Tempo") * 1000).round(1)
+            st.dataframe(queries.sort_values("Tempo (ms)", ascending=False), hide_index=True, use_container_width=True)
+        else:
+            st.caption("Nenhuma consulta ao banco nesta atualização: todos os dados vieram do cache.")
+
+# Collect the node types of an EXPLAIN (FORMAT JSON) plan
+def collect_plan_nodes(plan):
+    """Return the node types of a query plan, depth first."""
+    nodes = [plan["Node Type"]]
+    for child in plan.get("Plans", []):
+        nodes.extend(collect_plan_nodes(child))
+    return nodes
+
+# Check whether each dashboard query is served by an index
+def check_dashboard_indexes():
+    """EXPLAIN the dashboard queries with sample filters and report index usage."""
+    mes = MESES[datetime.now().month - 1]
+    ano = str(datetime.now().year)
+    ministerio = next(iter(MINISTRY_LEADERS), "")
+    
+    queries = [
+        ("Lista de anos", AVAILABLE_YEARS_QUERY, []),
+        ("Avaliações por ano", *build_dashboard_query("Todos", ano, "Todas")),
+        ("Avaliações por mês e ano", *build_dashboard_query(mes, ano, "Todas")),
+        ("Avaliações por semana", *build_dashboard_query(mes, ano, "1")),
+        ("Avaliações por trimestre", *build_dashboard_query("2º Trimestre", ano, "Todas")),
+        ("Avaliações por mês (todos os anos)", *build_dashboard_query(mes, "Todos", "Todas")),
+        ("Ranking por ministério", *build_ranking_query(mes, ano, "Todas")),
+        ("Membros do ministério", MONTH_MEMBERS_QUERY, [ministerio, mes, int(ano)]),
+    ]
+    
+    results = []
+    with db_connection() as conn:
+        if conn:
+            try:
+                cur = conn.cursor()
+                for label, query, params in queries:
+                    cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+                    plan = cur.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    nodes = collect_plan_nodes(plan[0]["Plan"])
+                    results.append({
+                        "Consulta": label,
+                        "Usa Índice": any("Index" in node for node in nodes),
+                        "Plano": " → ".join(nodes)
+                    })
+            except Exception as e:
+                st.error(f"Erro ao verificar os índices: {e}")
+            finally:
+                cur.close()
+        else:
+            st.error("Não foi possível conectar ao banco de dados.")
+    return pd.DataFrame(results)
+
+# Index self-check for the admin area
+def show_index_check():
+    """Let the admin verify that the dashboard queries use the managed indexes."""
+    with st.expander("Verificação de Índices"):
+        st.caption(
+            "Em tabelas pequenas o PostgreSQL pode preferir a leitura sequencial, "
+            "mesmo com os índices disponíveis."
+        )
+        if st.button("Verificar uso de índices"):
+            results = check_dashboard_indexes()
+            if not results.empty:
+                st.dataframe(results, width=800)
+
+# Ranking parity self-check for the admin area
+def show_ranking_parity_check(mes_filtro, ano_filtro, semana_filtro):
+    """Let the admin confirm the SQL ranking matches the pandas computation."""
+    with st.expander("Verificação do Ranking"):
+        st.caption(f"Modo de agregação atual: {AGGREGATION_MODE}.")
+        if st.button("Comparar agregação SQL e pandas"):
+            try:
+                matches, details = check_ranking_parity(mes_filtro, ano_filtro, semana_filtro)
+            except Exception as e:
+                st.error(f"Erro ao verificar o ranking: {e}")
+                return
+            if matches:
+                st.success(details)
+            else:
+                st.error(f"Os resultados divergem:\n\n{details}")
+
+# Split newline-joined member names into a clean, de-duplicated list
+def extract_member_names(values, exclude=()):
+    """Return the unique, stripped member names found in newline-joined strings.
+
+    `values` is either one stored string (or None) or a Series of them; the first
+    occurrence of each name wins, and names in `exclude` are left out.
+    """
+    if values is None or isinstance(values, str):
+        # A single stored list: plain string handling beats building a Series
+        names = dict.fromkeys(name.strip() for name in (values or "").split("\n"))
+        names.pop("", None)
+        return [name for name in names if name not in exclude]
+    
+    names = pd.Series(values, dtype="object").dropna().astype(str).str.split("\n").explode().str.strip()
+    names = names[names.notna() & (names != "")]
+    if len(exclude):
+        names = names[~names.isin(list(exclude))]
+    return names.drop_duplicates().tolist()
+
+# Roster of a ministry in a given month
+MONTH_MEMBERS_QUERY = """
+    SELECT nome, status
+    FROM membros_ministerios
+    WHERE 
+        ministerio = %s AND 
+        mes_referencia = %s AND 
+        ano_referencia = %s
+    ORDER BY id
+"""
+
+# Per-session memo of get_existing_members, including "no members" results, so reruns of
+# the leader form don't query again. Entries are tied to the snapshot store generation,
+# which saving, promoting and the live submission feed all advance. Failed lookups are
+# not stored.
+def load_existing_members(ministerio, mes, ano):
+    """Return (novos_membros, membros_qualificacao), querying only after the data changed.
+
+    Returns None when the lookup failed.
+    """
+    cache = st.session_state.setdefault("membros_cache", {})
+    generation = get_snapshot_store().generation
+    
+    cached = cache.get((ministerio, mes, ano))
+    if cached is not None and cached[0] == generation:
+        return list(cached[1]), list(cached[2])
+    
+    membros = get_existing_members(ministerio, mes, ano)
+    if membros is None:
+        return None
+    novos_membros, membros_qualificacao = membros
+    cache[(ministerio, mes, ano)] = (generation, tuple(novos_membros), tuple(membros_qualificacao))
+    return novos_membros, membros_qualificacao
 
 # Get members from database for the current month
 def get_existing_members(ministerio, mes, ano):
-    """Fetch existing members data for the specified ministry, month and year."""
-    conn = connect_to_db()
-    if conn:
-        try:
-            cur = conn.cursor()
-            
-            # Query to get latest members data for the specific ministry, month and year
-            # Ensure we're strictly filtering by ministry to avoid cross-ministry data
-            cur.execute("""
-                SELECT 
-                    nomes_novos_membros, 
-                    nomes_membros_qualificacao 
-                FROM 
-                    avaliacoes_ministerios 
-                WHERE 
-                    ministerio = %s AND 
-                    mes_referencia = %s AND 
-                    ano_referencia = %s
-                ORDER BY
-                    data_submissao DESC
-                LIMIT 1
-            """, (ministerio, mes, ano))
-            
-            result = cur.fetchone()
-            
-            # Initialize lists for members
-            novos_membros = []
-            membros_qualificacao = []
-            
-            # Process the results only if we have data for the specified ministry
-            if result:
-                st.write(f"Encontrados dados para {ministerio}")
-                # Add new members from the latest entry
-                if result[0] and result[0].strip():
-                    novos_membros = [m.strip() for m in result[0].split('\n') if m.strip()]
+    """Fetch existing members data for the specified ministry, month and year.
+
+    Returns None (after showing the error) when the database could not be queried.
+    """
+    with db_connection() as conn:
+        if conn:
+            try:
+                cur = conn.cursor()
                 
-                # Add members in qualification from the latest entry
-                if result[1] and result[1].strip():
-                    membros_qualificacao = [m.strip() for m in result[1].split('\n') if m.strip()]
-            
-            return novos_membros, membros_qualificacao
-            
-        except Exception as e:
-            st.error(f"Erro ao buscar membros do banco de dados: {e}")
-            return [], []
-        finally:
-            cur.close()
-            conn.close()
+                # Ensure we're strictly filtering by ministry to avoid cross-ministry data
+                cur.execute(MONTH_MEMBERS_QUERY, (ministerio, mes, ano))
+                
+                result = cur.fetchall()
+                
+                # Initialize lists for members
+                novos_membros = []
+                membros_qualificacao = []
+                
+                # Process the results only if we have data for the specified ministry
+                if result:
+                    novos_membros = [nome for nome, status in result if status == "novo"]
+                    membros_qualificacao = [nome for nome, status in result if status == "qualificacao"]
+                
+                return novos_membros, membros_qualificacao
+                
+            except Exception as e:
+                st.error(f"Erro ao buscar membros do banco de dados: {e}")
+                return None
+            finally:
+                cur.close()
     
-    return [], []
+    st.error("Não foi possível conectar ao banco de dados.")
+    return None
 
-# Function to promote a member from qualification to new member in the database
-def promote_member_in_database(ministerio, mes, ano, membro):
-    """Update all records for the current month to move a member from qualification to new member list."""
-    conn = connect_to_db()
-    if conn:
-        try:
-            cur = conn.cursor()
-            
-            # Get all entries for this ministry, month and year
-            cur.execute("""
-                SELECT id, nomes_novos_membros, nomes_membros_qualificacao 
-                FROM avaliacoes_ministerios 
-                WHERE ministerio = %s 
-                AND mes_referencia = %s 
-                AND ano_referencia = %s
-            """, (ministerio, mes, ano))
-            
-            entries = cur.fetchall()
-            
-            for entry in entries:
-                entry_id = entry[0]
-                novos_membros_text = entry[1] or ""
-                membros_qualificacao_text = entry[2] or ""
+# Move members from the qualification list to the new members list of every entry of the month,
+# preserving the order of both lists (names are trimmed and deduplicated like extract_member_names)
+PROMOTE_MEMBERS_SQL = """
+    WITH promovidos AS (
+        SELECT nome, MIN(posicao) AS posicao
+        FROM unnest(%(membros)s::text[]) WITH ORDINALITY AS p(nome, posicao)
+        GROUP BY nome
+    ),
+    listas AS (
+        SELECT 
+            a.id,
+            ARRAY(
+                SELECT btrim(n.nome) 
+                FROM unnest(string_to_array(a.nomes_novos_membros, E'\\n')) WITH ORDINALITY AS n(nome, posicao)
+                WHERE btrim(n.nome) <> ''
+                GROUP BY btrim(n.nome)
+                ORDER BY MIN(n.posicao)
+            ) AS novos,
+            ARRAY(
+                SELECT btrim(q.nome) 
+                FROM unnest(string_to_array(a.nomes_membros_qualificacao, E'\\n')) WITH ORDINALITY AS q(nome, posicao)
+                WHERE btrim(q.nome) <> ''
+                GROUP BY btrim(q.nome)
+                ORDER BY MIN(q.posicao)
+            ) AS qualificacao
+        FROM avaliacoes_ministerios a
+        WHERE 
+            a.ministerio = %(ministerio)s AND 
+            a.mes_referencia = %(mes)s AND 
+            a.ano_referencia = %(ano)s
+    ),
+    alteradas AS (
+        SELECT 
+            l.id,
+            l.novos || ARRAY(
+                SELECT p.nome FROM promovidos p
+                WHERE p.nome = ANY(l.qualificacao) AND NOT p.nome = ANY(l.novos)
+                ORDER BY p.posicao
+            ) AS novos,
+            ARRAY(
+                SELECT q.nome 
+                FROM unnest(l.qualificacao) WITH ORDINALITY AS q(nome, posicao)
+                WHERE NOT q.nome = ANY(%(membros)s::text[])
+                ORDER BY q.posicao
+            ) AS qualificacao
+        FROM listas l
+        -- Entries where none of the members is in qualification are left untouched
+        WHERE l.qualificacao && %(membros)s::text[]
+    )
+    UPDATE avaliacoes_ministerios a SET
+        nomes_novos_membros = array_to_string(alteradas.novos, E'\\n'),
+        nomes_membros_qualificacao = array_to_string(alteradas.qualificacao, E'\\n'),
+        novos_membros = cardinality(alteradas.novos),
+        membros_qualificacao = cardinality(alteradas.qualificacao)
+    FROM alteradas
+    WHERE a.id = alteradas.id
+"""
+
+# Function to promote several members at once
+def promote_members_in_database(ministerio, mes, ano, membros):
+    """Promote members from qualification to new members in all records of the month, in one transaction."""
+    membros = list(dict.fromkeys(membros))
+    if not membros:
+        return True
+    
+    with db_connection() as conn:
+        if conn:
+            try:
+                cur = conn.cursor()
                 
-                # Parse member lists
-                novos_membros = [m.strip() for m in novos_membros_text.split('\n') if m.strip()]
-                membros_qualificacao = [m.strip() for m in membros_qualificacao_text.split('\n') if m.strip()]
+                # One set-based UPDATE for the submitted name lists of the month
+                cur.execute(PROMOTE_MEMBERS_SQL, {
+                    "ministerio": ministerio,
+                    "mes": mes,
+                    "ano": ano,
+                    "membros": membros
+                })
                 
-                # Check if the member is in qualification list
-                if membro in membros_qualificacao:
-                    # Remove from qualification
-                    membros_qualificacao = [m for m in membros_qualificacao if m != membro]
-                    
-                    # Add to new members if not already there
-                    if membro not in novos_membros:
-                        novos_membros.append(membro)
-                    
-                    # Update counts
-                    novos_membros_count = len(novos_membros)
-                    membros_qualificacao_count = len(membros_qualificacao)
-                    
-                    # Update database
-                    cur.execute("""
-                        UPDATE avaliacoes_ministerios SET
-                            nomes_novos_membros = %s,
-                            nomes_membros_qualificacao = %s,
-                            novos_membros = %s,
-                            membros_qualificacao = %s
-                        WHERE id = %s
-                    """, (
-                        '\n'.join(novos_membros),
-                        '\n'.join(membros_qualificacao),
-                        novos_membros_count,
-                        membros_qualificacao_count,
-                        entry_id
-                    ))
-            
-            conn.commit()
-            return True
-        except Exception as e:
-            st.error(f"Erro ao promover membro no banco de dados: {e}")
-            return False
-        finally:
-            cur.close()
-            conn.close()
+                # The roster is the source of truth: one indexed UPDATE
+                cur.execute("""
+                    UPDATE membros_ministerios SET
+                        status = 'novo',
+                        promovido_em = CURRENT_TIMESTAMP
+                    WHERE ministerio = %s 
+                    AND mes_referencia = %s 
+                    AND ano_referencia = %s 
+                    AND nome = ANY(%s) 
+                    AND status = 'qualificacao'
+                """, (ministerio, mes, ano, membros))
+                
+                refresh_ministry_summary(cur, ministerio, mes, ano)
+                notify_change(cur, "promocao", ministerio, mes, ano)
+                conn.commit()
+                invalidate_dashboard_cache()
+                return True
+            except Exception as e:
+                st.error(f"Erro ao promover membros no banco de dados: {e}")
+                return False
+            finally:
+                cur.close()
+    st.error("Não foi possível conectar ao banco de dados.")
     return False
 
+# Function to promote a member from qualification to new member in database
+def promote_member_in_database(ministerio, mes, ano, membro):
+    """Update all records for the current month to move a member from qualification to new member list."""
+    return promote_members_in_database(ministerio, mes, ano, [membro])
+
 # Run the app
 if __name__ == "__main__":
     main() 
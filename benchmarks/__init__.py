@@ -0,0 +1,6 @@
+"""Benchmarks for the ministry evaluation app.
+
+Run a benchmark as a module from the project root, e.g.:
+    python -m benchmarks.member_extraction
+    python -m benchmarks.suite run --output resultados.json
+"""
@@ -0,0 +1,78 @@
+"""Compare the row-by-row member extraction with the vectorized extract_member_names().
+
+Usage:
+    python -m benchmarks.member_extraction [--submissions 5000] [--names 15] [--repeat 5]
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from app import extract_member_names
+
+
+# The loop the dashboard used before extract_member_names()
+def legacy_extract_member_names(column, exclude=()):
+    """Row-by-row extraction with list membership checks (quadratic in the number of names)."""
+    unique_names = []
+    for value in column:
+        if pd.notna(value) and value:
+            current_members = [nome.strip() for nome in value.split('\n') if nome.strip()]
+            for membro in current_members:
+                if membro not in unique_names and membro not in exclude:
+                    unique_names.append(membro)
+    return unique_names
+
+def generate_member_column(submissions, names_per_submission, seed=42):
+    """Build newline-joined member lists drawn from a pool that grows with the history."""
+    rng = random.Random(seed)
+    pool = [f"Membro {i:05d}" for i in range(max(submissions // 2, names_per_submission))]
+    column = []
+    for _ in range(submissions):
+        names = rng.sample(pool, rng.randint(0, names_per_submission))
+        column.append(" \n".join(names) if names else rng.choice([None, ""]))
+    return pd.Series(column, dtype="object")
+
+def best_time(func, repeat):
+    """Return the best wall-clock time of `repeat` calls, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, nargs="+", default=[500, 2000, 5000])
+    parser.add_argument("--names", type=int, default=15, help="Máximo de nomes por submissão.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'submissões':>12} {'nomes únicos':>13} {'laço (ms)':>11} {'vetorizado (ms)':>16} {'ganho':>8}")
+    for submissions in args.submissions:
+        novos = generate_member_column(submissions, args.names, seed=1)
+        qualificacao = generate_member_column(submissions, args.names, seed=2)
+
+        def run_legacy():
+            unique_novos = legacy_extract_member_names(novos)
+            return unique_novos, legacy_extract_member_names(qualificacao, exclude=unique_novos)
+
+        def run_vectorized():
+            unique_novos = extract_member_names(novos)
+            return unique_novos, extract_member_names(qualificacao, exclude=unique_novos)
+
+        # Both implementations must agree before their timings mean anything
+        assert run_legacy() == run_vectorized()
+
+        unique_novos, unique_qualificacao = run_vectorized()
+        legacy = best_time(run_legacy, args.repeat)
+        vectorized = best_time(run_vectorized, args.repeat)
+        print(
+            f"{submissions:>12} {len(unique_novos) + len(unique_qualificacao):>13} {legacy * 1000:>11.1f} "
+            f"{vectorized * 1000:>16.1f} {legacy / vectorized:>7.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""Time the dashboard and form operations against synthetic data and compare runs.
+
+Usage:
+    python -m benchmarks.suite run [--backend postgres|memory] [--ministries 6] [--years 2]
+                                   [--repeat 5] [--output resultados.json] [--keep-data]
+    python -m benchmarks.suite compare base.json novo.json [--threshold 1.2]
+
+The postgres backend writes into the database configured in config.py (use the DB_*
+environment variables to point it at a local PostgreSQL) and refuses to run when
+avaliacoes_ministerios already has rows. The memory backend times the pandas code
+paths on a DataFrame stand-in and needs no database.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import app
+from benchmarks.synthetic import evaluations_frame, generate_evaluations, ministry_names
+
+BENCHMARK_TABLES = "avaliacoes_ministerios, resumo_ministerios, membros_ministerios, classificacoes_ministerios"
+
+def measure(func, repeat):
+    """Return the wall-clock time of `repeat` calls, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def summarize(timings):
+    """Reduce a list of timings (seconds) to the statistics stored in the results file."""
+    return {
+        "runs": len(timings),
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "max_ms": max(timings) * 1000
+    }
+
+def current_commit():
+    """Short hash of the checked-out commit, with a marker for uncommitted changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout
+        return commit + ("-dirty" if dirty.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def sample_periods(args):
+    """The (ministry, month, year) combinations the per-ministry operations are timed on."""
+    ministerio = ministry_names(args.ministries)[0]
+    last_year = args.start_year + args.years - 1
+    return ministerio, app.MESES[5], last_year
+
+# Postgres backend: load through save_evaluation, then time the real query functions
+def run_postgres(args):
+    """Return (timings, rows loaded) for the database code paths."""
+    if not app.initialize_database():
+        raise SystemExit("Não foi possível preparar o banco de dados.")
+
+    with app.db_connection() as conn:
+        if not conn:
+            raise SystemExit("Não foi possível conectar ao banco de dados.")
+        cur = conn.cursor()
+        cur.execute("SELECT EXISTS (SELECT 1 FROM avaliacoes_ministerios)")
+        if cur.fetchone()[0]:
+            raise SystemExit("avaliacoes_ministerios já tem dados; use um banco vazio para o benchmark.")
+        cur.close()
+
+    results = {}
+    saves = []
+    try:
+        for data in generate_evaluations(args.ministries, args.years, args.start_year, seed=args.seed):
+            start = time.perf_counter()
+            if not app.save_evaluation(data):
+                raise SystemExit("save_evaluation falhou durante a carga.")
+            saves.append(time.perf_counter() - start)
+        results["save_evaluation"] = summarize(saves)
+
+        ministerio, mes, ano = sample_periods(args)
+        filters = {
+            "mes": (mes, str(ano), "Todas"),
+            "ano": ("Todos", str(ano), "Todas"),
+            "semana": (mes, str(ano), "3"),
+            "tudo": ("Todos", "Todos", "Todas")
+        }
+
+        def timed(name, func):
+            # Every call must reach the database, not st.cache_data, and load the pandas-mode
+            # rows in full (marking the snapshots stale would only time the delta check)
+            def uncached():
+                app.invalidate_dashboard_cache()
+                app.get_snapshot_store().clear()
+                func()
+            results[name] = summarize(measure(uncached, args.repeat))
+
+        timed("get_existing_members", lambda: app.get_existing_members(ministerio, mes, ano))
+
+        for mode in ("sql", "pandas"):
+            app.AGGREGATION_MODE = mode
+            for label, (mes_filtro, ano_filtro, semana_filtro) in filters.items():
+                timed(f"ranking_{mode}[{label}]", lambda: app.load_ministry_scores(mes_filtro, ano_filtro, semana_filtro))
+            timed(f"aba_treinamentos_{mode}", lambda: app.load_list_items("treinamentos", ministerio, "Todos", str(ano), "Todas"))
+            timed(f"aba_estrategias_{mode}", lambda: app.load_list_items("estrategias", ministerio, "Todos", str(ano), "Todas"))
+        app.AGGREGATION_MODE = "sql"
+
+        timed("premiacao_anual", lambda: (app.load_annual_rankings(), app.load_ranking_race(ano)))
+        timed("evolucao_semanal", lambda: app.load_weekly_scores(ministerio, "Todos", str(ano), "Todas"))
+        timed("historico_submissoes", lambda: app.load_submission_history(ministerio, "Todos", str(ano), "Todas"))
+        timed("painel_membros", lambda: app.load_ministry_members(ministerio, mes, str(ano)))
+        timed("aba_preparo_equipe", lambda: app.load_weekly_activities(ministerio, "Todos", str(ano), "Todas"))
+        timed("aba_comentarios", lambda: app.load_ministry_details(ministerio, "Todos", str(ano), "Todas"))
+
+        # Promote a different member of the sample month on every run
+        qualificacao = app.get_existing_members(ministerio, mes, ano)[1]
+        promotions = []
+        for membro in qualificacao[:args.repeat]:
+            start = time.perf_counter()
+            app.promote_member_in_database(ministerio, mes, ano, membro)
+            promotions.append(time.perf_counter() - start)
+        if promotions:
+            results["promote_member_in_database"] = summarize(promotions)
+    finally:
+        if not args.keep_data:
+            with app.db_connection() as conn:
+                if conn:
+                    cur = conn.cursor()
+                    cur.execute(f"TRUNCATE {BENCHMARK_TABLES} CASCADE")
+                    conn.commit()
+                    cur.close()
+    return results, len(saves)
+
+# Memory backend: the pandas code paths on a DataFrame stand-in for the table
+def run_memory(args):
+    """Return (timings, rows generated) for the pandas code paths."""
+    evaluations = list(generate_evaluations(args.ministries, args.years, args.start_year, seed=args.seed))
+    frame = evaluations_frame(evaluations)
+    ministerio, mes, ano = sample_periods(args)
+
+    month = frame[(frame["ministerio"] == ministerio) & (frame["mes_referencia"] == mes) & (frame["ano_referencia"] == ano)]
+    ministry_year = frame[(frame["ministerio"] == ministerio) & (frame["ano_referencia"] == ano)]
+
+    def existing_members():
+        latest_first = month.sort_values("data_submissao", ascending=False)
+        novos = app.extract_member_names(latest_first["nomes_novos_membros"])
+        return novos, app.extract_member_names(latest_first["nomes_membros_qualificacao"], exclude=novos)
+
+    operations = {
+        "get_existing_members": existing_members,
+        "ranking_pandas[mes]": lambda: app.compute_ministry_scores(
+            frame[(frame["mes_referencia"] == mes) & (frame["ano_referencia"] == ano)]
+        ),
+        "ranking_pandas[tudo]": lambda: app.compute_ministry_scores(frame),
+        "evolucao_semanal": lambda: app.compute_weekly_scores(ministry_year),
+        "aba_treinamentos_pandas": lambda: app.collect_list_items(ministry_year["treinamentos"]),
+        "aba_estrategias_pandas": lambda: app.collect_list_items(ministry_year["estrategias"])
+    }
+    results = {name: summarize(measure(func, args.repeat)) for name, func in operations.items()}
+    return results, len(frame)
+
+def run(args):
+    """Run the selected backend, print the medians and optionally write the JSON report."""
+    started = datetime.now()
+    timings, rows = run_postgres(args) if args.backend == "postgres" else run_memory(args)
+
+    report = {
+        "commit": current_commit(),
+        "created_at": started.isoformat(timespec="seconds"),
+        "backend": args.backend,
+        "python": platform.python_version(),
+        "params": {
+            "ministries": args.ministries,
+            "years": args.years,
+            "start_year": args.start_year,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "rows": rows
+        },
+        "timings": timings
+    }
+
+    for name, stats in timings.items():
+        print(f"{name:<36} {stats['median_ms']:>10.2f} ms  (n={stats['runs']})")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Resultados gravados em {args.output}.")
+    return 0
+
+def compare(args):
+    """Print the median of each operation in two result files and flag regressions."""
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.novo, encoding="utf-8") as f:
+        novo = json.load(f)
+
+    if base["params"] != novo["params"] or base["backend"] != novo["backend"]:
+        print("Aviso: os resultados foram gerados com parâmetros diferentes.", file=sys.stderr)
+
+    print(f"{'operação':<36} {base.get('commit') or 'base':>12} {novo.get('commit') or 'novo':>12} {'razão':>8}")
+    regressions = 0
+    for name in sorted(set(base["timings"]) | set(novo["timings"])):
+        before = base["timings"].get(name, {}).get("median_ms")
+        after = novo["timings"].get(name, {}).get("median_ms")
+        if before is None or after is None:
+            print(f"{name:<36} {before or '-':>12} {after or '-':>12}")
+            continue
+        ratio = after / before if before else float("inf")
+        flag = "  <- regressão" if ratio > args.threshold else ""
+        regressions += bool(flag)
+        print(f"{name:<36} {before:>10.2f}ms {after:>10.2f}ms {ratio:>7.2f}x{flag}")
+    return 1 if regressions else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Gera os dados sintéticos e mede as operações.")
+    run_parser.add_argument("--backend", choices=["postgres", "memory"], default="postgres")
+    run_parser.add_argument("--ministries", type=int, default=6)
+    run_parser.add_argument("--years", type=int, default=2)
+    run_parser.add_argument("--start-year", type=int, default=2024)
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--output", help="Arquivo JSON onde gravar os resultados.")
+    run_parser.add_argument("--keep-data", action="store_true", help="Não apaga os dados sintéticos ao final.")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser("compare", help="Compara dois arquivos de resultados.")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("novo")
+    compare_parser.add_argument("--threshold", type=float, default=1.2, help="Razão a partir da qual há regressão.")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Synthetic avaliacoes_ministerios data for the benchmarks.
+
+Every ministry submits one evaluation per week (5 per month) for the requested
+years, with member lists that grow and get promoted over time, JSONB-style
+trainings/strategies and long weekly descriptions.
+"""
+import random
+
+import pandas as pd
+
+from app import MESES
+
+MINISTRY_NAMES = [
+    "Milaf", "Midaf", "Técnica", "Comunicação", "Intercessão", "Introdutores",
+    "Infantil", "Jovens", "Casais", "Dança", "Teatro", "Recepção"
+]
+
+TRAININGS = [
+    "Oficina de liderança", "Treinamento de som", "Curso de teologia", "Ensaio geral",
+    "Capacitação de voluntários", "Workshop de fotografia", "Escola de líderes",
+    "Treinamento de primeiros socorros", "Curso de libras", "Oficina de comunicação"
+]
+
+STRATEGIES = [
+    "Convidar visitantes", "Células nos bairros", "Divulgação nas redes", "Mentoria um a um",
+    "Eventos de integração", "Visitas aos novos membros", "Escala rotativa", "Culto jovem mensal"
+]
+
+WORDS = (
+    "equipe oração jejum ensaio reunião louvor preparo técnico equipamentos celebração "
+    "comunhão liderança voluntários escala culto semana ministério planejamento avaliação "
+    "treinamento dedicação serviço alinhamento crescimento acompanhamento visitantes"
+).split()
+
+def ministry_names(count):
+    """Return `count` ministry names, numbering extra ones beyond the built-in list."""
+    names = MINISTRY_NAMES[:count]
+    names += [f"Ministério {i}" for i in range(len(names) + 1, count + 1)]
+    return names
+
+def long_text(rng, min_words=30, max_words=250):
+    """A paragraph of random words, as long as the descriptions leaders usually type."""
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))).capitalize() + "."
+
+def generate_evaluations(ministries=6, years=2, start_year=2024, max_members=15, seed=42):
+    """Yield evaluation dicts in the format save_evaluation() expects, in submission order."""
+    rng = random.Random(seed)
+    names = ministry_names(ministries)
+
+    # Each ministry keeps a roster that carries over from month to month
+    next_member = {ministerio: 1 for ministerio in names}
+    bias = {ministerio: rng.uniform(-2, 1) for ministerio in names}
+
+    for ano in range(start_year, start_year + years):
+        for mes in MESES:
+            rosters = {}
+            for ministerio in names:
+                qualificacao = []
+                for _ in range(rng.randint(0, max_members)):
+                    qualificacao.append(f"{ministerio} Membro {next_member[ministerio]:04d}")
+                    next_member[ministerio] += 1
+                rosters[ministerio] = ([], qualificacao)
+
+            for semana in range(1, 6):
+                for ministerio in names:
+                    novos, qualificacao = rosters[ministerio]
+
+                    # Some members finish their qualification during the month
+                    for membro in [m for m in qualificacao if rng.random() < 0.1]:
+                        qualificacao.remove(membro)
+                        novos.append(membro)
+
+                    def score():
+                        return max(1, min(10, round(rng.gauss(7.5 + bias[ministerio], 1.5))))
+
+                    data = {
+                        "ministerio": ministerio,
+                        "nome": f"Líder {ministerio}",
+                        "email": f"lider.{semana}@exemplo.com",
+                        "pontualidade": score(),
+                        "assiduidade_celebracoes": score(),
+                        "assiduidade_reunioes": score(),
+                        "trabalho_equipe": score(),
+                        "treinamentos": rng.sample(TRAININGS, rng.randint(0, 4)),
+                        "estrategias": rng.sample(STRATEGIES, rng.randint(0, 3)),
+                        "novos_membros": len(novos),
+                        "membros_qualificacao": len(qualificacao),
+                        "nomes_novos_membros": "\n".join(novos),
+                        "nomes_membros_qualificacao": "\n".join(qualificacao),
+                        "comentarios": long_text(rng, 0, 80),
+                        "mes_referencia": mes,
+                        "ano_referencia": ano,
+                        "semana_referencia": semana
+                    }
+
+                    # Like the form, only the submission's own week is filled in
+                    for categoria in ("consagracao", "preparo_tecnico", "reunioes"):
+                        for week in range(1, 6):
+                            data[f"{categoria}_semana{week}"] = long_text(rng) if week == semana else ""
+
+                    yield data
+
+def evaluations_frame(evaluations):
+    """Build the in-memory stand-in for avaliacoes_ministerios from generated evaluations."""
+    frame = pd.DataFrame(list(evaluations))
+    frame.insert(0, "id", range(1, len(frame) + 1))
+    frame["data_submissao"] = pd.date_range("2024-01-01", periods=len(frame), freq="h")
+    return frame
@@ -1,9 +1,32 @@
-# Database credentials
-DB_HOST = "145.223.92.209"  # Host Externo
-DB_PORT = "5432"  # Porta Externa
-DB_NAME = "postgresql"  # Nome do Banco de Dados
-DB_USER = "postgres"  # Usuário
-DB_PASSWORD = "ZAvbW7c67IKjNF"  # Senha
+import os
+
+# Database credentials (as variáveis de ambiente permitem apontar para um PostgreSQL local)
+DB_HOST = os.environ.get("DB_HOST", "145.223.92.209")  # Host Externo
+DB_PORT = os.environ.get("DB_PORT", "5432")  # Porta Externa
+DB_NAME = os.environ.get("DB_NAME", "postgresql")  # Nome do Banco de Dados
+DB_USER = os.environ.get("DB_USER", "postgres")  # Usuário
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "ZAvbW7c67IKjNF")  # Senha
+
+# Connection pool settings
+DB_POOL_MIN_CONN = 1  # Conexões mantidas abertas no pool
+DB_POOL_MAX_CONN = 10  # Máximo de conexões simultâneas
+DB_POOL_TIMEOUT = 10  # Segundos de espera por uma conexão livre
+DB_POOL_HEALTHCHECK_INTERVAL = 60  # Segundos ociosa antes de testar a conexão
+
+# Dashboard settings
+DASHBOARD_CACHE_TTL = 300  # Segundos que os dados do painel ficam em cache
+AGGREGATION_MODE = "sql"  # "sql" agrega no PostgreSQL; "pandas" agrega as linhas no app
+DASHBOARD_REFRESH_INTERVAL = 15  # Segundos entre as buscas por novas submissões no painel
+SNAPSHOT_CACHE_MAX_ENTRIES = 64  # Combinações de filtros mantidas em memória (as menos usadas saem primeiro)
+LIVE_UPDATES = True  # Atualiza o painel via LISTEN/NOTIFY quando um líder envia uma avaliação
+
+# Slow-query log (JSON lines, rotacionado); None desativa o registro
+SLOW_QUERY_THRESHOLD_MS = 200  # Consultas a partir deste tempo são registradas
+SLOW_QUERY_LOG = "logs/consultas_lentas.jsonl"  # Caminhos relativos partem da pasta do app
+
+# Data exports (arquivos gerados ficam em cache, identificados pelo conteúdo exportado)
+EXPORT_CACHE_DIR = "cache/exportacoes"  # Caminhos relativos partem da pasta do app
+EXPORT_CACHE_MAX_FILES = 50  # Arquivos mantidos no cache; os usados há mais tempo são apagados
 
 # Administrator credentials
 ADMIN_USERNAME = "EDILENE SANTOS"
@@ -0,0 +1,554 @@
+"""Maintenance commands for the ministry evaluation app.
+
+Usage:
+    python manage.py migrate
+    python manage.py rebuild-summary
+    python manage.py listen
+    python manage.py slow-queries [--log logs/consultas_lentas.jsonl] [--top 20] [--sort total]
+    python manage.py import historico.csv|historico.parquet [--chunk-size 20000] [--rejeitados rejeitados.csv] [--dry-run]
+    python manage.py export [--dados avaliacoes|resumo|ranking] [--formato csv|parquet|xlsx]
+                            [--mes Março] [--ano 2025] [--semana 2] [--saida arquivo]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+import psycopg2
+from psycopg2 import sql
+
+import app
+
+
+# Apply pending schema migrations
+def migrate(args):
+    """Bring the database schema up to date."""
+    with app.db_connection() as conn:
+        if not conn:
+            print("Não foi possível conectar ao banco de dados.", file=sys.stderr)
+            return 1
+        version = app.apply_migrations(conn)
+    print(f"Esquema atualizado (versão {version}).")
+    return 0
+
+# Rebuild the per-week summary table and the award placings from the evaluations
+def rebuild_summary(args):
+    """Recompute resumo_ministerios and classificacoes_ministerios from scratch in a single transaction."""
+    with app.db_connection() as conn:
+        if not conn:
+            print("Não foi possível conectar ao banco de dados.", file=sys.stderr)
+            return 1
+        cur = conn.cursor()
+        try:
+            rows = app.rebuild_summary_table(cur)
+            placings = app.rebuild_rankings_table(cur)
+            conn.commit()
+        finally:
+            cur.close()
+    print(f"Resumo reconstruído: {rows} linhas ({placings} classificações).")
+    return 0
+
+# Print the notifications sent by save_evaluation and the member promotions
+def listen(args):
+    """Follow the live submission feed until interrupted (Ctrl+C)."""
+    def print_events(events):
+        for event in events:
+            print(f"[{datetime.now():%H:%M:%S}] {event.get('evento')}: "
+                  f"{event.get('ministerio')} {event.get('mes')}/{event.get('ano')}", flush=True)
+    
+    listener = app.SubmissionListener(app.get_snapshot_store(), on_events=print_events)
+    print(f"Aguardando notificações no canal {app.NOTIFY_CHANNEL}...", flush=True)
+    try:
+        listener.run()
+    except KeyboardInterrupt:
+        listener.stop()
+    return 0
+
+# Aggregate the slow-query log by statement fingerprint
+def slow_queries(args):
+    """Print count, total, mean, p95 and max duration per fingerprint, including rotated files."""
+    if args.log is None:
+        print("O registro de consultas lentas está desativado (SLOW_QUERY_LOG = None).")
+        return 0
+    paths = sorted(glob.glob(args.log + ".*"), reverse=True) + [args.log]
+    groups = {}
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    group = groups.setdefault(entry["fingerprint"], {
+                        "consulta": entry["consulta"], "duracoes": [], "linhas": [], "origens": set()
+                    })
+                    group["duracoes"].append(entry["duracao_ms"])
+                    group["linhas"].append(entry.get("linhas") or 0)
+                    if entry.get("origem"):
+                        group["origens"].add(entry["origem"])
+        except FileNotFoundError:
+            continue
+
+    if not groups:
+        print(f"Nenhuma consulta lenta registrada em {args.log}.")
+        return 0
+
+    rows = []
+    for fingerprint, group in groups.items():
+        duracoes = sorted(group["duracoes"])
+        rows.append({
+            "fingerprint": fingerprint,
+            "count": len(duracoes),
+            "total": sum(duracoes),
+            "mean": statistics.fmean(duracoes),
+            "p95": duracoes[min(len(duracoes) - 1, int(round(0.95 * (len(duracoes) - 1))))],
+            "max": duracoes[-1],
+            "linhas": statistics.fmean(group["linhas"]),
+            "origens": ", ".join(sorted(group["origens"])),
+            "consulta": group["consulta"]
+        })
+    rows.sort(key=lambda row: row[args.sort], reverse=True)
+
+    print(f"{'fingerprint':<13} {'exec.':>6} {'total ms':>10} {'média':>9} {'p95':>9} {'máx':>9} {'linhas':>8}  origem")
+    for row in rows[:args.top]:
+        print(
+            f"{row['fingerprint']:<13} {row['count']:>6} {row['total']:>10.1f} {row['mean']:>9.1f} "
+            f"{row['p95']:>9.1f} {row['max']:>9.1f} {row['linhas']:>8.0f}  {row['origens']}"
+        )
+        print(f"    {row['consulta'][:150]}")
+    return 0
+
+# Bulk import of historical evaluations. The file is read in chunks; each chunk is
+# validated column-wise, COPYed into a staging table dropped at commit and merged into
+# avaliacoes_ministerios on the natural key (ministry, year, month, week) in its own
+# transaction, so re-running an interrupted import is safe.
+IMPORT_REQUIRED_COLUMNS = [
+    "ministerio", "nome", "email", *app.SCORE_COLUMNS,
+    "mes_referencia", "ano_referencia", "semana_referencia"
+]
+IMPORT_OPTIONAL_COLUMNS = [
+    "treinamentos", "estrategias", "novos_membros", "membros_qualificacao",
+    "nomes_novos_membros", "nomes_membros_qualificacao", "comentarios", "data_submissao",
+    *app.WIDE_ACTIVITY_COLUMNS
+]
+IMPORT_COLUMNS = IMPORT_REQUIRED_COLUMNS + IMPORT_OPTIONAL_COLUMNS
+IMPORT_DATE_FORMATS = ["ISO8601", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y"]
+
+# Columns merged into avaliacoes_ministerios (the weekly activities go to atividades_semanais)
+MERGE_COLUMNS = [column for column in IMPORT_COLUMNS if column not in app.WIDE_ACTIVITY_COLUMNS]
+NATURAL_KEY = ["ministerio", "ano_referencia", "mes_referencia", "semana_referencia"]
+DUPLICATE_REASON = "duplicada no arquivo (vale a última)"
+
+STAGING_TABLE_SQL = f"""
+    CREATE TEMP TABLE importacao_avaliacoes (
+        ministerio VARCHAR(100), nome VARCHAR(255), email VARCHAR(255),
+        {", ".join(f"{column} INTEGER" for column in app.SCORE_COLUMNS)},
+        mes_referencia VARCHAR(20), ano_referencia INTEGER, semana_referencia INTEGER,
+        treinamentos JSONB, estrategias JSONB, novos_membros INTEGER, membros_qualificacao INTEGER,
+        nomes_novos_membros TEXT, nomes_membros_qualificacao TEXT, comentarios TEXT, data_submissao TIMESTAMP,
+        {", ".join(f"{column} TEXT" for column in app.WIDE_ACTIVITY_COLUMNS)}
+    ) ON COMMIT DROP
+"""
+
+# Same upsert as save_evaluation; imported rows keep their own data_submissao when given
+MERGE_SQL = f"""
+    INSERT INTO avaliacoes_ministerios ({", ".join(MERGE_COLUMNS)})
+    SELECT {", ".join(
+        "COALESCE(data_submissao, CURRENT_TIMESTAMP)" if column == "data_submissao" else column
+        for column in MERGE_COLUMNS
+    )}
+    FROM importacao_avaliacoes
+    ON CONFLICT ({", ".join(NATURAL_KEY)}) DO UPDATE SET
+        {", ".join(f"{column} = EXCLUDED.{column}" for column in MERGE_COLUMNS if column not in NATURAL_KEY)}
+    RETURNING xmax = 0
+"""
+
+# Replace the weekly activities of the merged evaluations with the imported ones
+ACTIVITIES_MERGE_SQL = [
+    """
+    DELETE FROM atividades_semanais w
+    USING avaliacoes_ministerios a
+    JOIN importacao_avaliacoes i USING (ministerio, ano_referencia, mes_referencia, semana_referencia)
+    WHERE w.avaliacao_id = a.id
+    """,
+    sql.SQL("""
+    INSERT INTO atividades_semanais (avaliacao_id, categoria, semana, texto)
+    SELECT a.id, w.categoria, w.semana, btrim(w.texto)
+    FROM importacao_avaliacoes i
+    JOIN avaliacoes_ministerios a USING (ministerio, ano_referencia, mes_referencia, semana_referencia)
+    CROSS JOIN LATERAL (VALUES {}) AS w(categoria, semana, texto)
+    WHERE btrim(w.texto) <> ''
+    """).format(sql.SQL(", ").join(
+        sql.SQL("({}, {}, i.{})").format(
+            sql.Literal(column.rsplit("_semana", 1)[0]), sql.Literal(int(column[-1])), sql.Identifier(column)
+        )
+        for column in app.WIDE_ACTIVITY_COLUMNS
+    ))
+]
+
+# Roster of each imported month from its latest submission, as sync_ministry_members
+# leaves it after a form submission: new members first, then those in qualification
+IMPORTED_MEMBERS_CTE = """
+    WITH meses AS (
+        SELECT DISTINCT ministerio, ano_referencia, mes_referencia FROM importacao_avaliacoes
+    ),
+    ultimas AS (
+        SELECT DISTINCT ON (a.ministerio, a.ano_referencia, a.mes_referencia)
+            a.ministerio, a.ano_referencia, a.mes_referencia, a.nomes_novos_membros, a.nomes_membros_qualificacao
+        FROM avaliacoes_ministerios a
+        JOIN meses USING (ministerio, ano_referencia, mes_referencia)
+        ORDER BY a.ministerio, a.ano_referencia, a.mes_referencia, a.data_submissao DESC NULLS LAST, a.id DESC
+    ),
+    nomes AS (
+        SELECT
+            u.ministerio, u.ano_referencia, u.mes_referencia, btrim(n.nome) AS nome,
+            CASE WHEN bool_or(n.status = 'novo') THEN 'novo' ELSE 'qualificacao' END AS status,
+            MIN(n.posicao) AS posicao
+        FROM ultimas u
+        CROSS JOIN LATERAL (
+            SELECT nome, 'novo' AS status, posicao
+            FROM regexp_split_to_table(COALESCE(u.nomes_novos_membros, ''), E'\\n') WITH ORDINALITY AS t(nome, posicao)
+            UNION ALL
+            SELECT nome, 'qualificacao', 1000000 + posicao
+            FROM regexp_split_to_table(COALESCE(u.nomes_membros_qualificacao, ''), E'\\n') WITH ORDINALITY AS t(nome, posicao)
+        ) n
+        WHERE btrim(n.nome) <> ''
+        GROUP BY u.ministerio, u.ano_referencia, u.mes_referencia, btrim(n.nome)
+    )
+"""
+
+MEMBERS_MERGE_SQL = [
+    IMPORTED_MEMBERS_CTE + """
+    DELETE FROM membros_ministerios m
+    USING meses
+    WHERE m.ministerio = meses.ministerio
+    AND m.ano_referencia = meses.ano_referencia
+    AND m.mes_referencia = meses.mes_referencia
+    AND NOT EXISTS (
+        SELECT 1 FROM nomes n
+        WHERE n.ministerio = m.ministerio AND n.ano_referencia = m.ano_referencia
+        AND n.mes_referencia = m.mes_referencia AND n.nome = m.nome
+    )
+    """,
+    IMPORTED_MEMBERS_CTE + """
+    INSERT INTO membros_ministerios (ministerio, ano_referencia, mes_referencia, nome, status)
+    SELECT ministerio, ano_referencia, mes_referencia, nome, status
+    FROM nomes
+    ORDER BY ministerio, ano_referencia, mes_referencia, posicao
+    ON CONFLICT (ministerio, ano_referencia, mes_referencia, nome) DO UPDATE SET
+        status = EXCLUDED.status,
+        promovido_em = CASE
+            WHEN membros_ministerios.status = 'qualificacao' AND EXCLUDED.status = 'novo'
+            THEN CURRENT_TIMESTAMP
+            ELSE membros_ministerios.promovido_em
+        END
+    """
+]
+
+SUMMARY_MERGE_SQL = f"""
+    INSERT INTO resumo_ministerios ({", ".join(app.SUMMARY_KEY_COLUMNS + app.SUMMARY_VALUE_COLUMNS)})
+    {app.build_summary_select(
+        "WHERE (ministerio, ano_referencia, mes_referencia) IN "
+        "(SELECT ministerio, ano_referencia, mes_referencia FROM importacao_avaliacoes)"
+    )}
+    ON CONFLICT ({", ".join(app.SUMMARY_KEY_COLUMNS)}) DO UPDATE SET
+        {", ".join(f"{column} = EXCLUDED.{column}" for column in app.SUMMARY_VALUE_COLUMNS)}
+"""
+
+def read_import_chunks(path, chunk_size, separador=","):
+    """Yield DataFrames of at most chunk_size rows from a CSV or Parquet file, as strings."""
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas().astype("string").fillna("")
+    else:
+        yield from pd.read_csv(path, sep=separador, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+def parse_list_cell(value):
+    """Turn a JSON array or a ';'-separated cell into the JSON stored in the list columns, or None."""
+    value = value.strip()
+    if value.startswith("["):
+        try:
+            items = json.loads(value)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(items, list):
+            return None
+    else:
+        items = value.split(";")
+    return json.dumps([str(item).strip() for item in items if str(item).strip()], ensure_ascii=False)
+
+def validate_import_chunk(chunk):
+    """Split a chunk into (rows ready for COPY, rejected rows with a 'motivo' column).
+
+    The checks run on whole columns; a row is rejected for the first check it fails.
+    """
+    chunk = chunk.rename(columns=lambda column: str(column).strip().lower())
+    for column in IMPORT_OPTIONAL_COLUMNS:
+        if column not in chunk:
+            chunk[column] = ""
+    chunk = chunk[IMPORT_COLUMNS].fillna("").astype(str).apply(lambda column: column.str.strip())
+
+    rows = pd.DataFrame(index=chunk.index)
+    motivo = pd.Series(None, index=chunk.index, dtype="object")
+
+    def reject(invalid, reason):
+        motivo[invalid & motivo.isna()] = reason
+
+    def integers(column, low, high):
+        values = pd.to_numeric(chunk[column], errors="coerce")
+        valid = values.between(low, high) & (values % 1 == 0)
+        return values.where(valid).astype("Int64"), valid
+
+    for column in ("ministerio", "nome", "email", "mes_referencia"):
+        reject(chunk[column] == "", f"{column} vazio")
+        rows[column] = chunk[column]
+
+    reject(~chunk["email"].str.match(app.EMAIL_PATTERN), "e-mail inválido")
+
+    # Same ranges as the CHECK constraints of the table
+    for column in app.SCORE_COLUMNS:
+        rows[column], valid = integers(column, 1, 10)
+        reject(~valid, f"{column} fora de 1 a 10")
+
+    rows["mes_referencia"] = chunk["mes_referencia"].str.capitalize()
+    reject(~rows["mes_referencia"].isin(app.MESES), "mês inválido")
+
+    rows["ano_referencia"], valid = integers("ano_referencia", 1900, 2999)
+    reject(~valid, "ano inválido")
+
+    rows["semana_referencia"], valid = integers("semana_referencia", 1, 5)
+    reject(~valid, "semana fora de 1 a 5")
+
+    for column in ("treinamentos", "estrategias"):
+        rows[column] = chunk[column].map(parse_list_cell)
+        reject(rows[column].isna(), f"{column} não é uma lista")
+
+    # Names may be newline- or ';'-separated; a missing count is the number of names
+    for names, count in (("nomes_novos_membros", "novos_membros"), ("nomes_membros_qualificacao", "membros_qualificacao")):
+        rows[names] = chunk[names].str.replace(";", "\n", regex=False)
+        rows[count], valid = integers(count, 0, 10**6)
+        reject((chunk[count] != "") & ~valid, f"{count} inválido")
+        rows[count] = rows[count].fillna(rows[names].str.count(r"(?m)^[ \t]*\S"))
+
+    rows["comentarios"] = chunk["comentarios"]
+    # Each accepted date format is parsed for the whole column at once
+    rows["data_submissao"] = pd.Series(pd.NaT, index=chunk.index, dtype="datetime64[ns]")
+    for date_format in IMPORT_DATE_FORMATS:
+        missing = (chunk["data_submissao"] != "") & rows["data_submissao"].isna()
+        if not missing.any():
+            break
+        rows.loc[missing, "data_submissao"] = pd.to_datetime(
+            chunk.loc[missing, "data_submissao"], errors="coerce", format=date_format
+        )
+    reject((chunk["data_submissao"] != "") & rows["data_submissao"].isna(), "data_submissao inválida")
+
+    for column in app.WIDE_ACTIVITY_COLUMNS:
+        rows[column] = chunk[column]
+
+    # A later row for the same ministry/week replaces an earlier one, as a re-submission would;
+    # the replaced rows are reported, so every row read is accounted for
+    replaced = rows.loc[motivo.isna(), NATURAL_KEY].duplicated(keep="last")
+    reject(replaced.reindex(chunk.index, fill_value=False), DUPLICATE_REASON)
+
+    rejected = chunk[motivo.notna()].assign(motivo=motivo[motivo.notna()])
+    valid = rows.loc[motivo.isna(), IMPORT_COLUMNS]
+    return valid, rejected
+
+def reject_replaced_rows(valid, seen):
+    """Return the rows of earlier chunks that `valid` replaces, as rejected rows, and record its keys.
+
+    `seen` maps every natural key accepted so far to its row number in the file. The
+    earlier rows are already merged, so only their number and key are reported.
+    """
+    replaced = {}
+    for registro, *key in valid[NATURAL_KEY].itertuples(name=None):
+        key = tuple(key)
+        if key in seen:
+            replaced[seen[key]] = key
+        seen[key] = registro
+    rows = pd.DataFrame(list(replaced.values()), index=list(replaced), columns=NATURAL_KEY)
+    return rows.assign(motivo=DUPLICATE_REASON)
+
+def merge_import_chunk(cur, rows):
+    """COPY validated rows into the staging table and merge them, inside the caller's transaction.
+
+    Returns the number of inserted and of updated evaluations.
+    """
+    cur.execute(STAGING_TABLE_SQL)
+
+    buffer = io.StringIO()
+    rows.to_csv(buffer, header=False, index=False, date_format="%Y-%m-%d %H:%M:%S")
+    buffer.seek(0)
+    cur.copy_expert(f"COPY importacao_avaliacoes ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    cur.execute(MERGE_SQL)
+    inserted = sum(1 for (novo,) in cur.fetchall() if novo)
+    for statement in ACTIVITIES_MERGE_SQL + MEMBERS_MERGE_SQL:
+        cur.execute(statement)
+    cur.execute(SUMMARY_MERGE_SQL)
+    return inserted, len(rows) - inserted
+
+# Import historical evaluations from a CSV or Parquet file
+def import_evaluations(args):
+    """Stream the file into avaliacoes_ministerios and report throughput and rejected rows."""
+    if not os.path.exists(args.arquivo):
+        print(f"Arquivo não encontrado: {args.arquivo}", file=sys.stderr)
+        return 1
+    if args.rejeitados and os.path.exists(args.rejeitados):
+        os.remove(args.rejeitados)
+
+    started = time.perf_counter()
+    totals = {"lidas": 0, "inseridas": 0, "atualizadas": 0, "rejeitadas": 0}
+    reasons = {}
+    years = set()
+    seen = {}
+
+    # A dry run only validates, so it does not need the database
+    with contextlib.nullcontext() if args.dry_run else app.db_connection() as conn:
+        if not args.dry_run:
+            if not conn:
+                print("Não foi possível conectar ao banco de dados.", file=sys.stderr)
+                return 1
+            app.apply_migrations(conn)
+
+        for chunk in read_import_chunks(args.arquivo, args.chunk_size, args.separador):
+            columns = set(chunk.columns.str.strip().str.lower())
+            missing = [column for column in IMPORT_REQUIRED_COLUMNS if column not in columns]
+            if missing:
+                print(f"Colunas obrigatórias ausentes: {', '.join(missing)}", file=sys.stderr)
+                return 1
+
+            # Rows are numbered from 1 across the whole file in the rejection report
+            chunk.index = range(totals["lidas"] + 1, totals["lidas"] + len(chunk) + 1)
+            valid, rejected = validate_import_chunk(chunk)
+            # A week repeated in a later chunk replaces the row merged before; that row is
+            # counted as rejected and the update it receives now is not counted
+            replaced = reject_replaced_rows(valid, seen)
+            if not replaced.empty:
+                rejected = pd.concat([rejected, replaced.reindex(columns=rejected.columns)]).sort_index()
+            totals["lidas"] += len(chunk)
+            totals["rejeitadas"] += len(rejected)
+            for reason, count in rejected["motivo"].value_counts().items():
+                reasons[reason] = reasons.get(reason, 0) + count
+            if args.rejeitados and not rejected.empty:
+                rejected.to_csv(
+                    args.rejeitados, mode="a", index_label="registro", header=not os.path.exists(args.rejeitados)
+                )
+
+            if not args.dry_run and not valid.empty:
+                cur = conn.cursor()
+                try:
+                    inserted, updated = merge_import_chunk(cur, valid)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    cur.close()
+                totals["inseridas"] += inserted
+                totals["atualizadas"] += updated - len(replaced)
+                years.update(int(ano) for ano in valid["ano_referencia"].unique())
+
+            elapsed = time.perf_counter() - started
+            print(f"{totals['lidas']} linhas lidas ({totals['lidas'] / elapsed:,.0f} linhas/s)", flush=True)
+
+        # Award placings are recomputed once per imported year; open dashboards are refreshed
+        if years:
+            cur = conn.cursor()
+            try:
+                for ano in sorted(years):
+                    app.refresh_ministry_rankings(cur, ano)
+                    app.notify_change(cur, "importacao", None, None, ano)
+                conn.commit()
+            finally:
+                cur.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Concluído em {elapsed:.1f}s ({totals['lidas'] / elapsed:,.0f} linhas/s): "
+        f"{totals['lidas']} lidas, {totals['inseridas']} inseridas, "
+        f"{totals['atualizadas']} atualizadas, {totals['rejeitadas']} rejeitadas."
+    )
+    for reason, count in sorted(reasons.items(), key=lambda item: -item[1]):
+        print(f"{count:>10}  {reason}")
+    if args.rejeitados and totals["rejeitadas"]:
+        print(f"Linhas rejeitadas gravadas em {args.rejeitados}.")
+    if args.dry_run:
+        print("Simulação: nada foi gravado no banco de dados.")
+    return 0
+
+# Export the dashboard data for a set of filters, through the same cache as the dashboard
+def year_filter(value):
+    """argparse type for --ano: "Todos" or a year."""
+    if value == "Todos":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ano inválido: {value!r} (use um número ou Todos)")
+
+def export_data(args):
+    """Write the chosen dataset to a CSV, Parquet or Excel file."""
+    started = time.perf_counter()
+    try:
+        path, rows, reused = app.export_dataset(args.dados, args.formato, args.mes, args.ano, args.semana)
+    except psycopg2.OperationalError as e:
+        print(e, file=sys.stderr)
+        return 1
+    saida = args.saida or app.export_file_name(args.dados, args.formato, args.mes, args.ano, args.semana)
+    shutil.copyfile(path, saida)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{rows} linhas exportadas para {saida} "
+        f"({os.path.getsize(saida) / 1_000_000:.1f} MB em {elapsed:.1f}s"
+        f"{', reaproveitado do cache' if reused else ''})."
+    )
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tarefas de manutenção da Avaliação dos Ministérios.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("migrate", help="Aplica as migrações pendentes do banco de dados.").set_defaults(func=migrate)
+    subparsers.add_parser("rebuild-summary", help="Reconstrói as tabelas resumo_ministerios e classificacoes_ministerios.").set_defaults(func=rebuild_summary)
+    subparsers.add_parser("listen", help="Mostra as avaliações e promoções à medida que são enviadas.").set_defaults(func=listen)
+
+    report_parser = subparsers.add_parser("slow-queries", help="Resume o registro de consultas lentas por fingerprint.")
+    report_parser.add_argument("--log", default=app.SLOW_QUERY_LOG, help="Arquivo do registro (os rotacionados são lidos também).")
+    report_parser.add_argument("--top", type=int, default=20)
+    report_parser.add_argument("--sort", choices=["total", "count", "mean", "p95", "max"], default="total")
+    report_parser.set_defaults(func=slow_queries)
+
+    import_parser = subparsers.add_parser("import", help="Importa avaliações históricas de um arquivo CSV ou Parquet.")
+    import_parser.add_argument("arquivo")
+    import_parser.add_argument("--chunk-size", type=int, default=20000, help="Linhas lidas e gravadas por vez.")
+    import_parser.add_argument("--separador", default=",", help="Separador de colunas do CSV.")
+    import_parser.add_argument("--rejeitados", help="Arquivo CSV onde gravar as linhas rejeitadas e o motivo.")
+    import_parser.add_argument("--dry-run", action="store_true", help="Só valida o arquivo, sem gravar no banco.")
+    import_parser.set_defaults(func=import_evaluations)
+
+    export_parser = subparsers.add_parser("export", help="Exporta a classificação, o resumo ou as avaliações filtradas.")
+    export_parser.add_argument("--dados", choices=list(app.EXPORT_DATASETS), default="avaliacoes")
+    export_parser.add_argument("--formato", choices=list(app.EXPORT_FORMATS), default="csv")
+    export_parser.add_argument("--mes", choices=["Todos"] + list(app.PERIOD_FILTERS), default="Todos", help="Mês ou trimestre.")
+    export_parser.add_argument("--ano", type=year_filter, default="Todos")
+    export_parser.add_argument("--semana", choices=["Todas", "1", "2", "3", "4", "5"], default="Todas")
+    export_parser.add_argument("--saida", help="Arquivo de destino (padrão: nome com os filtros, na pasta atual).")
+    export_parser.set_defaults(func=export_data)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""Cached loaders raise when no connection is available, so Streamlit does not cache the failure."""
+from contextlib import contextmanager
+from unittest import mock
+
+import psycopg2
+import pytest
+
+import app
+
+
+@contextmanager
+def no_connection():
+    yield None
+
+def test_required_connection_raises_without_a_connection(monkeypatch):
+    monkeypatch.setattr(app, "db_connection", no_connection)
+
+    with pytest.raises(psycopg2.OperationalError):
+        with app.required_db_connection():
+            pytest.fail("the block must not run without a connection")
+
+def test_failed_loader_is_retried(monkeypatch):
+    monkeypatch.setattr(app, "db_connection", no_connection)
+    app.load_annual_rankings.clear()
+
+    with pytest.raises(psycopg2.OperationalError):
+        app.load_annual_rankings()
+
+    monkeypatch.setattr(app, "read_frame", mock.Mock(return_value="classificacoes"))
+    assert app.load_annual_rankings() == "classificacoes"
+    app.load_annual_rankings.clear()
@@ -0,0 +1,102 @@
+"""Row checks of manage.py import, which run on whole chunks before anything reaches the database."""
+import json
+
+import pandas as pd
+import pytest
+
+import manage
+
+
+def row(**changes):
+    values = {
+        "ministerio": "Midaf", "nome": "Marcela", "email": "marcela@example.com",
+        "pontualidade": "8", "assiduidade_celebracoes": "9", "assiduidade_reunioes": "7", "trabalho_equipe": "10",
+        "mes_referencia": "Março", "ano_referencia": "2025", "semana_referencia": "2"
+    }
+    values.update(changes)
+    return values
+
+def validate(*rows, start=1):
+    chunk = pd.DataFrame(list(rows), dtype=str)
+    chunk.index = range(start, start + len(chunk))
+    return manage.validate_import_chunk(chunk)
+
+@pytest.mark.parametrize("value, expected", [
+    ('["Liderança", " Louvor "]', ["Liderança", "Louvor"]),
+    ("Liderança; Louvor;", ["Liderança", "Louvor"]),
+    ("", []),
+    ('["Liderança"', None),
+    ("Liderança", ["Liderança"]),
+])
+def test_parse_list_cell(value, expected):
+    parsed = manage.parse_list_cell(value)
+    assert (None if parsed is None else json.loads(parsed)) == expected
+
+def test_valid_row_is_typed_and_completed():
+    valid, rejected = validate(row(
+        treinamentos="Liderança; Louvor", nomes_novos_membros="Ana; Bruno", data_submissao="05/03/2025 19:30"
+    ))
+
+    assert rejected.empty
+    imported = valid.iloc[0]
+    assert imported["semana_referencia"] == 2
+    assert json.loads(imported["treinamentos"]) == ["Liderança", "Louvor"]
+    assert [nome.strip() for nome in imported["nomes_novos_membros"].split("\n")] == ["Ana", "Bruno"]
+    assert imported["novos_membros"] == 2
+    assert imported["data_submissao"] == pd.Timestamp("2025-03-05 19:30")
+
+@pytest.mark.parametrize("changes, reason", [
+    ({"nome": ""}, "nome vazio"),
+    ({"email": "marcela.example.com"}, "e-mail inválido"),
+    ({"pontualidade": "11"}, "pontualidade fora de 1 a 10"),
+    ({"trabalho_equipe": "7.5"}, "trabalho_equipe fora de 1 a 10"),
+    ({"mes_referencia": "Marco"}, "mês inválido"),
+    ({"ano_referencia": "25"}, "ano inválido"),
+    ({"semana_referencia": "6"}, "semana fora de 1 a 5"),
+    ({"estrategias": '["Oração"'}, "estrategias não é uma lista"),
+    ({"novos_membros": "dois"}, "novos_membros inválido"),
+    ({"data_submissao": "ontem"}, "data_submissao inválida"),
+])
+def test_rejection_reasons(changes, reason):
+    valid, rejected = validate(row(**changes))
+
+    assert valid.empty
+    assert rejected["motivo"].tolist() == [reason]
+
+def test_first_failed_check_is_reported():
+    _, rejected = validate(row(email="invalido", semana_referencia="9"))
+    assert rejected["motivo"].tolist() == ["e-mail inválido"]
+
+@pytest.mark.parametrize("mes", ["março", "MARÇO", " março "])
+def test_month_names_are_normalized(mes):
+    valid, rejected = validate(row(mes_referencia=mes))
+
+    assert rejected.empty
+    assert valid["mes_referencia"].tolist() == ["Março"]
+
+def test_in_file_duplicates_keep_the_last_row():
+    valid, rejected = validate(
+        row(comentarios="primeira"),
+        row(comentarios="inválida", pontualidade="0"),
+        row(comentarios="segunda"),
+        row(semana_referencia="3"),
+    )
+
+    assert valid["comentarios"].tolist() == ["segunda", ""]
+    assert rejected["motivo"].to_dict() == {
+        1: manage.DUPLICATE_REASON,
+        2: "pontualidade fora de 1 a 10"
+    }
+
+def test_duplicates_across_chunks_reject_the_earlier_row():
+    seen = {}
+    first, _ = validate(row(), row(semana_referencia="3"))
+    second, _ = validate(row(semana_referencia="3", comentarios="reenviada"), start=3)
+
+    assert manage.reject_replaced_rows(first, seen).empty
+    replaced = manage.reject_replaced_rows(second, seen)
+
+    assert replaced.index.tolist() == [2]
+    assert replaced.iloc[0]["semana_referencia"] == 3
+    assert replaced.iloc[0]["motivo"] == manage.DUPLICATE_REASON
+    assert seen[("Midaf", 2025, "Março", 3)] == 3
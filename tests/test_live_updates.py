@@ -0,0 +1,63 @@
+"""SubmissionListener reruns the subscribed sessions through Streamlit's private session manager."""
+import inspect
+import logging
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from streamlit import runtime
+
+import app
+
+
+class FakeSessionManager:
+    def __init__(self, active):
+        self.sessions = {session_id: SimpleNamespace(session=mock.Mock()) for session_id in active}
+
+    def get_active_session_info(self, session_id):
+        return self.sessions.get(session_id)
+
+@pytest.fixture
+def listener():
+    listener = app.SubmissionListener(app.SnapshotStore())
+    listener.subscribe("ativa")
+    listener.subscribe("encerrada")
+    return listener
+
+def test_reruns_active_sessions_and_drops_closed_ones(listener, monkeypatch):
+    session_mgr = FakeSessionManager(["ativa"])
+    monkeypatch.setattr(runtime, "exists", lambda: True)
+    monkeypatch.setattr(runtime, "get_instance", lambda: SimpleNamespace(_session_mgr=session_mgr))
+
+    listener._rerun_sessions()
+
+    session_mgr.sessions["ativa"].session.request_rerun.assert_called_once_with(None)
+    assert listener.sessions == {"ativa"}
+
+def test_does_nothing_without_a_runtime(listener, monkeypatch):
+    monkeypatch.setattr(runtime, "exists", lambda: False)
+    monkeypatch.setattr(runtime, "get_instance", mock.Mock(side_effect=AssertionError))
+
+    listener._rerun_sessions()
+
+    assert listener.sessions == {"ativa", "encerrada"}
+
+def test_warns_when_the_private_api_is_gone(listener, monkeypatch, caplog):
+    monkeypatch.setattr(runtime, "exists", lambda: True)
+    monkeypatch.setattr(runtime, "get_instance", lambda: SimpleNamespace())
+
+    with caplog.at_level(logging.WARNING, logger="analise_ministerios"):
+        listener._rerun_sessions()
+
+    assert "_session_mgr" in caplog.text
+
+def test_installed_streamlit_still_has_the_private_api():
+    """Fails on a Streamlit upgrade that renames what _rerun_sessions relies on."""
+    from streamlit.runtime.app_session import AppSession
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.session_manager import SessionManager
+
+    assert "self._session_mgr" in inspect.getsource(Runtime.__init__)
+    assert hasattr(SessionManager, "get_active_session_info")
+    assert "session" in inspect.signature(runtime.session_manager.ActiveSessionInfo).parameters
+    assert "client_state" in inspect.signature(AppSession.request_rerun).parameters
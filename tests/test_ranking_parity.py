@@ -0,0 +1,99 @@
+"""The pandas and SQL aggregation modes must rank the ministries identically."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+def summarize_weeks(rows):
+    """pandas stand-in for build_summary_select: per-week sums and non-null counts."""
+    keys = ["ministerio", "ano_referencia", "mes_referencia", "semana_referencia"]
+    grouped = rows.groupby(keys)
+    summary = grouped.size().rename("avaliacoes").to_frame()
+    for column in app.SCORE_COLUMNS:
+        summary[f"soma_{column}"] = grouped[column].sum(min_count=1)
+        summary[f"contagem_{column}"] = grouped[column].count()
+    return summary.reset_index()
+
+def sql_mode_scores(rows):
+    """pandas stand-in for build_ranking_query over the summary rows, ranked like load_ministry_scores."""
+    summary = summarize_weeks(rows)
+    grouped = summary.groupby("ministerio")
+    scores = pd.DataFrame({
+        column: grouped[f"soma_{column}"].sum() / grouped[f"contagem_{column}"].sum().replace(0, np.nan)
+        for column in app.SCORE_COLUMNS
+    })
+    scores["avaliacoes"] = grouped["avaliacoes"].sum()
+    return app.rank_ministry_scores(scores.sort_index())
+
+def evaluation(ministerio, semana, scores, mes="Março", ano=2025):
+    return {
+        "ministerio": ministerio, "mes_referencia": mes, "ano_referencia": ano, "semana_referencia": semana,
+        **dict(zip(app.SCORE_COLUMNS, scores))
+    }
+
+def assert_same_ranking(rows):
+    expected = app.compute_ministry_scores(rows)
+    actual = sql_mode_scores(rows)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_names=False)
+    return actual
+
+def test_weeks_with_several_evaluations():
+    rows = pd.DataFrame([
+        evaluation("Midaf", 1, (7, 8, 9, 10)),
+        evaluation("Midaf", 1, (5, 6, 7, 8)),
+        evaluation("Midaf", 2, (10, 10, 10, 10)),
+        evaluation("Milaf", 1, (9, 9, 9, 9)),
+        evaluation("Técnica", 3, (6, 7, 8, 9), mes="Abril"),
+    ])
+    ranking = assert_same_ranking(rows)
+    assert ranking.index.tolist() == ["Milaf", "Midaf", "Técnica"]
+    assert ranking.loc["Midaf", "avaliacoes"] == 3
+
+def test_ties_keep_alphabetical_order():
+    rows = pd.DataFrame([
+        evaluation("Técnica", 1, (8, 8, 8, 8)),
+        evaluation("Comunicação", 1, (9, 7, 8, 8)),
+        evaluation("Midaf", 2, (8, 8, 8, 8)),
+        evaluation("Milaf", 1, (10, 10, 10, 10)),
+    ])
+    ranking = assert_same_ranking(rows)
+    assert ranking.index.tolist() == ["Milaf", "Comunicação", "Midaf", "Técnica"]
+
+def test_null_scores_are_skipped():
+    rows = pd.DataFrame([
+        evaluation("Midaf", 1, (8, None, 6, 7)),
+        evaluation("Midaf", 2, (6, 9, None, 7)),
+        evaluation("Milaf", 1, (None, None, None, None)),
+        evaluation("Milaf", 2, (9, None, 9, 9)),
+        evaluation("Técnica", 1, (7, 7, 7, 7)),
+    ])
+    ranking = assert_same_ranking(rows)
+    assert ranking.loc["Midaf", "assiduidade_celebracoes"] == 9
+    assert np.isnan(ranking.loc["Milaf", "assiduidade_celebracoes"])
+    assert ranking.loc["Milaf", "avaliacoes"] == 2
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_history(seed):
+    rng = np.random.default_rng(seed)
+    ministerios = ["Milaf", "Midaf", "Técnica", "Comunicação", "Intercessão"]
+    rows = pd.DataFrame([
+        evaluation(
+            rng.choice(ministerios), int(rng.integers(1, 6)),
+            [None if rng.random() < 0.1 else int(rng.integers(1, 11)) for _ in app.SCORE_COLUMNS],
+            mes=rng.choice(app.MESES), ano=int(rng.integers(2024, 2026))
+        )
+        for _ in range(300)
+    ])
+    assert_same_ranking(rows)
+
+def test_ties_on_the_displayed_total_go_to_more_evaluations():
+    scores = pd.DataFrame(
+        [(8.13, 8, 8, 8, 2), (8.125, 8, 8, 8, 3), (7, 7, 7, 7, 3), (7, 7, 7, 7, 3)],
+        index=pd.Index(["Midaf", "Técnica", "Comunicação", "Milaf"], name="ministerio"),
+        columns=app.SCORE_COLUMNS + ["avaliacoes"]
+    )
+    ranking = app.rank_ministry_scores(scores)
+    # 32.125 rounds half up to 32.13, as ROUND(::NUMERIC, 2) does in RANKING_TIE_BREAK_SQL
+    assert ranking.index.tolist() == ["Técnica", "Midaf", "Comunicação", "Milaf"]
@@ -0,0 +1,103 @@
+"""load_ministry_scores must rank identically in "sql" and "pandas" mode on a real database.
+
+Runs only when DB_HOST and DB_NAME are set in the environment (config.py reads them),
+pointing at a test PostgreSQL. Everything is created in a throwaway schema, through
+PGOPTIONS, and dropped afterwards.
+"""
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+import psycopg2
+import pytest
+from psycopg2.extras import execute_values
+
+import app
+
+pytestmark = pytest.mark.skipif(
+    not (os.environ.get("DB_HOST") and os.environ.get("DB_NAME")),
+    reason="DB_HOST/DB_NAME não apontam para um PostgreSQL de teste"
+)
+
+MINISTERIOS = ["Milaf", "Midaf", "Técnica", "Comunicação", "Intercessão", "Introdutores"]
+
+def history():
+    """One evaluation per ministry and week (the table's unique key), with NULL scores and ties."""
+    rng = np.random.default_rng(7)
+    rows = []
+    for ano in (2024, 2025):
+        for mes in app.MESES[:7]:
+            for semana in range(1, 6):
+                for ministerio in MINISTERIOS:
+                    if rng.random() < 0.3:
+                        continue
+                    scores = [None if rng.random() < 0.1 else int(rng.integers(1, 11)) for _ in app.SCORE_COLUMNS]
+                    rows.append((ministerio, ano, mes, semana, *scores))
+    # Same scores and evaluation count in a month of their own: only the name decides
+    for ministerio in ("Técnica", "Comunicação"):
+        rows.append((ministerio, 2023, "Dezembro", 1, 8, 8, 8, None))
+    return rows
+
+@pytest.fixture(scope="module")
+def database():
+    schema = f"teste_paridade_{uuid.uuid4().hex[:8]}"
+    previous_options = os.environ.get("PGOPTIONS")
+    try:
+        setup = psycopg2.connect(**app.get_connection_params())
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL de teste indisponível: {e}")
+    setup.autocommit = True
+    setup.cursor().execute(f"CREATE SCHEMA {schema}")
+    os.environ["PGOPTIONS"] = f"-c search_path={schema}"
+    pool = app.create_connection_pool()
+    previous_pool, app.standalone_pool = app.standalone_pool, pool
+    try:
+        app.initialize_database()
+        with app.db_connection() as conn:
+            cur = conn.cursor()
+            execute_values(cur, f"""
+                INSERT INTO avaliacoes_ministerios (
+                    nome, email, ministerio, ano_referencia, mes_referencia, semana_referencia,
+                    {", ".join(app.SCORE_COLUMNS)}
+                ) VALUES %s
+            """, [("Líder", "lider@example.com", *row) for row in history()])
+            app.rebuild_summary_table(cur)
+            conn.commit()
+        yield
+    finally:
+        app.standalone_pool = previous_pool
+        pool._pool.closeall()
+        if previous_options is None:
+            os.environ.pop("PGOPTIONS", None)
+        else:
+            os.environ["PGOPTIONS"] = previous_options
+        setup.cursor().execute(f"DROP SCHEMA {schema} CASCADE")
+        setup.close()
+
+def scores_in_mode(monkeypatch, mode, filters):
+    monkeypatch.setattr(app, "AGGREGATION_MODE", mode)
+    app.load_ministry_scores.clear()
+    app.get_snapshot_store().clear()
+    return app.load_ministry_scores(*filters)
+
+@pytest.mark.parametrize("filters", [
+    ("Todos", "Todos", "Todas"),
+    ("Todos", "2025", "Todas"),
+    ("Março", "2024", "Todas"),
+    ("2º Trimestre", "2025", "3"),
+    ("Dezembro", "2023", "Todas"),
+])
+def test_sql_and_pandas_modes_rank_identically(database, monkeypatch, filters):
+    sql_scores = scores_in_mode(monkeypatch, "sql", filters)
+    pandas_scores = scores_in_mode(monkeypatch, "pandas", filters)
+
+    assert not sql_scores.empty
+    pd.testing.assert_frame_equal(
+        sql_scores[app.SCORE_COLUMNS + ["avaliacoes", "pontuacao_total"]],
+        pandas_scores[app.SCORE_COLUMNS + ["avaliacoes", "pontuacao_total"]],
+        check_dtype=False, check_names=False
+    )
+    if filters[0] == "Dezembro":
+        assert sql_scores.index.tolist() == ["Comunicação", "Técnica"]
+        assert np.isnan(sql_scores.loc["Técnica", "trabalho_equipe"])
@@ -0,0 +1,43 @@
+"""Setting SLOW_QUERY_LOG or SLOW_QUERY_THRESHOLD_MS to None turns the slow-query log off."""
+import json
+import logging
+from unittest import mock
+
+import pytest
+
+import app
+
+
+@pytest.fixture(autouse=True)
+def fresh_logger():
+    logger = logging.getLogger("analise_ministerios.consultas_lentas")
+    yield
+    for handler in list(logger.handlers):
+        handler.close()
+        logger.removeHandler(handler)
+
+def test_logs_to_the_configured_file(tmp_path, monkeypatch):
+    log = tmp_path / "lentas" / "consultas.jsonl"
+    monkeypatch.setattr(app, "SLOW_QUERY_LOG", str(log))
+
+    app.log_slow_query("SELECT * FROM avaliacoes_ministerios WHERE ano_referencia = %s", [2025], 0.5, 3)
+
+    entry = json.loads(log.read_text(encoding="utf-8"))
+    assert entry["duracao_ms"] == 500
+    assert entry["linhas"] == 3
+
+def test_no_log_file_disables_logging(monkeypatch):
+    monkeypatch.setattr(app, "SLOW_QUERY_LOG", None)
+    monkeypatch.setattr(app, "get_slow_query_logger", mock.Mock(side_effect=AssertionError))
+
+    app.log_slow_query("SELECT 1", None, 5.0, 1)
+
+def test_slow_queries_still_run_without_a_log_file(monkeypatch):
+    monkeypatch.setattr(app, "SLOW_QUERY_LOG", None)
+    monkeypatch.setattr(app, "SLOW_QUERY_THRESHOLD_MS", 0)
+    monkeypatch.setattr(app, "get_perf_collector", lambda: None)
+    monkeypatch.setattr(app, "log_slow_query", mock.Mock(side_effect=AssertionError))
+    call = mock.Mock(return_value=[(1,)])
+
+    assert app.InstrumentedCursor._timed(mock.Mock(), "SELECT 1", None, call) == [(1,)]
+    call.assert_called_once_with()